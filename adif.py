@@ -0,0 +1,106 @@
+"""
+Format ADIF (.adi) - standardowy format wymiany logów krótkofalarskich.
+
+Pole to `<NAZWA:długość>wartość`, rekord kończy `<EOR>`, nagłówek - `<EOH>`.
+Długość liczona jest w bajtach UTF-8, dlatego parser czyta plik jako latin-1
+(bajt = znak) i dopiero gotowe wartości dekoduje z UTF-8.
+
+Parser jest strumieniowy: czyta plik porcjami i oddaje rekordy jeden po drugim,
+więc pamięć nie zależy od rozmiaru logu.
+"""
+import io
+import os
+import re
+
+ADIF_VERSION = "3.1.4"
+PROGRAM_ID = "radio-tracker"
+READ_CHUNK = 1 << 16
+
+_TAG = re.compile(r"<([A-Za-z0-9_]+)(?::(\d+)(?::[A-Za-z])?)?>")
+
+
+def field(name, value):
+    """Jedno pole ADIF (puste wartości są pomijane)."""
+    value = str(value)
+    if not value:
+        return ""
+    return f"<{name}:{len(value.encode('utf-8'))}>{value} "
+
+
+def header():
+    """Nagłówek pliku ADIF."""
+    return (
+        "Radio Tracker - eksport logbooka\n"
+        + field("ADIF_VER", ADIF_VERSION)
+        + field("PROGRAMID", PROGRAM_ID)
+        + "<EOH>\n"
+    )
+
+
+def record(fields):
+    """Rekord ADIF z dict {NAZWA: wartość}."""
+    return "".join(field(k, v) for k, v in fields.items()) + "<EOR>\n"
+
+
+def _decode(value):
+    if value.isascii():
+        return value
+    try:
+        return value.encode("latin-1").decode("utf-8")
+    except UnicodeError:
+        return value
+
+
+def iter_records(source, chunk_size=READ_CHUNK):
+    """
+    Rekordy ADIF jako dict {NAZWA (wielkimi literami): wartość}.
+    `source` to ścieżka albo plik (binarny lub tekstowy).
+    Pola nagłówka (przed `<EOH>`) są pomijane; tekst poza polami - ignorowany.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="latin-1", newline="") as stream:
+            yield from _parse(stream, chunk_size)
+    elif isinstance(source, io.TextIOBase):
+        yield from _parse(source, chunk_size)
+    else:
+        stream = io.TextIOWrapper(source, encoding="latin-1", newline="")
+        try:
+            yield from _parse(stream, chunk_size)
+        finally:
+            stream.detach()  # Plik źródłowy zostaje otwarty dla wywołującego
+
+
+def _parse(stream, chunk_size):
+    buf, current, eof = "", {}, False
+    while True:
+        pos = 0
+        while True:
+            m = _TAG.search(buf, pos)
+            if m is None:
+                # Znacznik urwany na końcu porcji czeka na następną
+                cut = buf.rfind("<", pos)
+                pos = cut if cut >= 0 and not eof and ">" not in buf[cut:] else len(buf)
+                break
+            name, length = m.group(1).upper(), m.group(2)
+            if length is None:
+                pos = m.end()
+                if name == "EOR":
+                    if current:
+                        yield current
+                    current = {}
+                elif name == "EOH":
+                    current = {}
+                continue
+            end = m.end() + int(length)
+            if end > len(buf) and not eof:
+                pos = m.start()
+                break  # Wartość urwana na końcu porcji
+            current[name] = _decode(buf[m.end():end])
+            pos = end
+        if eof:
+            break
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + chunk
+    if current:
+        yield current
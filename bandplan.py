@@ -0,0 +1,122 @@
+"""
+Plan pasm i zapytania o zakresy częstotliwości.
+
+- `BAND_PLAN` to tabela (od MHz, do MHz, pasmo, opis) - posortowana i bez
+  nakładania się, więc pasmo dowolnej liczby częstotliwości wyznacza jedno
+  `searchsorted` po początkach przedziałów.
+- `parse_mhz` zamienia tekstowe kolumny "MHz" ("145.800", "6.000-6.200",
+  "145,5") na liczby: początek i koniec zakresu.
+- `FrequencyIndex` odpowiada na pytania "wszystko między 144 a 146 MHz"
+  dla tabeli wpisów (także zakresów) bez przeglądania całej tabeli.
+"""
+import numpy as np
+import pandas as pd
+
+BAND_PLAN = [
+    (0.1485, 0.2835, "LW", "Fale długie (LW)"),
+    (0.5265, 1.6065, "MW", "Fale średnie (MW)"),
+    (1.810, 2.000, "160m", "Pasmo amatorskie 160m"),
+    (3.500, 3.800, "80m", "Pasmo amatorskie 80m"),
+    (5.3515, 5.3665, "60m", "Pasmo amatorskie 60m"),
+    (5.900, 6.200, "49m", "Radiofonia KF 49m"),
+    (7.000, 7.200, "40m", "Pasmo amatorskie 40m"),
+    (7.200, 7.450, "41m", "Radiofonia KF 41m"),
+    (9.400, 9.900, "31m", "Radiofonia KF 31m"),
+    (10.100, 10.150, "30m", "Pasmo amatorskie 30m"),
+    (11.600, 12.100, "25m", "Radiofonia KF 25m"),
+    (13.570, 13.870, "22m", "Radiofonia KF 22m"),
+    (14.000, 14.350, "20m", "Pasmo amatorskie 20m"),
+    (15.100, 15.800, "19m", "Radiofonia KF 19m"),
+    (17.480, 17.900, "16m", "Radiofonia KF 16m"),
+    (18.068, 18.168, "17m", "Pasmo amatorskie 17m"),
+    (21.000, 21.450, "15m", "Pasmo amatorskie 15m"),
+    (21.450, 21.850, "13m", "Radiofonia KF 13m"),
+    (24.890, 24.990, "12m", "Pasmo amatorskie 12m"),
+    (26.960, 27.410, "CB", "Pasmo CB (11m)"),
+    (28.000, 29.700, "10m", "Pasmo amatorskie 10m"),
+    (50.000, 52.000, "6m", "Pasmo amatorskie 6m"),
+    (70.000, 70.500, "4m", "Pasmo amatorskie 4m"),
+    (87.500, 108.000, "FM", "Radio FM (UKF)"),
+    (108.000, 137.000, "Air", "Lotnictwo (AM)"),
+    (137.000, 138.000, "Sat", "Satelity meteorologiczne (NOAA, Meteor)"),
+    (144.000, 146.000, "2m", "Pasmo 2m (VHF)"),
+    (156.000, 162.025, "Marine", "Morskie (VHF)"),
+    (430.000, 440.000, "70cm", "Pasmo 70cm (UHF)"),
+    (446.000, 446.200, "PMR", "PMR 446"),
+    (1240.000, 1300.000, "23cm", "Pasmo amatorskie 23cm"),
+]
+
+
+class BandPlan:
+    """Indeks przedziałów planu pasm (przedziały muszą być rozłączne)."""
+
+    def __init__(self, rows):
+        rows = sorted(rows)
+        self.starts = np.array([r[0] for r in rows], dtype=float)
+        self.ends = np.array([r[1] for r in rows], dtype=float)
+        if np.any(self.starts[1:] < self.ends[:-1]):
+            raise ValueError("Przedziały planu pasm nakładają się")
+        # Ostatni element (None) to wynik dla częstotliwości spoza planu
+        self.names = np.array([r[2] for r in rows] + [None], dtype=object)
+        self.labels = np.array([r[3] for r in rows] + [None], dtype=object)
+
+    def lookup(self, freqs):
+        """Numery przedziałów dla tablicy częstotliwości [MHz] (-1 poza planem)."""
+        f = np.asarray(freqs, dtype=float)
+        i = np.searchsorted(self.starts, f, side="right") - 1
+        # Na wspólnej granicy dwóch pasm wygrywa wyższe
+        ok = (i >= 0) & (f <= self.ends[np.maximum(i, 0)])
+        return np.where(ok, i, -1)
+
+    def classify(self, freqs):
+        """Nazwy pasm dla tablicy częstotliwości (None poza planem) - jedno wywołanie."""
+        return self.names[self.lookup(freqs)]
+
+    def describe(self, freqs):
+        """Opisy pasm dla tablicy częstotliwości (None poza planem)."""
+        return self.labels[self.lookup(freqs)]
+
+    def bounds(self, name):
+        """(od, do) MHz pasma o danej nazwie."""
+        i = list(self.names).index(name)
+        return self.starts[i], self.ends[i]
+
+
+PLAN = BandPlan(BAND_PLAN)
+
+
+def parse_mhz(values):
+    """
+    Tekstowe częstotliwości ("145.800", "6.000-6.200", "145,5") jako dwie tablice
+    float: początek i koniec zakresu (dla pojedynczej wartości równe; NaN, gdy
+    tekstu nie da się odczytać).
+    """
+    s = pd.Series(values, dtype=object).fillna("").astype(str).str.replace(",", ".", regex=False)
+    parts = s.str.extract(r"^\s*(\d+(?:\.\d*)?)\s*(?:-\s*(\d+(?:\.\d*)?))?\s*$")
+    lo = pd.to_numeric(parts[0], errors="coerce").to_numpy(dtype=float)
+    hi = pd.to_numeric(parts[1], errors="coerce").to_numpy(dtype=float)
+    return lo, np.where(np.isnan(hi), lo, hi)
+
+
+class FrequencyIndex:
+    """
+    Indeks zakresów [lo, hi] posortowany po początku. Zapytanie o [fmin, fmax]
+    wycina `searchsorted` kandydatów o początku w [fmin - najszerszy zakres, fmax]
+    i dopiero wśród nich sprawdza koniec zakresu.
+    """
+
+    def __init__(self, lo, hi=None):
+        lo = np.asarray(lo, dtype=float)
+        hi = lo if hi is None else np.asarray(hi, dtype=float)
+        valid = np.flatnonzero(~np.isnan(lo))
+        order = valid[np.argsort(lo[valid], kind="stable")]
+        self.order = order
+        self.lo, self.hi = lo[order], hi[order]
+        self.width = float(np.max(self.hi - self.lo)) if len(order) else 0.0
+
+    def query(self, fmin, fmax):
+        """Pozycje (rosnąco) wpisów, których zakres ma część wspólną z [fmin, fmax]."""
+        a = np.searchsorted(self.lo, fmin - self.width, side="left")
+        b = np.searchsorted(self.lo, fmax, side="right")
+        hit = self.hi[a:b] >= fmin
+        return np.sort(self.order[a:b][hit])
@@ -0,0 +1,405 @@
+"""
+Pomiary wydajności silników aplikacji - bez Streamlit i bez sieci.
+
+    python benchmarks.py                 # pomiar i porównanie z bazą
+    python benchmarks.py --record        # zapis nowej bazy (BASELINE_FILE)
+    python benchmarks.py -k logbook      # tylko pomiary, których nazwa zawiera "logbook"
+    python benchmarks.py --full          # także duże zestawy (logbook 1M wierszy)
+
+Każdy pomiar to najlepszy czas z kilku powtórzeń samego wywołania (jak w
+`timeit` - najmniej zależy od obciążenia maszyny; przygotowanie danych nie jest
+mierzone). Dane są syntetyczne (losowe z ustalonym ziarnem) albo stałe
+(TLE ISS). Wynik wolniejszy od bazy o więcej niż `--tolerance` kończy program
+kodem 1 i listą regresji. Baza zależy od maszyny - po zmianie sprzętu trzeba ją
+nagrać ponownie (`--record`).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from sgp4.api import Satrec
+
+from bandplan import PLAN, FrequencyIndex
+from geo import SpatialIndex, latlon_to_maidenhead, maidenhead_decode
+from logbook import Logbook, LOGBOOK_COLUMNS, load_logbook, save_logbook
+from satellites import GroundTrack, SatelliteCatalog, parse_tle, to_epochs
+from tracks import footprint_circles, orbit_track, track_path
+from footprint_join import coverage_windows
+from parallel import Propagator
+from search_index import SearchIndex
+from tle_store import TLEStore
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks_baseline.json")
+TOLERANCE = 1.0  # Dopuszczalne spowolnienie względem bazy (1.0 = dwa razy wolniej)
+LOGBOOK_SIZES = [1_000, 100_000, 1_000_000]
+FULL_SIZE = 1_000_000  # Zestawy od tego rozmiaru tylko z --full
+
+ISS_TLE = (
+    "ISS (ZARYA)",
+    "1 25544U 98067A   24017.54519514  .00016149  00000+0  29290-3 0  9993",
+    "2 25544  51.6415 158.8530 0005786 244.1866 179.9192 15.49622591435056",
+)
+NOW = datetime(2024, 1, 18, 12, 0, tzinfo=timezone.utc)
+
+BENCHMARKS = {}
+_WORKDIR = None  # Katalog tymczasowy bieżącego uruchomienia (pliki baz testowych)
+
+
+def benchmark(name, repeat=5, full=False):
+    """Rejestruje pomiar. Funkcja przygotowuje dane i zwraca mierzone wywołanie."""
+    def register(setup):
+        BENCHMARKS[name] = (setup, repeat, full)
+        return setup
+    return register
+
+
+# ===========================
+# Dane syntetyczne
+# ===========================
+def _checksum(line):
+    return sum(int(c) if c.isdigit() else c == "-" for c in line) % 10
+
+
+def synthetic_tle(n, seed=0):
+    """Tekst TLE (3 linie na obiekt) dla `n` satelitów LEO o losowych orbitach."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for i in range(n):
+        num = 10000 + i
+        l1 = f"1 {num:05d}U 24001A   24017.54519514  .00016149  00000+0  29290-3 0  999"
+        l2 = (
+            f"2 {num:05d} {rng.uniform(0, 180):8.4f} {rng.uniform(0, 360):8.4f} 0005786 "
+            f"{rng.uniform(0, 360):8.4f} {rng.uniform(0, 360):8.4f} {rng.uniform(11.5, 16.2):11.8f}{i % 100000:5d}"
+        )
+        out += [f"SAT-{num}", l1 + str(_checksum(l1)), l2 + str(_checksum(l2))]
+    return "\n".join(out) + "\n"
+
+
+def synthetic_frequencies(n, seed=0):
+    """Tabela częstotliwości w kolumnach wyszukiwarki (MHz, Nazwa, Opis, Mod, Kategoria)."""
+    rng = np.random.default_rng(seed)
+    words = np.array(["kanał", "przemiennik", "ratunkowy", "lotnisko", "wieża", "pogotowie",
+                      "straż", "kolej", "morski", "amatorski", "łączność", "satelita"])
+    cats = np.array(["CB", "PMR", "Lotnictwo", "Kolej", "Służby", "Krótkofalowcy"])
+    freqs = rng.uniform(26, 470, n)
+    return pd.DataFrame({
+        "MHz": pd.Series(freqs).map("{:.4f}".format),
+        "Nazwa": pd.Series(rng.choice(words, n)) + " " + pd.Series(rng.integers(1, 80, n)).astype(str),
+        "Opis": pd.Series(rng.choice(words, n)) + " " + pd.Series(rng.choice(words, n)),
+        "Mod": rng.choice(["FM", "AM", "NFM", "USB", "DMR"], n),
+        "Kategoria": rng.choice(cats, n),
+    })
+
+
+def synthetic_logbook(n, seed=0):
+    """Wpisy logbooka (tekst, kolumny LOGBOOK_COLUMNS) z ostatnich 3 lat."""
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp("2024-01-01") - pd.to_timedelta(rng.integers(0, 3 * 365, n), unit="D")
+    letters = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    calls = (
+        pd.Series(rng.choice(["SP", "SQ", "SO", "DL", "OK", "G", "F", "I"], n))
+        + rng.integers(0, 10, n).astype(str)
+        + pd.Series(letters[rng.integers(0, 26, n)]) + pd.Series(letters[rng.integers(0, 26, n)])
+    )
+    return pd.DataFrame({
+        "Data": days.strftime("%Y-%m-%d"),
+        "Godzina (UTC)": pd.Series(rng.integers(0, 24, n)).map("{:02d}".format) + ":" + pd.Series(rng.integers(0, 60, n)).map("{:02d}".format),
+        "Freq (MHz)": pd.Series(rng.choice([7.074, 14.074, 145.5, 433.5, 27.18, 446.00625], n)).astype(str),
+        "Stacja": calls,
+        "Modulacja": rng.choice(["FM", "AM", "SSB", "CW", "DMR"], n),
+        "Raport": "59",
+        "Lokator": latlon_to_maidenhead(rng.uniform(35, 70, n), rng.uniform(-10, 40, n)),
+    }, columns=LOGBOOK_COLUMNS)
+
+
+# ===========================
+# Tracker
+# ===========================
+@benchmark("tracker.single.full_track")
+def _():
+    """Pozycja i pełny ślad ±50 min jednego satelity (GroundTrack w trackerze)."""
+    sat = Satrec.twoline2rv(ISS_TLE[1], ISS_TLE[2])
+    return lambda: GroundTrack(sat).update(NOW)
+
+
+@benchmark("tracker.single.live_tick", repeat=50)
+def _():
+    """Kolejne odświeżenie w trybie na żywo (przesuwane okno)."""
+    track = GroundTrack(Satrec.twoline2rv(ISS_TLE[1], ISS_TLE[2]))
+    track.update(NOW)
+    ticks = iter(NOW + timedelta(seconds=s) for s in range(1, 10**6))
+    return lambda: track.update(next(ticks))
+
+
+@benchmark("tracker.orbit_track[24h]")
+def _():
+    """Ślad ISS na 24 h z próbkowaniem adaptacyjnym i podziałem na linii zmiany daty."""
+    sat = Satrec.twoline2rv(ISS_TLE[1], ISS_TLE[2])
+    return lambda: track_path(*orbit_track(sat, NOW - timedelta(minutes=50), NOW + timedelta(hours=24))[1:])
+
+
+@benchmark("tracker.footprints[1000]")
+def _():
+    """Okręgi zasięgu radiowego 1000 satelitów (warstwa "Zasięgi")."""
+    positions = SatelliteCatalog(parse_tle(synthetic_tle(1_000))).positions(NOW)
+    return partial(footprint_circles, positions["Lat"], positions["Lon"], positions["Wys (km)"])
+
+
+@benchmark("coverage.windows[100x2000]", repeat=3)
+def _():
+    """Złączenie zasięgów 100 satelitów z 2000 punktami w Polsce na 24 h (oś czasu w trackerze)."""
+    catalog = SatelliteCatalog(parse_tle(synthetic_tle(100)))
+    rng = np.random.default_rng(0)
+    lats, lons = rng.uniform(49, 55, 2000), rng.uniform(14, 24, 2000)
+    return partial(coverage_windows, catalog, lats, lons, start=NOW, hours=24)
+
+
+# Pula procesów tylko przy więcej niż jednym rdzeniu - na jednym mierzyłaby sam narzut
+_PROPAGATION_WORKERS = [("serial", 1)] + [("pool", None)] * ((os.cpu_count() or 1) > 1)
+for _name, _workers in _PROPAGATION_WORKERS:
+    @benchmark(f"propagation.{_name}[2000x2881]", repeat=3)
+    def _(workers=_workers):
+        """Katalog 2000 obiektów na 24 h co 30 s, bez cache (pool: tyle procesów, ile rdzeni)."""
+        catalog = SatelliteCatalog(parse_tle(synthetic_tle(2_000)))
+        epochs = to_epochs(NOW) + np.arange(2881) * np.timedelta64(30, "s")
+        prop = Propagator(os.path.join(_WORKDIR, "propagation"), workers=workers, min_positions=0)
+        return partial(prop.geodetic, catalog, epochs, cache=False)
+
+
+@benchmark("propagation.cache_hit[2000x2881]")
+def _():
+    """Ten sam katalog i siatka drugi raz - tylko mapowanie pliku z dysku."""
+    catalog = SatelliteCatalog(parse_tle(synthetic_tle(2_000)))
+    epochs = to_epochs(NOW) + np.arange(2881) * np.timedelta64(30, "s")
+    prop = Propagator(os.path.join(_WORKDIR, "propagation"), workers=1, min_positions=0)
+    return partial(prop.geodetic, catalog, epochs)
+
+
+for _n in (1_000, 10_000):
+    @benchmark(f"tracker.catalog_positions[{_n}]")
+    def _(n=_n):
+        """Pozycje całego katalogu w jednej chwili (warstwa wszystkich satelitów)."""
+        catalog = SatelliteCatalog(parse_tle(synthetic_tle(n)))
+        return partial(catalog.positions, NOW)
+
+
+@benchmark("tle.parse[10000]")
+def _():
+    text = synthetic_tle(10_000)
+    return partial(parse_tle, text)
+
+
+@benchmark("tle.store_get_iss", repeat=50)
+def _():
+    """Odczyt TLE ISS z magazynu (jak fetch_iss_tle) przy 10k obiektów w bazie."""
+    store = TLEStore(_tmp_path("tle.sqlite"))
+    store._store("bench", "offline", parse_tle(synthetic_tle(10_000)) + [ISS_TLE], time.time(), None, None)
+    return partial(store.get, 25544)
+
+
+# ===========================
+# Wyszukiwarka częstotliwości
+# ===========================
+SEARCH_COLUMNS = ["MHz", "Nazwa", "Opis", "Mod", "Kategoria"]
+
+
+@benchmark("search.build[150000]", repeat=3)
+def _():
+    df = synthetic_frequencies(150_000)
+    return partial(SearchIndex, df, SEARCH_COLUMNS)
+
+
+@benchmark("search.query[150000]", repeat=20)
+def _():
+    index = SearchIndex(synthetic_frequencies(150_000), SEARCH_COLUMNS)
+    queries = ["kan", "przemiennik 1", "145.5", "wie lot", "sat", "zzz"]
+    return lambda: [index.search(q) for q in queries]
+
+
+@benchmark("search.row_apply_filter[2000]", repeat=3)
+def _():
+    """Pierwotny filtr (apply po wierszach) - punkt odniesienia dla indeksu; tylko 2k wierszy."""
+    df = synthetic_frequencies(2_000)
+    return lambda: df[df.apply(lambda r: r.astype(str).str.contains("kan", case=False).any(), axis=1)]
+
+
+# ===========================
+# Logbook
+# ===========================
+def _tmp_path(name):
+    """Nowa ścieżka pliku w osobnym podkatalogu katalogu tymczasowego uruchomienia."""
+    return os.path.join(tempfile.mkdtemp(dir=_WORKDIR), name)
+
+
+for _n in LOGBOOK_SIZES:
+    _full = _n >= FULL_SIZE
+    _repeat = 1 if _n >= 100_000 else 5
+
+    @benchmark(f"logbook.save_csv[{_n}]", repeat=_repeat, full=_full)
+    def _(n=_n):
+        df, path = synthetic_logbook(n), _tmp_path("log.csv")
+        return partial(save_logbook, df, path)
+
+    @benchmark(f"logbook.load_csv[{_n}]", repeat=_repeat, full=_full)
+    def _(n=_n):
+        path = _tmp_path("log.csv")
+        save_logbook(synthetic_logbook(n), path)
+        return partial(load_logbook, path)
+
+    @benchmark(f"logbook.sqlite_append_many[{_n}]", repeat=_repeat, full=_full)
+    def _(n=_n):
+        df = synthetic_logbook(n)
+        return lambda: Logbook(_tmp_path("log.sqlite")).append_many(df)
+
+    @benchmark(f"logbook.sqlite_query[{_n}]", repeat=20, full=_full)
+    def _(n=_n):
+        """Pierwsza strona, filtr po znaku, po paśmie i druga strona - jak w zakładce Logbook."""
+        book = Logbook(_tmp_path("log.sqlite"))
+        book.append_many(synthetic_logbook(n))
+
+        def run():
+            page, cursor = book.query(limit=50)
+            book.query(before_id=cursor, limit=50)
+            book.query(call="SP3", limit=50)
+            book.query(band="2m", mode="FM", limit=50)
+        return run
+
+    @benchmark(f"logbook.sqlite_query_ranges[{_n}]", repeat=20, full=_full)
+    def _(n=_n):
+        """Filtry zakresowe: częstotliwość 144-146 MHz, pół roku dat i krótki prefiks znaku (z drugą stroną)."""
+        book = Logbook(_tmp_path("log.sqlite"))
+        book.append_many(synthetic_logbook(n))
+        filters = [
+            {"freq_min": 144, "freq_max": 146},
+            {"date_from": "2022-01-01", "date_to": "2022-06-30"},
+            {"call": "S"},
+        ]
+
+        def run():
+            for f in filters:
+                page, cursor = book.query(limit=50, **f)
+                book.query(before_id=cursor, limit=50, **f)
+        return run
+
+    @benchmark(f"logbook.sqlite_export_csv[{_n}]", repeat=_repeat, full=_full)
+    def _(n=_n):
+        book = Logbook(_tmp_path("log.sqlite"))
+        book.append_many(synthetic_logbook(n))
+        return lambda: sum(len(chunk) for chunk in book.iter_export("csv"))
+
+    @benchmark(f"logbook.qth_distances[{_n}]", repeat=_repeat, full=_full)
+    def _(n=_n):
+        book = Logbook(_tmp_path("log.sqlite"))
+        book.append_many(synthetic_logbook(n))
+        return partial(book.distances, 52.23, 21.01)
+
+
+# ===========================
+# Kalkulatory i geometria
+# ===========================
+@benchmark("calc.maidenhead_encode[1000000]", repeat=3)
+def _():
+    rng = np.random.default_rng(0)
+    return partial(latlon_to_maidenhead, rng.uniform(-90, 90, 1_000_000), rng.uniform(-180, 180, 1_000_000), 8)
+
+
+@benchmark("calc.maidenhead_decode[1000000]", repeat=3)
+def _():
+    rng = np.random.default_rng(0)
+    locs = latlon_to_maidenhead(rng.uniform(-90, 90, 1_000_000), rng.uniform(-180, 180, 1_000_000))
+    return partial(maidenhead_decode, locs)
+
+
+@benchmark("calc.band_classify[200000]", repeat=10)
+def _():
+    freqs = np.random.default_rng(0).uniform(0.1, 1300, 200_000)
+    return partial(PLAN.classify, freqs)
+
+
+@benchmark("calc.frequency_range_query[150000]", repeat=50)
+def _():
+    freqs = np.random.default_rng(0).uniform(0.1, 1300, 150_000)
+    index = FrequencyIndex(freqs)
+    return partial(index.query, 144.0, 146.0)
+
+
+@benchmark("geo.nearest_repeaters[50000]", repeat=200)
+def _():
+    rng = np.random.default_rng(0)
+    index = SpatialIndex(rng.uniform(49, 55, 50_000), rng.uniform(14, 24, 50_000))
+    return partial(index.nearest, 52.23, 21.01, 10)
+
+
+# ===========================
+# Uruchomienie
+# ===========================
+def measure(setup, repeat):
+    """Najlepszy czas [s] z `repeat` wywołań (po jednym wywołaniu rozgrzewającym)."""
+    run = setup()
+    run()
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - t)
+    return min(times)
+
+
+def _report(name, t, base, tolerance, regressions):
+    """Wiersz wyniku; pomiar wolniejszy od bazy ponad tolerancję trafia do `regressions`."""
+    ratio = t / base if base else None
+    flag = ""
+    if ratio is not None and ratio > 1 + tolerance:
+        flag = "  <-- REGRESJA"
+        regressions.append((name, base, t))
+    ratio_txt = f"{ratio:5.2f}x" if ratio is not None else "    -"
+    base_txt = f"{base * 1e3:10.2f}" if base else " " * 10
+    print(f"{name:42s} {t * 1e3:10.2f} ms  baza {base_txt} ms  {ratio_txt}{flag}", flush=True)
+
+
+def main(argv=None):
+    global _WORKDIR
+    parser = argparse.ArgumentParser(description="Pomiary wydajności radio-tracker")
+    parser.add_argument("-k", dest="pattern", default="", help="tylko pomiary, których nazwa zawiera tekst")
+    parser.add_argument("--full", action="store_true", help="także duże zestawy (np. logbook 1M wierszy)")
+    parser.add_argument("--record", action="store_true", help="zapisz wyniki jako nową bazę")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="dopuszczalne spowolnienie (1.0 = 100%%)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results, regressions = {}, []
+    with tempfile.TemporaryDirectory(prefix="radio-bench-") as _WORKDIR:
+        for name, (setup, repeat, full) in BENCHMARKS.items():
+            if args.pattern not in name or (full and not args.full):
+                continue
+            results[name] = t = measure(setup, repeat)
+            _report(name, t, baseline.get(name), args.tolerance, regressions)
+
+    if args.record:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=2)
+        print(f"Zapisano bazę: {args.baseline} ({len(results)} pomiarów)")
+        return 0
+    if regressions:
+        print(f"\n{len(regressions)} REGRESJI (tolerancja {args.tolerance:.0%}):", file=sys.stderr)
+        for name, base, t in regressions:
+            print(f"  {name}: {base * 1e3:.2f} ms -> {t * 1e3:.2f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,35 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-import requests
 import os
+import atexit
 import pytz
 import math
+import numpy as np
 from datetime import datetime, timedelta, timezone
+from functools import partial
 
-# Biblioteki do obliczeń satelitarnych
-from sgp4.api import Satrec, jday
-from astropy.coordinates import TEME, EarthLocation, ITRS
-from astropy.time import Time
-import astropy.units as u
+# Biblioteki do obliczeń satelitarnych (astropy tylko w trybie precyzyjnym - import leniwy)
+from sgp4.api import Satrec
+from doppler import doppler_table, tuning_schedule
+from passes import predict_passes
+from refresher import BackgroundRefresher
+from tle_store import TLEStore
+from logbook import Logbook
+from bandplan import BAND_PLAN, PLAN, FrequencyIndex
+from freq_store import FrequencyStore, normalize
+from search_index import SearchIndex
+from metrics import Metrics
+from space_weather import SpaceWeatherStore
+from solar import GREYLINE_DEG, greyline_grid, subsolar_point, terminator
+from geo import (
+    SpatialIndex, bearing, distance_bearing, latlon_to_maidenhead, maidenhead_decode,
+    maidenhead_to_latlon, viewport, grid_clusters,
+)
+from satellites import SatelliteCatalog, GroundTrack, TLE_GROUPS
+from tracks import footprint_circles, orbit_track, track_path
+from footprint_join import coverage_windows, merge_windows
+from parallel import Propagator
 
 # ===========================
 # Konfiguracja Strony
@@ -25,40 +43,70 @@ st.set_page_config(
 # ===========================
 # 0. FUNKCJE POMOCNICZE I BAZA DANYCH
 # ===========================
-LOGBOOK_FILE = "radio_logbook.csv"
+LOGBOOK_FILE = "radio_logbook.csv"  # Stary format - teraz tylko import/eksport
+LOGBOOK_DB_FILE = "radio_logbook.sqlite"
+LOG_MODES = ["FM", "AM", "SSB", "CW", "DMR"]
+LOG_PAGE_SIZES = [25, 50, 100, 250]
+TLE_STORE_FILE = "tle_store.sqlite"
+FREQ_STORE_DIR = "freq_db"  # Zaimportowane bazy częstotliwości i przemienników (Parquet)
+HAMQSL_URL = "https://www.hamqsl.com"  # Bez sieci: `python space_weather.py 8765` i "http://127.0.0.1:8765"
+SPACE_WEATHER_FILE = "space_weather.sqlite"
+PRECISE_POSITIONS = False  # True = transformacja TEME -> ITRS przez astropy (wolniej, import ~0.6 s)
+LIVE_INTERVAL_S = 1  # Odświeżanie pozycji w trybie "na żywo" trackera
+GREYLINE_STEP = 4.0  # Rozdzielczość siatki szarej strefy [°]
+TRACK_SPANS = {"±50 min": 0, "3 h": 3, "12 h": 12, "24 h": 24}  # Długość śladu trackera (godziny w przód)
+FOOTPRINT_MIN_EL = 0.0  # Zasięg radiowy: satelita co najmniej tyle stopni nad horyzontem
+COVERAGE_BUCKET_S = 300  # Oś czasu zasięgu liczona od pełnych 5 minut (wspólny cache sesji)
+MAP_MAX_MARKERS = 1500  # Górny limit punktów wysyłanych na mapę przemienników
+HOME_QTH = (52.23, 21.01)  # Domyślny QTH (Warszawa) - zmieniany w zakładce Kalkulatory
+METRICS_DB_FILE = "metrics.sqlite"
+METRICS_FLUSH_S = 30  # Co ile sekund liczniki trafiają na dysk
+METRICS_PORT = None  # Np. 9109 - endpoint /metrics dla Prometheusa (None = wyłączony)
+COUNTER_FILE = "counter.txt"  # Stary licznik odwiedzin - przenoszony do metryk
+PROPAGATION_DIR = "propagation_cache"  # Wyniki propagacji dużych katalogów (pliki .npy, klucz z epok TLE)
+PROPAGATION_WORKERS = None  # Procesy puli propagacji (None = liczba rdzeni)
+DEFAULT_TLE_GROUPS = ["stations", "amateur", "weather"]  # "active" (10k+ obiektów) tylko na życzenie
 
-def load_logbook():
-    """Wczytuje logbook z pliku CSV lub tworzy nowy, jeśli plik nie istnieje."""
-    if os.path.exists(LOGBOOK_FILE):
-        return pd.read_csv(LOGBOOK_FILE)
-    else:
-        return pd.DataFrame(columns=["Data", "Godzina (UTC)", "Freq (MHz)", "Stacja", "Modulacja", "Raport"])
-
-def save_logbook(df):
-    """Zapisuje logbook do pliku CSV."""
-    df.to_csv(LOGBOOK_FILE, index=False)
-
-def update_counter():
-    """Prosty licznik odwiedzin oparty na pliku tekstowym."""
-    counter_file = "counter.txt"
-    if not os.path.exists(counter_file):
-        with open(counter_file, "w") as f:
-            f.write("0")
-    
-    with open(counter_file, "r") as f:
+@st.cache_resource
+def get_logbook():
+    """Wspólny logbook (SQLite). Przy pierwszym uruchomieniu importuje stary plik CSV."""
+    book = Logbook(LOGBOOK_DB_FILE)
+    book.migrate_csv(LOGBOOK_FILE)
+    return book
+
+@st.cache_resource
+def get_propagator():
+    """
+    Pula procesów do propagacji dużych katalogów w długich oknach (parallel.py) -
+    jedna na proces Streamlit, wyniki w plikach .npy wspólnych dla procesów.
+    """
+    propagator = Propagator(PROPAGATION_DIR, workers=PROPAGATION_WORKERS)
+    atexit.register(propagator.close)
+    return propagator
+
+@st.cache_resource
+def get_metrics():
+    """
+    Wspólne dla procesu liczniki i histogramy czasów (metrics.py). Liczniki
+    zapisuje na dysk wątek w tle co METRICS_FLUSH_S sekund i przy zamknięciu.
+    """
+    metrics = Metrics(METRICS_DB_FILE, flush_interval=METRICS_FLUSH_S)
+    metrics.migrate_counter_file(COUNTER_FILE, "visits_total")
+    atexit.register(metrics.stop)
+    if METRICS_PORT:
         try:
-            count = int(f.read())
-        except:
-            count = 0
-            
-    count += 1
-    
-    with open(counter_file, "w") as f:
-        f.write(str(count))
-        
-    return count
+            metrics.serve(METRICS_PORT)
+        except OSError:
+            pass  # Port zajęty (np. drugi proces) - metryki nadal w zakładce administracyjnej
+    return metrics.start()
+
+metrics = get_metrics()
 
-visit_count = update_counter()
+# Licznik liczy sesje, nie przebiegi skryptu
+if "visit_count" not in st.session_state:
+    metrics.incr("visits_total")
+    st.session_state.visit_count = metrics.total("visits_total")
+visit_count = st.session_state.visit_count
 
 def get_utc_time():
     """Zwraca aktualny czas UTC w formacie HH:MM."""
@@ -72,30 +120,6 @@ def get_time_in_zone(zone_name):
     except:
         return "--:--"
 
-def latlon_to_maidenhead(lat, lon):
-    """Konwertuje współrzędne GPS na lokator QTH (Maidenhead)."""
-    try:
-        A = ord('A')
-        lon += 180
-        lat += 90
-        
-        f_lon = int(lon / 20)
-        f_lat = int(lat / 10)
-        lon -= f_lon * 20
-        lat -= f_lat * 10
-        
-        s_lon = int(lon / 2)
-        s_lat = int(lat)
-        lon -= s_lon * 2
-        lat -= s_lat
-        
-        ss_lon = int(lon * 12)
-        ss_lat = int(lat * 24)
-        
-        return f"{chr(A+f_lon)}{chr(A+f_lat)}{s_lon}{s_lat}{chr(A+ss_lon)}{chr(A+ss_lat)}"
-    except:
-        return "Error"
-
 # ===========================
 # 1. GENERATORY CZĘSTOTLIWOŚCI
 # ===========================
@@ -199,10 +223,10 @@ websdr_list = [
 ]
 
 special_freqs = [
-    {"MHz": "145.800", "Pasmo": "2m", "Mod": "NFM", "Kategoria": "Satelity", "Nazwa": "ISS (Głos)", "Opis": "Region 1 Voice - Główny kanał foniczny ISS"},
-    {"MHz": "145.825", "Pasmo": "2m", "Mod": "FM", "Kategoria": "Satelity", "Nazwa": "ISS (APRS)", "Opis": "Packet Radio 1200bps / Digipeater"},
-    {"MHz": "437.800", "Pasmo": "70cm", "Mod": "FM", "Kategoria": "Satelity", "Nazwa": "ISS (Repeater)", "Opis": "Downlink przemiennika (Uplink: 145.990 z tonem 67.0)"},
-    {"MHz": "137.100", "Pasmo": "VHF", "Mod": "WFM", "Kategoria": "Satelity", "Nazwa": "NOAA 19", "Opis": "APT - Analogowe zdjęcia Ziemi (przeloty popołudniowe)"},
+    {"MHz": "145.800", "Pasmo": "2m", "Mod": "NFM", "Kategoria": "Satelity", "Nazwa": "ISS (Głos)", "Opis": "Region 1 Voice - Główny kanał foniczny ISS", "NORAD": 25544, "Uplink": "145.200"},
+    {"MHz": "145.825", "Pasmo": "2m", "Mod": "FM", "Kategoria": "Satelity", "Nazwa": "ISS (APRS)", "Opis": "Packet Radio 1200bps / Digipeater", "NORAD": 25544, "Uplink": "145.825"},
+    {"MHz": "437.800", "Pasmo": "70cm", "Mod": "FM", "Kategoria": "Satelity", "Nazwa": "ISS (Repeater)", "Opis": "Downlink przemiennika (Uplink: 145.990 z tonem 67.0)", "NORAD": 25544, "Uplink": "145.990"},
+    {"MHz": "137.100", "Pasmo": "VHF", "Mod": "WFM", "Kategoria": "Satelity", "Nazwa": "NOAA 19", "Opis": "APT - Analogowe zdjęcia Ziemi (przeloty popołudniowe)", "NORAD": 33591},
     {"MHz": "121.500", "Pasmo": "Air", "Mod": "AM", "Kategoria": "Lotnictwo", "Nazwa": "Air Guard", "Opis": "Międzynarodowy kanał RATUNKOWY (wymaga radia z AM!)"},
     {"MHz": "129.500", "Pasmo": "Air", "Mod": "AM", "Kategoria": "Lotnictwo", "Nazwa": "LPR (Operacyjny)", "Opis": "Częsty kanał Lotniczego Pogotowia (może się różnić lokalnie)"},
     {"MHz": "148.6625", "Pasmo": "VHF", "Mod": "NFM", "Kategoria": "Służby", "Nazwa": "PSP (B028)", "Opis": "Krajowy Kanał Ratowniczo-Gaśniczy (ogólnopolski)"},
@@ -213,75 +237,192 @@ special_freqs = [
 # Łączymy listy w jedną
 data_freq = special_freqs + generate_pmr_list() + generate_cb_list()
 
+# Kolumny przeszukiwane przez wyszukiwarkę częstotliwości
+FREQ_SEARCH_COLUMNS = ["MHz", "Pasmo", "Mod", "Kategoria", "Nazwa", "Opis"]
+
+@st.cache_resource
+def get_freq_store():
+    """Magazyn zaimportowanych baz (pliki Parquet) - wspólny dla sesji."""
+    return FrequencyStore(FREQ_STORE_DIR)
+
+@st.cache_resource(max_entries=4)
+def load_frequency_tables(version):
+    """
+    Listy wbudowane + bazy zaimportowane do magazynu, w jednym typowanym schemacie.
+    `version` (stan plików magazynu) przeładowuje tabele po imporcie.
+    """
+    store = get_freq_store()
+    return {
+        "frequencies": pd.concat([normalize(pd.DataFrame(data_freq), "frequencies", "Wbudowane"), store.load("frequencies")], ignore_index=True),
+        "repeaters": pd.concat([normalize(pd.DataFrame(repeater_list), "repeaters", "Wbudowane"), store.load("repeaters")], ignore_index=True),
+        "stations": normalize(pd.DataFrame(global_stations), "frequencies", "Wbudowane"),
+        "websdr": pd.DataFrame(websdr_list),
+    }
+
+def frequency_tables():
+    """Aktualne tabele częstotliwości (z cache, dopóki magazyn się nie zmieni)."""
+    return load_frequency_tables(get_freq_store().version())
+
+@st.cache_resource(max_entries=4)
+def get_frequency_index(version):
+    """Tabela częstotliwości i jej indeks wyszukiwania - budowane raz na wersję magazynu, wspólne dla sesji."""
+    df = load_frequency_tables(version)["frequencies"]
+    return df, SearchIndex(df, FREQ_SEARCH_COLUMNS)
+
+@st.cache_resource(max_entries=4)
+def get_range_tables(version):
+    """
+    Tabele do zapytań o zakres częstotliwości: {nazwa: (DataFrame, FrequencyIndex)}.
+    Zakresy liczbowe (f_lo, f_hi) są już policzone w magazynie.
+    """
+    tables = load_frequency_tables(version)
+    freqs = pd.concat([tables["frequencies"], tables["stations"]], ignore_index=True)
+    reps = tables["repeaters"].assign(Pasmo=lambda d: PLAN.classify(d["Freq"]))
+    return {
+        "Częstotliwości": (freqs.drop(columns=["f_lo", "f_hi"]), FrequencyIndex(freqs["f_lo"], freqs["f_hi"])),
+        "Przemienniki": (reps, FrequencyIndex(reps["Freq"])),
+    }
+
+@st.cache_resource(max_entries=4)
+def get_repeater_index(version):
+    """
+    Tabela przemienników (z gotowymi opisami punktów mapy) i indeks przestrzenny
+    ich współrzędnych - raz na wersję magazynu.
+    """
+    df = load_frequency_tables(version)["repeaters"]
+    hover = (
+        "<b>" + df["Znak"].fillna("") + "</b><br>" + df["Loc"].fillna("")
+        + "<br>Freq: " + df["Freq"].map("{:.4f}".format)
+        + "<br>CTCSS: " + df["CTCSS"].map("{:g}".format)
+        + "<br>Shift: " + df["Shift"].map("{:+g}".format)
+    )
+    return df.assign(Hover=hover), SpatialIndex(df["Lat"], df["Lon"])
+
+@st.cache_data(max_entries=64)
+def repeater_map_layer(version, lat, lon, zoom, max_markers=MAP_MAX_MARKERS):
+    """
+    Punkty mapy przemienników dla widoku (środek, przybliżenie): pojedyncze
+    przemienniki, a gdy w widoku jest ich więcej niż `max_markers` - skupiska
+    z siatki dobranej tak, by liczba punktów nie przekroczyła limitu.
+    Zwraca (pojedyncze: DataFrame, skupiska: DataFrame).
+    """
+    df, index = get_repeater_index(version)
+    lat0, lat1, lon0, lon1 = viewport(lat, lon, zoom)
+    pos = index.bbox(lat0, lat1, lon0, lon1)
+    if len(pos) <= max_markers:
+        return df.iloc[pos][["Znak", "Freq", "Loc", "Lat", "Lon", "Hover"]], pd.DataFrame(columns=["Lat", "Lon", "Count", "Hover"])
+    # Najwyżej max_markers komórek siatki w widoku; samotne punkty zostają przemiennikami
+    span = max(lat1 - lat0, (lon1 - lon0) % 360 or 360)
+    cell = span / np.sqrt(max_markers)
+    vis = df.iloc[pos]
+    c_lat, c_lon, counts, first = grid_clusters(vis["Lat"], vis["Lon"], cell)
+    single = counts == 1
+    clusters = pd.DataFrame({"Lat": c_lat[~single], "Lon": c_lon[~single], "Count": counts[~single]})
+    clusters["Hover"] = "<b>" + clusters["Count"].astype(str) + " przemienników</b><br>Zwiększ przybliżenie, aby zobaczyć szczegóły"
+    return vis.iloc[first[single]][["Znak", "Freq", "Loc", "Lat", "Lon", "Hover"]], clusters
+
+@st.cache_data(max_entries=8)
+def repeater_distances(version, lat, lon):
+    """Odległość [km] i azymut [°] z QTH do wszystkich przemienników - jedno przeliczenie na QTH."""
+    df = load_frequency_tables(version)["repeaters"]
+    dist, az = distance_bearing(lat, lon, df["Lat"].to_numpy(), df["Lon"].to_numpy())
+    return pd.DataFrame({"km": dist, "Az (°)": az}, index=df.index)
+
 # ===========================
 # 3. LOGIKA SATELITARNA (Z ZABEZPIECZENIEM TLE)
 # ===========================
-@st.cache_data(ttl=3600)
+ISS_FALLBACK_TLE = (
+    "1 25544U 98067A   24017.54519514  .00016149  00000+0  29290-3 0  9993",
+    "2 25544  51.6415 158.8530 0005786 244.1866 179.9192 15.49622591435056"
+)
+
+@st.cache_resource
+def get_tle_store():
+    """Wspólny dla wszystkich sesji (i procesów - przez plik SQLite) magazyn TLE."""
+    return TLEStore(TLE_STORE_FILE)
+
+def _refresh_tle_group(store, group):
+    """Odświeżenie grupy TLE dla wątku w tle - błąd zgłaszany wyjątkiem."""
+    status = store.refresh(group, max_age=store.ttl * 0.8)
+    metrics.incr("tle_refresh_total", group=group, status=status)
+    if status == "error":
+        raise RuntimeError(store.status(group)["error"])
+
+@st.cache_resource
+def get_space_weather():
+    """Historia odczytów N0NBH i kopie obrazków (SQLite) - wspólne dla sesji i procesów."""
+    return SpaceWeatherStore(SPACE_WEATHER_FILE, base_url=HAMQSL_URL)
+
+def _refresh_space_weather(store):
+    """Pobranie kanału XML dla wątku w tle - błąd zgłaszany wyjątkiem (zostają stare dane)."""
+    try:
+        status = store.refresh()
+    except Exception:
+        metrics.incr("space_weather_refresh_total", status="error")
+        raise
+    metrics.incr("space_weather_refresh_total", status=status)
+    return status
+
+@st.cache_resource
+def get_refresher():
+    """
+    Jeden na proces wątek odświeżający TLE i dane pogody kosmicznej w tle,
+    zanim się przeterminują. Strona zawsze dostaje ostatnią dobrą kopię.
+    Od startu odświeżane są tylko domyślne grupy TLE - pozostałe (np. "active",
+    10k+ obiektów) dopiero po wybraniu przez użytkownika (`watch_tle_group`).
+    """
+    store = get_tle_store()
+    refresher = BackgroundRefresher()
+    for g in DEFAULT_TLE_GROUPS:
+        refresher.register(f"tle:{g}", partial(_refresh_tle_group, store, g), ttl=store.ttl)
+    space = get_space_weather()
+    refresher.register("space:xml", partial(_refresh_space_weather, space), ttl=900)
+    refresher.register("img:solar", partial(space.refresh_image, "solar"), ttl=1800)
+    return refresher.start()
+
+def watch_tle_group(group):
+    """Dołącza grupę TLE do odświeżania w tle (pierwsze pobranie rusza od razu). Zwraca odświeżacz."""
+    refresher = get_refresher()
+    if f"tle:{group}" not in refresher:
+        store = get_tle_store()
+        refresher.register(f"tle:{group}", partial(_refresh_tle_group, store, group), ttl=store.ttl)
+    return refresher
+
+def fetch_tle_group(group):
+    """
+    Zwraca całą grupę TLE (np. stations, amateur, weather) z lokalnego magazynu.
+    Nigdy nie czeka na sieć - magazyn odświeża wątek w tle. Gdy grupy jeszcze
+    nie ma (pierwsze uruchomienie), zleca pobranie i zwraca pustą listę.
+    """
+    refresher = watch_tle_group(group)
+    rows = get_tle_store().group(group)
+    metrics.incr("tle_cache_total", group=group, result="hit" if rows else "miss")
+    if not rows:
+        refresher.refresh(f"tle:{group}")
+    return rows
+
 def fetch_iss_tle():
     """
-    Pobiera dane TLE (Two-Line Element) dla ISS.
-    W razie awarii Celestrak zwraca dane zapasowe (Fallback),
-    dzięki czemu aplikacja się nie zawiesza.
+    Zwraca dane TLE (Two-Line Element) dla ISS z magazynu.
+    Dane zapasowe (Fallback) są używane tylko wtedy, gdy magazyn jest pusty -
+    sprawdź `store.get(25544)`, żeby odróżnić je od aktualnych.
     """
-    FALLBACK_TLE = (
-        "1 25544U 98067A   24017.54519514  .00016149  00000+0  29290-3 0  9993",
-        "2 25544  51.6415 158.8530 0005786 244.1866 179.9192 15.49622591435056"
-    )
-    url = "https://celestrak.org/NORAD/elements/stations.txt"
-    headers = {"User-Agent": "Mozilla/5.0"}
-    
-    try:
-        resp = requests.get(url, headers=headers, timeout=5)
-        resp.raise_for_status() 
-        lines = [l.strip() for l in resp.text.splitlines() if l.strip()]
-        for i, line in enumerate(lines):
-            if "ISS (ZARYA)" in line and i+2 < len(lines):
-                return lines[i+1], lines[i+2]
-        # Jeśli nie znaleziono ISS w pliku:
-        return FALLBACK_TLE 
-    except Exception:
-        # Jeśli błąd połączenia lub inny:
-        return FALLBACK_TLE
+    row = get_tle_store().get(25544)
+    metrics.incr("tle_cache_total", group="iss", result="hit" if row else "miss")
+    if row:
+        return row[1], row[2]
+    return ISS_FALLBACK_TLE
 
-def get_satellite_position(line1, line2):
-    try:
-        sat = Satrec.twoline2rv(line1, line2)
-        now = datetime.now(timezone.utc)
-        jd, fr = jday(now.year, now.month, now.day, now.hour, now.minute, now.second + now.microsecond * 1e-6)
-        e, r, v = sat.sgp4(jd, fr)
-        if e != 0: return None, None, [], []
-        
-        t_now = Time(now)
-        teme = TEME(x=r[0]*u.km, y=r[1]*u.km, z=r[2]*u.km, obstime=t_now)
-        itrs = teme.transform_to(ITRS(obstime=t_now))
-        loc = EarthLocation(itrs.x, itrs.y, itrs.z)
-        
-        traj_lats, traj_lons = [], []
-        prev_lon = None
-        # Obliczanie trajektorii +/- 50 minut
-        for delta in range(-50*60, 50*60, 60):
-            ts = now + timedelta(seconds=delta)
-            jd_s, fr_s = jday(ts.year, ts.month, ts.day, ts.hour, ts.minute, ts.second)
-            _, r_s, _ = sat.sgp4(jd_s, fr_s)
-            
-            t_astropy = Time(ts)
-            teme_s = TEME(x=r_s[0]*u.km, y=r_s[1]*u.km, z=r_s[2]*u.km, obstime=t_astropy)
-            itrs_s = teme_s.transform_to(ITRS(obstime=t_astropy))
-            loc_s = EarthLocation(itrs_s.x, itrs_s.y, itrs_s.z)
-            
-            ls = loc_s.lon.deg
-            # Obsługa przeskoku przez linię zmiany daty (żeby nie było kreski przez całą mapę)
-            if prev_lon is not None and abs(ls - prev_lon) > 180: 
-                traj_lats.append(None)
-                traj_lons.append(None)
-                
-            traj_lats.append(loc_s.lat.deg)
-            traj_lons.append(ls)
-            prev_lon = ls
-            
-        return loc.lat.deg, loc.lon.deg, traj_lats, traj_lons
-    except:
-        return None, None, [], []
+@st.cache_resource(max_entries=8)
+def load_catalog(groups, version):
+    """
+    Buduje wspólny katalog (SatrecArray) ze wszystkich wybranych grup TLE.
+    `version` (czas ostatniego pobrania z magazynu) przebudowuje katalog po odświeżeniu.
+    ISS jest zawsze dostępna - w razie potrzeby z danych zapasowych.
+    """
+    entries = [e for g in groups for e in fetch_tle_group(g)]
+    entries.append(("ISS (ZARYA)",) + fetch_iss_tle())
+    return SatelliteCatalog(entries)
 
 # ===========================
 # 4. INTERFEJS APLIKACJI
@@ -307,8 +448,21 @@ with c_visits:
     </div>
     """, unsafe_allow_html=True)
 
+# --- STAN WIDŻETÓW MIĘDZY ZAKŁADKAMI ---
+# Zakładki są leniwe (liczy się tylko otwarta), a Streamlit kasuje stan widżetów,
+# które w danym przebiegu nie zostały narysowane. Te klucze czytają też inne
+# zakładki, więc ich stan przepisujemy na każdy przebieg (widżety nie mają `value=`).
+PERSISTENT_WIDGETS = {
+    "qth_lat": HOME_QTH[0],
+    "qth_lon": HOME_QTH[1],
+    "tle_groups": DEFAULT_TLE_GROUPS,
+}
+for key, default in PERSISTENT_WIDGETS.items():
+    st.session_state[key] = st.session_state.get(key, default)
+
 # --- DEFINICJA 10 ZAKŁADEK ---
-tabs = st.tabs([
+# (+ "Metryki" dla administratora - adres z ?admin, np. http://host:8501/?admin)
+TAB_LABELS = [
     "📡 Tracker & Skaner", 
     "☀️ Pogoda Kosmiczna", 
     "🆘 Łączność Kryzysowa", 
@@ -319,349 +473,1064 @@ tabs = st.tabs([
     "🧮 Kalkulatory", 
     "🌐 WebSDR", 
     "📝 Logbook"
-])
+]
+ADMIN_TAB = "📊 Metryki"
+show_admin = "admin" in st.query_params
+# on_change="rerun": zakładki wiedzą, która jest otwarta (`.open`), więc liczymy tylko ją
+tabs = st.tabs(TAB_LABELS + [ADMIN_TAB] * show_admin, key="main_tab", on_change="rerun")
+metrics.incr("reruns_total", tab=st.session_state.get("main_tab") or TAB_LABELS[0])
 
 # 1. TRACKER
-with tabs[0]:
-    col_map, col_data = st.columns([3, 2])
+def ground_track(line1, line2):
+    """
+    Ślad śledzonego satelity trzymany w sesji - przy kolejnych odświeżeniach okno
+    ±50 minut tylko się przesuwa. Nowy ślad tylko po zmianie satelity lub TLE.
+    """
+    tracks = st.session_state.setdefault("ground_track", {})
+    if (line1, line2) not in tracks:
+        tracks.clear()
+        tracks[(line1, line2)] = GroundTrack(Satrec.twoline2rv(line1, line2), precise=PRECISE_POSITIONS)
+    return tracks[(line1, line2)]
+
+@st.cache_data(max_entries=16)
+def orbit_track_layer(line1, line2, hours, minute):
+    """
+    Ślad na wiele orbit (50 min wstecz, `hours` godzin w przód) z próbkowaniem
+    adaptacyjnym (tracks.py) - liczony raz na minutę dla wszystkich sesji.
+    Współrzędne zaokrąglone do 0.01°, żeby wykres był lżejszy dla przeglądarki.
+    """
+    now = datetime.fromtimestamp(minute * 60, timezone.utc)
+    _, lat, lon = orbit_track(
+        Satrec.twoline2rv(line1, line2), now - timedelta(minutes=50), now + timedelta(hours=hours),
+        precise=PRECISE_POSITIONS
+    )
+    t_lat, t_lon = track_path(lat, lon)
+    return np.round(t_lat, 2), np.round(t_lon, 2)
+
+def tracker_path(track, line1, line2, now):
+    """Ślad do mapy: okno ±50 min z `GroundTrack` albo ślad na wiele orbit (wybór w zakładce)."""
+    hours = TRACK_SPANS.get(st.session_state.get("tracker_span"), 0)
+    if not hours:
+        return track.path()
+    with metrics.timer("propagation_seconds", op="orbit_track"):
+        return orbit_track_layer(line1, line2, hours, int(now.timestamp() // 60))
+
+@st.cache_data(max_entries=2)
+def greyline_layer(minute):
+    """
+    Szara strefa, noc i terminator dla minuty `minute` (minuty od 1970 r.) - liczone
+    raz na minutę dla wszystkich sesji (solar.py).
+    """
+    when = datetime.fromtimestamp(minute * 60, timezone.utc)
+    (g_lat, g_lon), (n_lat, n_lon) = greyline_grid(when, step=GREYLINE_STEP)
+    t_lat, t_lon = terminator(when)
+    return {
+        "grey": (g_lat, g_lon), "night": (n_lat, n_lon),
+        "terminator": (np.round(t_lat, 2), t_lon), "sun": subsolar_point(when),
+    }
+
+def add_greyline_traces(fig, layer, marker_px=8):
+    """Warstwa dnia i nocy pod resztą mapy: komórki nocy, szarej strefy, terminator i Słońce."""
+    for key, color, opacity in [("night", "#000814", 0.45), ("grey", "#5c4d7d", 0.35)]:
+        c_lat, c_lon = layer[key]
+        fig.add_trace(go.Scattergeo(
+            lat=c_lat, lon=c_lon, mode="markers",
+            marker=dict(symbol="square", size=marker_px, color=color, opacity=opacity, line=dict(width=0)),
+            hoverinfo="skip", name="Noc" if key == "night" else "Szara strefa"
+        ))
+    t_lat, t_lon = layer["terminator"]
+    fig.add_trace(go.Scattergeo(
+        lat=t_lat, lon=t_lon, mode="lines",
+        line=dict(color="#ffb74d", width=1), hoverinfo="skip", name="Terminator"
+    ))
+    fig.add_trace(go.Scattergeo(
+        lat=[layer["sun"][0]], lon=[layer["sun"][1]], mode="text", text=["☀️"],
+        textfont=dict(size=20), hoverinfo="skip", name="Słońce"
+    ))
+
+def tracker_figure(path, pos, sel_name, sat_positions=None, greyline=None, footprints=False):
+    """
+    Mapa trackera: ślad `path` (lat, lon) i pozycja satelity z okręgiem zasięgu
+    radiowego (oraz, opcjonalnie, cały katalog z zasięgami i szara strefa).
+    """
+    lat, lon, alt = pos
+    t_lat, t_lon = path
+    fig = go.Figure()
+    if greyline is not None:
+        add_greyline_traces(fig, greyline)
+    if footprints and sat_positions is not None and len(sat_positions):
+        # Zasięgi całego katalogu - jeden ślad, okręgi rozdzielone przerwami
+        f_lat, f_lon = footprint_circles(sat_positions["Lat"], sat_positions["Lon"], sat_positions["Wys (km)"], FOOTPRINT_MIN_EL)
+        fig.add_trace(go.Scattergeo(
+            lat=np.round(f_lat, 2), lon=np.round(f_lon, 2), mode="lines",
+            line=dict(color="rgba(255, 165, 0, 0.35)", width=1), hoverinfo="skip", name="Zasięgi"
+        ))
+    if sat_positions is not None:
+        # Wszystkie satelity z katalogu
+        fig.add_trace(go.Scattergeo(
+            lat=sat_positions["Lat"], lon=sat_positions["Lon"], 
+            mode="markers", 
+            marker=dict(size=4, color="orange"), 
+            text=sat_positions["Nazwa"], 
+            hoverinfo="text", 
+            name="Satelity"
+        ))
+    # Trajektoria
+    fig.add_trace(go.Scattergeo(
+        lat=t_lat, lon=t_lon, 
+        mode="lines", 
+        line=dict(color="blue", width=2, dash="dot"), 
+        name="Orbita"
+    ))
+    # Zasięg radiowy śledzonego satelity
+    f_lat, f_lon = footprint_circles([lat], [lon], [alt], FOOTPRINT_MIN_EL)
+    fig.add_trace(go.Scattergeo(
+        lat=np.round(f_lat, 2), lon=np.round(f_lon, 2), mode="lines",
+        line=dict(color="#4fc3f7", width=1.5), hoverinfo="skip", name="Zasięg"
+    ))
+    # Pozycja
+    fig.add_trace(go.Scattergeo(
+        lat=[lat], lon=[lon], 
+        mode="text", 
+        text=["🛰️"], 
+        textfont=dict(size=30), 
+        name=f"{sel_name} Teraz"
+    ))
+
+    fig.update_layout(
+        margin={"r":0,"t":0,"l":0,"b":0}, 
+        height=450, 
+        geo=dict(
+            projection_type="natural earth", 
+            showland=True, 
+            landcolor="#333", 
+            showocean=True, 
+            oceancolor="#111", 
+            showcountries=True
+        ), 
+        showlegend=False,
+        uirevision="tracker"  # Kolejne odświeżenia nie resetują widoku mapy
+    )
+    return fig
+
+@st.fragment
+def tracker_map(catalog, sel_norad, groups):
+    """Mapa satelitów. Przycisk "Odśwież pozycję" przelicza tylko ten fragment."""
+    tle_store = get_tle_store()
+    now = datetime.now(timezone.utc)
+    # Pozycje wszystkich obiektów z katalogu - jedno wywołanie SGP4
+    with metrics.timer("propagation_seconds", op="catalog"):
+        sat_positions = catalog.positions(now, precise=PRECISE_POSITIONS)
+    sel_name, l1, l2 = catalog.get(sel_norad)
+    track = ground_track(l1, l2)
+    with metrics.timer("propagation_seconds", op="track"):
+        pos = track.update(now)
     
-    with col_map:
-        st.subheader("ISS Tracker")
-        tle_data = fetch_iss_tle() # Pobiera bezpiecznie
-        
-        if tle_data:
-            l1, l2 = tle_data
-            lat, lon, t_lat, t_lon = get_satellite_position(l1, l2)
-            
-            if lat is not None:
-                fig = go.Figure()
-                # Trajektoria
-                fig.add_trace(go.Scattergeo(
-                    lat=t_lat, lon=t_lon, 
-                    mode="lines", 
-                    line=dict(color="blue", width=2, dash="dot"), 
-                    name="Orbita"
-                ))
-                # Pozycja
-                fig.add_trace(go.Scattergeo(
-                    lat=[lat], lon=[lon], 
-                    mode="text", 
-                    text=["🛰️"], 
-                    textfont=dict(size=30), 
-                    name="ISS Teraz"
-                ))
-                
-                fig.update_layout(
-                    margin={"r":0,"t":0,"l":0,"b":0}, 
-                    height=450, 
-                    geo=dict(
-                        projection_type="natural earth", 
-                        showland=True, 
-                        landcolor="#333", 
-                        showocean=True, 
-                        oceancolor="#111", 
-                        showcountries=True
-                    ), 
-                    showlegend=False
-                )
-                st.plotly_chart(fig, use_container_width=True)
-                
-                if st.button("🔄 Odśwież pozycję"): 
-                    st.rerun()
-            else:
-                st.error("Błąd obliczeń pozycji orbitalnej.")
+    if pos is not None:
+        greyline = greyline_layer(int(now.timestamp() // 60)) if st.session_state.get("tracker_greyline", True) else None
+        with metrics.timer("chart_seconds", chart="tracker"):
+            fig = tracker_figure(
+                tracker_path(track, l1, l2, now), pos, sel_name, sat_positions, greyline,
+                footprints=st.session_state.get("tracker_footprints", False)
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+        # Stan danych TLE: wiek epoki i błędy odświeżania
+        tle_age = tle_store.epoch_age(sel_norad)
+        tle_errors = [g for g in groups if (tle_store.status(g) or {}).get("error")]
+        if tle_age is None:
+            st.warning("Brak TLE w magazynie - pozycja liczona z danych zapasowych (styczeń 2024), może być niedokładna.")
+        elif tle_age > 7:
+            st.warning(f"TLE dla {sel_name} ma {tle_age:.0f} dni - pozycja może być niedokładna.")
+        if tle_errors:
+            st.caption(f"⚠️ Nie udało się odświeżyć: {', '.join(tle_errors)} (używam ostatniej dobrej kopii).")
+        if any(watch_tle_group(g).status(f"tle:{g}")["refreshing"] for g in groups):
+            st.caption("🔄 Trwa odświeżanie TLE w tle...")
+        tle_age_txt = f"{tle_age * 24:.1f} h" if tle_age is not None else "brak"
+        st.caption(f"Obiektów w katalogu: {len(catalog)} | Na mapie: {len(sat_positions)} | Wiek TLE: {tle_age_txt}")
+
+        # Kliknięcie w fragmencie przelicza tylko fragment - bez st.rerun() całej strony
+        st.button("🔄 Odśwież pozycję")
+    else:
+        st.error("Błąd obliczeń pozycji orbitalnej.")
+
+@st.fragment(run_every=LIVE_INTERVAL_S)
+def tracker_live(catalog, sel_norad):
+    """
+    Tryb na żywo: co LIVE_INTERVAL_S sekund tylko ten fragment - ślad (przesuwane
+    okno) i znacznik wybranego satelity, bez warstwy całego katalogu.
+    """
+    sel_name, l1, l2 = catalog.get(sel_norad)
+    track = ground_track(l1, l2)
+    now = datetime.now(timezone.utc)
+    with metrics.timer("propagation_seconds", op="track"):
+        pos = track.update(now)
+    if pos is None:
+        st.error("Błąd obliczeń pozycji orbitalnej.")
+        return
+    greyline = greyline_layer(int(now.timestamp() // 60)) if st.session_state.get("tracker_greyline", True) else None
+    with metrics.timer("chart_seconds", chart="tracker_live"):
+        fig = tracker_figure(tracker_path(track, l1, l2, now), pos, sel_name, greyline=greyline)
+        st.plotly_chart(fig, use_container_width=True, key="tracker_live_map")
+    st.caption(f"🔴 {sel_name}: {pos[0]:.2f}°, {pos[1]:.2f}°, {pos[2]:.0f} km | {now:%H:%M:%S} UTC")
+
+def csv_bytes(df):
+    """Tabela jako CSV (UTF-8) - wywoływane przez przycisk pobierania dopiero po kliknięciu."""
+    return df.to_csv(index=False).encode("utf-8")
+
+@st.fragment
+def tracker_passes(catalog, sel_norad):
+    """Przeloty i korekcja Dopplera - suwaki i wybór przelotu przeliczają tylko ten fragment."""
+    sel_name = catalog.get(sel_norad)[0]
+    # Przeloty nad QTH (lokalizacja z zakładki Kalkulatory)
+    obs_lat = st.session_state.get("qth_lat", HOME_QTH[0])
+    obs_lon = st.session_state.get("qth_lon", HOME_QTH[1])
+    with st.expander("📅 Najbliższe przeloty nad QTH"):
+        st.caption(f"QTH: {obs_lat:.2f}, {obs_lon:.2f} ({latlon_to_maidenhead(obs_lat, obs_lon)}) - zmień w zakładce 🧮 Kalkulatory.")
+
+        freq_sats = [n for n in dict.fromkeys(f.get("NORAD") for f in special_freqs) if n in catalog.index]
+        c_days, c_el, c_all = st.columns(3)
+        with c_days: pass_days = st.slider("Dni", 1, 7, 2)
+        with c_el: pass_min_el = st.slider("Min. elewacja (°)", 0, 45, 10)
+        with c_all: pass_all = st.checkbox("Cały katalog", value=False)
+        pass_sats = None if pass_all else list(dict.fromkeys(freq_sats + [sel_norad]))
+
+        with metrics.timer("propagation_seconds", op="passes"):
+            df_pass = predict_passes(catalog, obs_lat, obs_lon, days=pass_days, min_el=pass_min_el, norads=pass_sats)
+        st.dataframe(
+            df_pass.drop(columns=["NORAD"]),
+            column_config={
+                "AOS": st.column_config.DatetimeColumn("AOS (UTC)", format="DD.MM HH:mm:ss"),
+                "Kulminacja": st.column_config.DatetimeColumn("Kulminacja", format="HH:mm:ss"),
+                "LOS": st.column_config.DatetimeColumn("LOS", format="HH:mm:ss"),
+            },
+            use_container_width=True, hide_index=True, height=300
+        )
+
+    # Korekcja Dopplera dla kanałów śledzonego satelity
+    with st.expander("📶 Korekcja Dopplera (harmonogram strojenia)"):
+        channels = [
+            (f["Nazwa"], float(f["MHz"]), float(f["Uplink"]) if f.get("Uplink") else None)
+            for f in special_freqs if f.get("NORAD") == sel_norad
+        ]
+        next_passes = predict_passes(catalog, obs_lat, obs_lon, days=2, min_el=0, norads=[sel_norad])
+
+        if not channels:
+            st.info(f"Brak częstotliwości dla {sel_name} na liście. Dostępne: ISS, NOAA 19.")
+        elif next_passes.empty:
+            st.info("Brak przelotów w ciągu najbliższych 2 dni.")
         else:
-            st.error("Błąd pobierania danych TLE (CelesTrak).")
+            c_pass, c_step = st.columns([2, 1])
+            with c_pass:
+                pass_idx = st.selectbox(
+                    "Przelot", range(len(next_passes)),
+                    format_func=lambda i: f"{next_passes['AOS'].iloc[i]:%d.%m %H:%M} UTC, max {next_passes['Max el (°)'].iloc[i]}°"
+                )
+            with c_step:
+                tune_step = st.selectbox("Krok strojenia (kHz)", [0.1, 1.0, 2.5, 5.0, 6.25, 12.5], index=3)
 
-    with col_data:
-        st.subheader("Częstotliwości (PL)")
-        df = pd.DataFrame(data_freq)
-        
-        # Filtry wyszukiwania
-        c_search, c_filter = st.columns([2, 1])
-        with c_search: 
-            search = st.text_input("🔍 Szukaj...", placeholder="Np. Kanał 19, PMR 3")
-        with c_filter: 
-            cat_filter = st.multiselect("Kategorie", df["Kategoria"].unique(), placeholder="Wybierz...")
-
-        # Logika filtrowania
-        if search: 
-            df = df[df.apply(lambda r: r.astype(str).str.contains(search, case=False).any(), axis=1)]
-        if cat_filter: 
-            df = df[df["Kategoria"].isin(cat_filter)]
-        
+            sel_pass = next_passes.iloc[pass_idx]
+            dop = doppler_table(
+                catalog.satrecs[catalog.index[sel_norad]], channels, 
+                sel_pass["AOS"], sel_pass["LOS"], obs_lat, obs_lon
+            )
+            schedule = tuning_schedule(dop, tune_step)
+            st.dataframe(schedule, use_container_width=True, hide_index=True, height=300)
+
+            c_dl1, c_dl2 = st.columns(2)
+            with c_dl1:
+                st.download_button("📥 Harmonogram strojenia (CSV)", partial(csv_bytes, schedule), file_name="doppler_schedule.csv", mime="text/csv")
+            with c_dl2:
+                st.download_button("📥 Pełna tabela co 1 s (CSV)", partial(csv_bytes, dop), file_name="doppler_full.csv", mime="text/csv")
+
+def coverage_points(version, lat, lon):
+    """Punkty naziemne do złączenia z zasięgami: QTH i wszystkie przemienniki."""
+    reps = load_frequency_tables(version)["repeaters"]
+    return pd.concat([
+        pd.DataFrame({"Punkt": ["QTH"], "Typ": ["QTH"], "Lat": [lat], "Lon": [lon]}),
+        pd.DataFrame({
+            "Punkt": reps["Znak"].fillna("") + " (" + reps["Loc"].fillna("") + ")",
+            "Typ": "Przemiennik", "Lat": reps["Lat"], "Lon": reps["Lon"],
+        }),
+    ], ignore_index=True)
+
+@st.cache_data(max_entries=8)
+def coverage_table(_catalog, tle_key, freq_version, lat, lon, norads, hours, min_el, bucket):
+    """
+    Przedziały, w których QTH i przemienniki są w zasięgu satelitów `norads`
+    (footprint_join.py) - jedno wsadowe przeliczenie dla wszystkich satelitów i punktów,
+    wspólne dla sesji. `tle_key` (grupy i wersja TLE) identyfikuje katalog.
+    Zwraca (przedziały z opisem punktu, przedziały scalone per satelita).
+    """
+    points = coverage_points(freq_version, lat, lon)
+    start = pd.Timestamp(bucket * COVERAGE_BUCKET_S, unit="s", tz="UTC")
+    win = coverage_windows(
+        _catalog, points["Lat"], points["Lon"], start=start, hours=hours, min_el=min_el, norads=list(norads),
+        propagator=get_propagator()
+    )
+    typ = points["Typ"].to_numpy()[win["Punkt"]]
+    rep_win = merge_windows(win[typ == "Przemiennik"])
+    return win.assign(Punkt=points["Punkt"].to_numpy()[win["Punkt"]], Typ=typ), rep_win
+
+def coverage_figure(win, rep_win):
+    """Oś czasu: dla każdego satelity okna nad przemiennikami (scalone) i nad QTH."""
+    fig = go.Figure()
+    ms = lambda df: (df["Koniec"] - df["Początek"]).dt.total_seconds() * 1000
+    fig.add_trace(go.Bar(
+        y=rep_win["Nazwa"], base=rep_win["Początek"], x=ms(rep_win), orientation="h",
+        marker=dict(color=rep_win["Punkty"], colorscale="Oranges", cmin=0, line=dict(width=0)),
+        customdata=rep_win["Punkty"], name="Przemienniki",
+        hovertemplate="%{y}<br>%{base|%H:%M} UTC: %{customdata} przemienników<extra></extra>"
+    ))
+    qth = win[win["Typ"] == "QTH"]
+    fig.add_trace(go.Bar(
+        y=qth["Nazwa"], base=qth["Początek"], x=ms(qth), orientation="h", width=0.35,
+        marker=dict(color="#4fc3f7", line=dict(width=0)), name="QTH",
+        hovertemplate="%{y}<br>QTH: %{base|%H:%M} UTC<extra></extra>"
+    ))
+    fig.update_layout(
+        barmode="overlay", height=max(220, 40 + 28 * rep_win["Nazwa"].nunique()),
+        margin={"r": 0, "t": 10, "l": 0, "b": 0}, xaxis=dict(type="date"),
+        yaxis=dict(autorange="reversed"), legend=dict(orientation="h", y=1.1)
+    )
+    return fig
+
+@st.fragment
+def tracker_coverage(catalog, sel_norad, groups):
+    """Zasięg satelitów nad przemiennikami i QTH - oś czasu i tabela okien."""
+    obs_lat = st.session_state.get("qth_lat", HOME_QTH[0])
+    obs_lon = st.session_state.get("qth_lon", HOME_QTH[1])
+    with st.expander("🛰️ Zasięg nad przemiennikami i QTH"):
+        st.caption("Kiedy QTH i przemienniki z bazy są w zasięgu radiowym satelitów (satelita nad horyzontem).")
+        freq_sats = [n for n in dict.fromkeys(f.get("NORAD") for f in special_freqs) if n in catalog.index]
+        c_hours, c_el, c_all = st.columns(3)
+        with c_hours: hours = st.slider("Okno (h)", 1, 24, 12, key="coverage_hours")
+        with c_el: min_el = st.slider("Min. elewacja (°)", 0, 30, 0, key="coverage_min_el")
+        with c_all: cover_all = st.checkbox("Cały katalog", value=False, key="coverage_all")
+        norads = tuple(catalog.norad.tolist()) if cover_all else tuple(dict.fromkeys(freq_sats + [sel_norad]))
+
+        freq_version = get_freq_store().version()
+        bucket = int(datetime.now(timezone.utc).timestamp() // COVERAGE_BUCKET_S)
+        with metrics.timer("propagation_seconds", op="coverage"):
+            win, rep_win = coverage_table(
+                catalog, (tuple(groups), get_tle_store().version(groups)), freq_version,
+                obs_lat, obs_lon, norads, hours, float(min_el), bucket
+            )
+        if win.empty:
+            st.info("Żaden z punktów nie będzie w zasięgu wybranych satelitów w tym oknie.")
+            return
+        with metrics.timer("chart_seconds", chart="coverage"):
+            st.plotly_chart(coverage_figure(win, rep_win), use_container_width=True)
+
+        point = st.selectbox("Punkt", ["Wszystkie"] + list(dict.fromkeys(win["Punkt"])), key="coverage_point")
+        table = win if point == "Wszystkie" else win[win["Punkt"] == point]
         st.dataframe(
-            df[["MHz", "Nazwa", "Mod", "Opis"]],
+            table[["Nazwa", "Punkt", "Typ", "Początek", "Koniec", "Czas (min)"]],
             column_config={
-                "MHz": st.column_config.TextColumn("MHz", width="small"),
-                "Nazwa": st.column_config.TextColumn("Nazwa", width="medium"),
-                "Mod": st.column_config.TextColumn("Mod", width="small"),
-                "Opis": st.column_config.TextColumn("Opis", width="large"),
+                "Nazwa": st.column_config.TextColumn("Satelita"),
+                "Początek": st.column_config.DatetimeColumn("Początek (UTC)", format="DD.MM HH:mm:ss"),
+                "Koniec": st.column_config.DatetimeColumn("Koniec", format="HH:mm:ss"),
             },
-            use_container_width=True, hide_index=True, height=450
+            use_container_width=True, hide_index=True, height=300
         )
+        st.caption(f"Okien: {len(win)} | Satelitów: {len(norads)} | Punktów: {len(coverage_points(freq_version, obs_lat, obs_lon))}")
+
+@st.fragment
+def frequency_search(catalog):
+    """Wyszukiwarka częstotliwości - wpisywanie przelicza tylko tabelę."""
+    st.subheader("Częstotliwości (PL)")
+    freq_df, freq_index = get_frequency_index(get_freq_store().version())
+
+    # Filtry wyszukiwania
+    c_search, c_filter = st.columns([2, 1])
+    with c_search: 
+        search = st.text_input("🔍 Szukaj...", placeholder="Np. CB 19, PMR 3, ratunk")
+    with c_filter: 
+        cat_filter = st.multiselect("Kategorie", freq_df["Kategoria"].unique(), placeholder="Wybierz...")
+
+    # Logika filtrowania - indeks zwraca numery pasujących wierszy (każde słowo jako prefiks)
+    with metrics.timer("search_seconds", op="frequencies"):
+        df = freq_df.iloc[freq_index.search(search)] if search else freq_df
+        if cat_filter: 
+            df = df[df["Kategoria"].isin(cat_filter)]
+
+    # Satelity z listy częstotliwości -> aktualna pozycja (propagowane tylko te z tabeli)
+    with metrics.timer("propagation_seconds", op="frequencies"):
+        live = catalog.positions(
+            datetime.now(timezone.utc), precise=PRECISE_POSITIONS, norads=df["NORAD"].dropna().unique()
+        ).set_index("NORAD")
+    live = live["Lat"].map("{:.1f}°".format) + ", " + live["Lon"].map("{:.1f}°".format) + " / " + live["Wys (km)"].map("{:.0f} km".format)
+    df = df.assign(**{"Na żywo": df["NORAD"].map(live).fillna("")})
+
+    st.dataframe(
+        df[["MHz", "Nazwa", "Mod", "Opis", "Na żywo"]],
+        column_config={
+            "MHz": st.column_config.TextColumn("MHz", width="small"),
+            "Nazwa": st.column_config.TextColumn("Nazwa", width="medium"),
+            "Mod": st.column_config.TextColumn("Mod", width="small"),
+            "Opis": st.column_config.TextColumn("Opis", width="large"),
+            "Na żywo": st.column_config.TextColumn("Na żywo (Lat, Lon / Wys)", width="medium"),
+        },
+        use_container_width=True, hide_index=True, height=450
+    )
+
+with tabs[0]:
+    if tabs[0].open:
+        col_map, col_data = st.columns([3, 2])
+        
+        with col_map:
+            st.subheader("Tracker Satelitów")
+            c_groups, c_sat = st.columns([1, 1])
+            with c_groups:
+                groups = st.multiselect(
+                    "Grupy TLE", list(TLE_GROUPS), key="tle_groups",
+                    format_func=lambda g: TLE_GROUPS[g]
+                )
+            catalog = load_catalog(tuple(groups), get_tle_store().version(groups)) # Pobiera bezpiecznie
+            
+            with c_sat:
+                sel_norad = st.selectbox(
+                    "Śledzony satelita", catalog.norad.tolist(), 
+                    index=catalog.index.get(25544, 0), 
+                    format_func=lambda n: catalog.get(n)[0]
+                )
+            
+            c_live, c_grey, c_foot, c_span = st.columns([1, 1, 1, 2])
+            with c_live: live = st.toggle("🔴 Na żywo", key="tracker_live", help=f"Pozycja co {LIVE_INTERVAL_S} s - odświeżany jest tylko ślad i znacznik satelity.")
+            with c_grey: st.toggle("🌗 Szara strefa", value=True, key="tracker_greyline", help="Noc, zmierzch cywilny i terminator liczone lokalnie (co minutę).")
+            with c_foot: st.toggle("📡 Zasięgi", key="tracker_footprints", help="Okręgi zasięgu radiowego wszystkich satelitów z katalogu (poza trybem na żywo).")
+            with c_span: st.select_slider("Ślad", list(TRACK_SPANS), key="tracker_span", help="Ślad na wiele orbit: 50 min wstecz i wybrany czas w przód.")
+            
+            # Zmiana grup lub satelity przelicza zakładkę; reszta interakcji - tylko swój fragment
+            if live:
+                tracker_live(catalog, sel_norad)
+            else:
+                tracker_map(catalog, sel_norad, groups)
+            tracker_passes(catalog, sel_norad)
+            tracker_coverage(catalog, sel_norad, groups)
+
+        with col_data:
+            frequency_search(catalog)
 
 # 2. POGODA
+# Ocena warunków N0NBH -> kolor w tabeli pasm
+BAND_CONDITION_COLORS = {"Good": "#1b5e20", "Fair": "#8d6e00", "Poor": "#7f1d1d"}
+
+def space_weather_history_figure(hist):
+    """Wykres historii: SFI (lewa oś) i indeks K (słupki, prawa oś)."""
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=hist["updated"], y=hist["sfi"], mode="lines", name="SFI", line=dict(color="orange")))
+    fig.add_trace(go.Bar(x=hist["updated"], y=hist["k_index"], name="K", yaxis="y2", marker_color="#d32f2f", opacity=0.5))
+    fig.update_layout(
+        height=250, margin={"r":0,"t":10,"l":0,"b":0},
+        yaxis=dict(title="SFI"), yaxis2=dict(title="K", overlaying="y", side="right", range=[0, 9]),
+        legend=dict(orientation="h"), bargap=0.1
+    )
+    return fig
+
 with tabs[1]:
-    st.header("☀️ Pogoda Kosmiczna & Propagacja")
-    c1, c2 = st.columns(2)
-    with c1: 
-        st.image("https://www.hamqsl.com/solar101vhf.php", caption="Dane na żywo: N0NBH", use_container_width=False)
-        st.markdown("---")
-        st.image("https://www.hamqsl.com/solarmap.php", caption="Mapa Dzień/Noc (Greyline)", use_container_width=True)
-    with c2:
-        st.success("### SFI (Solar Flux Index)")
-        st.markdown("""
-        * **> 100:** Dobre warunki DX (dalekie łączności).
-        * **< 70:** Słabe warunki (wysoki poziom szumu tła).
-        """)
-        st.error("### K-Index (Burze Magnetyczne)")
-        st.markdown("""
-        * **0-2:** Czysty sygnał, brak zakłóceń.
-        * **> 4:** Burza geomagnetyczna (silne zakłócenia, możliwe zaniki sygnału).
-        """)
+    if tabs[1].open:
+        st.header("☀️ Pogoda Kosmiczna & Propagacja")
+        # Dane i obrazki z lokalnego magazynu - pobiera je wątek w tle, przeglądarka nie łączy się z hamqsl.com
+        refresher = get_refresher()
+        space = get_space_weather()
+        now_reading = space.latest()
+        c1, c2 = st.columns(2)
+        with c1: 
+            img = space.image("solar")
+            if img is not None:
+                st.image(img[0], caption=f"Dane: N0NBH (kopia z serwera) - pobrano {datetime.fromtimestamp(img[1], timezone.utc):%d.%m %H:%M} UTC", use_container_width=False)
+            else:
+                st.info("Obrazek jeszcze nie został pobrany - pojawi się po pierwszym odświeżeniu w tle.")
+            st.markdown("---")
+            # Mapa dnia i nocy liczona lokalnie (solar.py) - ta sama warstwa co na mapie trackera
+            now = datetime.now(timezone.utc)
+            fig = go.Figure()
+            add_greyline_traces(fig, greyline_layer(int(now.timestamp() // 60)), marker_px=7)
+            fig.update_layout(
+                margin={"r":0,"t":0,"l":0,"b":0}, height=320, showlegend=False,
+                geo=dict(projection_type="natural earth", showland=True, landcolor="#4a6741", showocean=True, oceancolor="#1d3557", showcountries=True)
+            )
+            with metrics.timer("chart_seconds", chart="greyline"):
+                st.plotly_chart(fig, use_container_width=True)
+            st.caption(f"Mapa Dzień/Noc (Greyline) - {now:%H:%M} UTC, szara strefa: Słońce {GREYLINE_DEG[0]:g}°..{GREYLINE_DEG[1]:g}° nad horyzontem")
+        with c2:
+            if now_reading is None:
+                err = refresher.status("space:xml")["error"]
+                st.info("Brak danych pogody kosmicznej - trwa pierwsze pobieranie." if err is None else f"Nie udało się pobrać danych N0NBH: {err}")
+            else:
+                hist = space.history(days=30)
+                prev = hist.iloc[-2] if len(hist) > 1 else None
+
+                def value(col):
+                    return "-" if now_reading[col] is None else f"{now_reading[col]:g}"
+
+                def delta(col):
+                    # Zmiana względem poprzedniej aktualizacji N0NBH
+                    if prev is None or now_reading[col] is None or pd.isna(prev[col]):
+                        return None
+                    return f"{now_reading[col] - prev[col]:+g}"
+
+                m1, m2, m3 = st.columns(3)
+                m1.metric("SFI", value("sfi"), delta("sfi"))
+                m2.metric("Indeks K", value("k_index"), delta("k_index"), delta_color="inverse")
+                m3.metric("Indeks A", value("a_index"), delta("a_index"), delta_color="inverse")
+                m1, m2, m3 = st.columns(3)
+                m1.metric("Plamy", value("sunspots"))
+                m2.metric("Wiatr słoneczny (km/s)", value("solar_wind"))
+                m3.metric("X-Ray", now_reading["xray"] or "-")
+                updated = datetime.fromtimestamp(now_reading["updated"], timezone.utc)
+                st.caption(f"Aktualizacja N0NBH: {updated:%d.%m.%Y %H:%M} UTC | Pole geomagnetyczne: {now_reading['geomag'] or '-'} | Szum: {now_reading['noise'] or '-'}")
+
+                if now_reading["bands"]:
+                    bands = pd.DataFrame.from_dict(now_reading["bands"], orient="index").reindex(columns=["day", "night"])
+                    bands = bands.rename(columns={"day": "Dzień", "night": "Noc"}).rename_axis("Pasmo").reset_index()
+                    st.dataframe(
+                        bands.style.map(lambda v: f"background-color: {BAND_CONDITION_COLORS.get(v, 'transparent')}", subset=["Dzień", "Noc"]),
+                        use_container_width=True, hide_index=True
+                    )
+                if now_reading["vhf"]:
+                    st.caption("UKF: " + " | ".join(f"{n} ({loc}): {v}" for n, loc, v in now_reading["vhf"]))
+                if len(hist) > 1:
+                    st.plotly_chart(space_weather_history_figure(hist), use_container_width=True)
+
+            st.success("### SFI (Solar Flux Index)")
+            st.markdown("""
+            * **> 100:** Dobre warunki DX (dalekie łączności).
+            * **< 70:** Słabe warunki (wysoki poziom szumu tła).
+            """)
+            st.error("### K-Index (Burze Magnetyczne)")
+            st.markdown("""
+            * **0-2:** Czysty sygnał, brak zakłóceń.
+            * **> 4:** Burza geomagnetyczna (silne zakłócenia, możliwe zaniki sygnału).
+            """)
 
 # 3. KRYZYSOWE (PEŁNE)
 with tabs[2]:
-    st.header("🆘 Procedury Awaryjne (Polska)")
-    c1, c2, c3 = st.columns(3)
+    if tabs[2].open:
+        st.header("🆘 Procedury Awaryjne (Polska)")
+        c1, c2, c3 = st.columns(3)
     
-    with c1: 
-        st.error("### 1. Reguła 3-3-3")
-        st.markdown("""
-        System nasłuchu w sytuacji kryzysowej (gdy brak sieci GSM):
-        * **Kiedy?** Co 3 godziny (12:00, 15:00, 18:00...)
-        * **Ile?** Przez 3 minuty nasłuchuj.
-        * **Gdzie?** * **PMR:** Kanał 3 (446.03125 MHz)
-            * **CB:** Kanał 3 (26.980 MHz AM)
-        """)
+        with c1: 
+            st.error("### 1. Reguła 3-3-3")
+            st.markdown("""
+            System nasłuchu w sytuacji kryzysowej (gdy brak sieci GSM):
+            * **Kiedy?** Co 3 godziny (12:00, 15:00, 18:00...)
+            * **Ile?** Przez 3 minuty nasłuchuj.
+            * **Gdzie?** * **PMR:** Kanał 3 (446.03125 MHz)
+                * **CB:** Kanał 3 (26.980 MHz AM)
+            """)
     
-    with c2: 
-        st.warning("### 2. Sprzęt")
-        st.markdown("""
-        * **Baofeng UV-5R:** Obsługuje PMR i Służby. **Nie odbiera** pasma lotniczego (AM) ani CB Radio.
-        * **Zasięg (PMR):** * Miasto: 500m - 1km.
-            * Otwarty teren: do 5km.
-            * Z gór: >100km.
-        * **Antena:** Zmień fabryczną na dłuższą (np. Nagoya 771), aby zyskać 50% zasięgu.
-        """)
+        with c2: 
+            st.warning("### 2. Sprzęt")
+            st.markdown("""
+            * **Baofeng UV-5R:** Obsługuje PMR i Służby. **Nie odbiera** pasma lotniczego (AM) ani CB Radio.
+            * **Zasięg (PMR):** * Miasto: 500m - 1km.
+                * Otwarty teren: do 5km.
+                * Z gór: >100km.
+            * **Antena:** Zmień fabryczną na dłuższą (np. Nagoya 771), aby zyskać 50% zasięgu.
+            """)
     
-    with c3: 
-        st.info("### 3. Komunikacja (SALT)")
-        st.markdown("""
-        Raport sytuacyjny powinien być krótki (**S.A.L.T**):
-        * **S (Size):** Wielkość zdarzenia / Liczba osób.
-        * **A (Activity):** Co się dzieje? Czego potrzebujecie?
-        * **L (Location):** Gdzie jesteście? (Współrzędne/Adres).
-        * **T (Time):** Kiedy to się stało?
-        """)
+        with c3: 
+            st.info("### 3. Komunikacja (SALT)")
+            st.markdown("""
+            Raport sytuacyjny powinien być krótki (**S.A.L.T**):
+            * **S (Size):** Wielkość zdarzenia / Liczba osób.
+            * **A (Activity):** Co się dzieje? Czego potrzebujecie?
+            * **L (Location):** Gdzie jesteście? (Współrzędne/Adres).
+            * **T (Time):** Kiedy to się stało?
+            """)
 
 # 4. CZAS
 with tabs[3]:
-    st.header("🌍 Czas Świata")
-    zs = [
-        ("UTC (Zulu)", "UTC"), 
-        ("Polska (Warszawa)", "Europe/Warsaw"), 
-        ("USA (New York)", "America/New_York"), 
-        ("USA (Los Angeles)", "America/Los_Angeles"), 
-        ("Japonia (Tokio)", "Asia/Tokyo"), 
-        ("Australia (Sydney)", "Australia/Sydney")
-    ]
-    cols = st.columns(3)
-    for i, (n, z) in enumerate(zs):
-        cols[i%3].markdown(f"""
-        <div style='background:#1E1E1E;padding:15px;border-radius:10px;text-align:center;margin-bottom:20px;border:1px solid #444;'>
-            <div style='color:#888;'>{n}</div>
-            <div style='font-size:2em;font-weight:bold;color:#FFF;'>{get_time_in_zone(z)}</div>
-        </div>
-        """, unsafe_allow_html=True)
+    if tabs[3].open:
+        st.header("🌍 Czas Świata")
+        zs = [
+            ("UTC (Zulu)", "UTC"), 
+            ("Polska (Warszawa)", "Europe/Warsaw"), 
+            ("USA (New York)", "America/New_York"), 
+            ("USA (Los Angeles)", "America/Los_Angeles"), 
+            ("Japonia (Tokio)", "Asia/Tokyo"), 
+            ("Australia (Sydney)", "Australia/Sydney")
+        ]
+        cols = st.columns(3)
+        for i, (n, z) in enumerate(zs):
+            cols[i%3].markdown(f"""
+            <div style='background:#1E1E1E;padding:15px;border-radius:10px;text-align:center;margin-bottom:20px;border:1px solid #444;'>
+                <div style='color:#888;'>{n}</div>
+                <div style='font-size:2em;font-weight:bold;color:#FFF;'>{get_time_in_zone(z)}</div>
+            </div>
+            """, unsafe_allow_html=True)
 
 # 5. GLOBALNE
 with tabs[4]:
-    st.header("📻 Globalne Stacje Radiowe")
-    st.markdown("Stacje o zasięgu kontynentalnym lub globalnym (Fale Długie i Krótkie).")
-    st.dataframe(
-        pd.DataFrame(global_stations), 
-        column_config={
-            "Nazwa": st.column_config.TextColumn("Stacja", width="medium"), 
-            "Opis": st.column_config.TextColumn("Opis i Zasięg", width="large")
-        }, 
-        use_container_width=True, hide_index=True
-    )
+    if tabs[4].open:
+        st.header("📻 Globalne Stacje Radiowe")
+        st.markdown("Stacje o zasięgu kontynentalnym lub globalnym (Fale Długie i Krótkie).")
+        st.dataframe(
+            frequency_tables()["stations"].drop(columns=["f_lo", "f_hi", "NORAD", "Uplink", "Źródło"]), 
+            column_config={
+                "Nazwa": st.column_config.TextColumn("Stacja", width="medium"), 
+                "Opis": st.column_config.TextColumn("Opis i Zasięg", width="large")
+            }, 
+            use_container_width=True, hide_index=True
+        )
 
 # 6. EDUKACJA (PEŁNE)
 with tabs[5]:
-    st.header("📚 Edukacja Radiowa")
-    c1, c2 = st.columns(2)
+    if tabs[5].open:
+        st.header("📚 Edukacja Radiowa")
+        c1, c2 = st.columns(2)
     
-    with c1: 
-        st.subheader("📖 Słownik Pojęć")
-        st.markdown("""
-        * **AM (Amplituda):** Modulacja używana w lotnictwie i na CB. Pozwala usłyszeć, gdy dwie osoby nadają jednocześnie (pisk).
-        * **FM / NFM:** Modulacja częstotliwości. Czysty dźwięk, ale silniejszy sygnał wycina słabszy ("efekt przechwycenia").
-        * **SSB (LSB/USB):** Modulacja jednowstęgowa. Używana do bardzo dalekich łączności (międzykontynentalnych) na KF.
-        * **Squelch (SQ):** Blokada szumów. Pokrętło wyciszające radio, gdy nikt nie nadaje.
-        * **CTCSS:** "Podton". Kod, który trzeba nadać, aby otworzyć przemiennik.
-        * **73:** Pozdrawiam.
-        """)
+        with c1: 
+            st.subheader("📖 Słownik Pojęć")
+            st.markdown("""
+            * **AM (Amplituda):** Modulacja używana w lotnictwie i na CB. Pozwala usłyszeć, gdy dwie osoby nadają jednocześnie (pisk).
+            * **FM / NFM:** Modulacja częstotliwości. Czysty dźwięk, ale silniejszy sygnał wycina słabszy ("efekt przechwycenia").
+            * **SSB (LSB/USB):** Modulacja jednowstęgowa. Używana do bardzo dalekich łączności (międzykontynentalnych) na KF.
+            * **Squelch (SQ):** Blokada szumów. Pokrętło wyciszające radio, gdy nikt nie nadaje.
+            * **CTCSS:** "Podton". Kod, który trzeba nadać, aby otworzyć przemiennik.
+            * **73:** Pozdrawiam.
+            """)
         
-    with c2: 
-        st.subheader("💡 Ciekawostki")
-        st.markdown("""
-        * **CB Zera vs Piątki:** Polska pracuje w "zerach" (np. 27.180 MHz), a reszta Europy w "piątkach" (27.185 MHz). Nowoczesne radia mają przełącznik standardów.
-        * **Doppler:** Gdy satelita nadlatuje, słyszysz go na wyższej częstotliwości (+3 kHz). Gdy odlatuje - na niższej. Trzeba kręcić gałką!
-        * **PMR w górach:** Z Kasprowego Wierchu na ręcznym radiu (0.5W) można rozmawiać na odległość ponad 100 km.
-        """)
+        with c2: 
+            st.subheader("💡 Ciekawostki")
+            st.markdown("""
+            * **CB Zera vs Piątki:** Polska pracuje w "zerach" (np. 27.180 MHz), a reszta Europy w "piątkach" (27.185 MHz). Nowoczesne radia mają przełącznik standardów.
+            * **Doppler:** Gdy satelita nadlatuje, słyszysz go na wyższej częstotliwości (+3 kHz). Gdy odlatuje - na niższej. Trzeba kręcić gałką!
+            * **PMR w górach:** Z Kasprowego Wierchu na ręcznym radiu (0.5W) można rozmawiać na odległość ponad 100 km.
+            """)
 
 # 7. PRZEMIENNIKI
-with tabs[6]:
-    st.header("🗺️ Mapa Przemienników PL")
+def repeater_figure(singles, clusters, map_lat, map_lon, map_zoom):
+    """Mapa przemienników: pojedyncze punkty i skupiska (z repeater_map_layer)."""
+    fig = go.Figure(go.Scattermapbox(
+        lat=singles['Lat'], lon=singles['Lon'], 
+        mode='markers', 
+        marker=dict(size=14, color='orange'), 
+        hoverinfo='text', 
+        hovertext=singles['Hover'],
+        name='Przemienniki'
+    ))
+    if len(clusters):
+        fig.add_trace(go.Scattermapbox(
+            lat=clusters['Lat'], lon=clusters['Lon'],
+            mode='markers+text',
+            marker=dict(size=np.clip(12 + 6 * np.log10(clusters['Count']), 14, 40), color='darkorange', opacity=0.8),
+            text=clusters['Count'].astype(str), textfont=dict(color='black'),
+            hoverinfo='text', hovertext=clusters['Hover'],
+            name='Skupiska'
+        ))
+    fig.update_layout(
+        mapbox_style="open-street-map", 
+        mapbox=dict(center=dict(lat=map_lat, lon=map_lon), zoom=map_zoom), 
+        margin={"r":0,"t":0,"l":0,"b":0}, 
+        height=500, showlegend=False
+    )
+    return fig
+
+@st.fragment
+def repeater_map():
+    """Mapa przemienników - środek i przybliżenie przeliczają tylko ten fragment."""
     c1, c2 = st.columns([3,1])
-    dfr = pd.DataFrame(repeater_list)
-    
+    dfr = frequency_tables()["repeaters"]
+
     with c1:
-        fig = go.Figure(go.Scattermapbox(
-            lat=dfr['Lat'], lon=dfr['Lon'], 
-            mode='markers', 
-            marker=dict(size=14, color='orange'), 
-            text=dfr['Znak'], 
-            hoverinfo='text', 
-            hovertext=dfr.apply(lambda r: f"<b>{r['Znak']}</b><br>{r['Loc']}<br>Freq: {r['Freq']}<br>CTCSS: {r['CTCSS']}", axis=1)
-        ))
-        fig.update_layout(
-            mapbox_style="open-street-map", 
-            mapbox=dict(center=dict(lat=52, lon=19), zoom=5.5), 
-            margin={"r":0,"t":0,"l":0,"b":0}, 
-            height=500
-        )
-        st.plotly_chart(fig, use_container_width=True)
-        
+        # Szczegółowość liczona po stronie serwera - na mapę trafia najwyżej MAP_MAX_MARKERS punktów
+        c_center, c_zoom = st.columns(2)
+        with c_center: map_center = st.radio("Środek mapy", ["Polska", "Mój QTH"], horizontal=True, key="rep_map_center")
+        with c_zoom: map_zoom = st.slider("Przybliżenie", 3.0, 12.0, 5.5, step=0.5, key="rep_map_zoom")
+        if map_center == "Polska":
+            map_lat, map_lon = 52.0, 19.0
+        else:
+            map_lat, map_lon = st.session_state.get("qth_lat", HOME_QTH[0]), st.session_state.get("qth_lon", HOME_QTH[1])
+        with metrics.timer("search_seconds", op="repeater_map"):
+            singles, clusters = repeater_map_layer(get_freq_store().version(), map_lat, map_lon, map_zoom)
+        with metrics.timer("chart_seconds", chart="repeaters"):
+            st.plotly_chart(repeater_figure(singles, clusters, map_lat, map_lon, map_zoom), use_container_width=True)
+        st.caption(f"{len(dfr)} przemienników w bazie; w widoku: {len(singles)} punktów i {len(clusters)} skupisk ({int(clusters['Count'].sum()) if len(clusters) else 0} przemienników).")
+
     with c2: 
-        st.info("Najedź na punkt na mapie, aby zobaczyć szczegóły (CTCSS, Shift).")
-        st.dataframe(dfr[["Znak", "Freq", "Loc"]], hide_index=True)
+        st.info("Najedź na punkt na mapie, aby zobaczyć szczegóły (CTCSS, Shift). Liczby to skupiska - zwiększ przybliżenie.")
+        # Odległość i azymut z QTH (zakładka Kalkulatory) - liczone raz dla całej bazy
+        qth_dist = repeater_distances(get_freq_store().version(), st.session_state.get("qth_lat", HOME_QTH[0]), st.session_state.get("qth_lon", HOME_QTH[1]))
+        st.dataframe(
+            singles[["Znak", "Freq", "Loc"]].join(qth_dist), hide_index=True,
+            column_config={
+                "Freq": st.column_config.NumberColumn("Freq", format="%.4f"),
+                "km": st.column_config.NumberColumn("km", format="%.0f"),
+                "Az (°)": st.column_config.NumberColumn("Az (°)", format="%.0f"),
+            }
+        )
 
-# 8. KALKULATORY (POPRAWIONY WYGLĄD)
-with tabs[7]:
-    st.header("🧮 Narzędzia Radiowe (Toolbox)")
-    
-    col_ant, col_wave, col_qth = st.columns(3)
-    
-    # 1. Kalkulator Anteny (Dipol)
-    with col_ant:
-        with st.container(border=True): # Ramka
-            st.subheader("📡 Kalkulator Dipola")
-            st.markdown("Oblicz długość anteny (dipol półfalowy) dla danej częstotliwości.")
-            st.markdown(r"Wzór: $L = 142.5 / f$")
-            
-            freq_input = st.number_input("Częstotliwość (MHz):", value=145.500, step=0.001, format="%.3f")
-            
-            if freq_input > 0:
-                # Wzór: 142.5 / f (dla dipola półfalowego ze współczynnikiem 0.95)
-                total_len = 142.5 / freq_input
-                arm_len = total_len / 2
-                
-                st.divider()
-                st.success(f"**Długość całkowita:** {total_len:.2f} m")
-                st.info(f"**Jedno ramię:** {arm_len:.2f} m")
-                st.caption("*Uwzględnia współczynnik skrócenia 0.95 (dla miedzi).*")
+@st.fragment
+def repeaters_in_range():
+    """Najbliższe przemienniki od QTH (indeks przestrzenny w geo.py)."""
+    with st.container(border=True):
+        st.subheader("📍 Co mam w zasięgu?")
+        c_qth, c_mode, c_par = st.columns(3)
+        with c_qth:
+            near_loc = st.text_input("Lokator (puste = QTH z Kalkulatorów)", placeholder="Np. KO02md", key="rep_near_loc")
+        near_lat, near_lon = st.session_state.get("qth_lat", HOME_QTH[0]), st.session_state.get("qth_lon", HOME_QTH[1])
+        if near_loc.strip():
+            try:
+                near_lat, near_lon = maidenhead_to_latlon(near_loc)
+            except ValueError as e:
+                st.error(str(e))
+        with c_mode: near_mode = st.radio("Szukaj", ["Najbliższe", "W promieniu"], horizontal=True, key="rep_near_mode")
+        with c_par:
+            if near_mode == "Najbliższe":
+                near_k = st.slider("Ile przemienników", 1, 50, 10, key="rep_near_k")
             else:
-                st.error("Wpisz poprawną częstotliwość.")
-
-    # 2. Kalkulator Długości Fali
-    with col_wave:
-        with st.container(border=True): # Ramka
-            st.subheader("🌊 Długość Fali")
-            st.markdown("Przelicz częstotliwość na długość fali (pasmo).")
-            st.markdown(r"Wzór: $\lambda = 300 / f$")
-            
-            freq_wave = st.number_input("Częstotliwość (MHz)", value=27.180, step=0.001, format="%.3f")
-            
-            if freq_wave > 0:
-                wavelength = 300 / freq_wave
-                
-                # Określanie pasma
-                band_name = ""
-                if 26 <= freq_wave <= 28: band_name = "Pasmo CB (11m)"
-                elif 144 <= freq_wave <= 146: band_name = "Pasmo 2m (VHF)"
-                elif 430 <= freq_wave <= 446: band_name = "Pasmo 70cm (UHF)"
-                elif 88 <= freq_wave <= 108: band_name = "Radio FM (UKF)"
-                
-                st.divider()
-                st.metric("Długość fali", f"{wavelength:.2f} m")
-                if band_name:
-                    st.caption(f"📍 {band_name}")
-
-    # 3. Lokalizator QTH
-    with col_qth:
-        with st.container(border=True): # Ramka
-            st.subheader("📍 Lokalizator QTH")
-            st.markdown("Zamień współrzędne GPS na kod Maidenhead Locator.")
-            
-            qth_lat = st.number_input("Szerokość (Lat):", value=52.23, step=0.01)
-            qth_lon = st.number_input("Długość (Lon):", value=21.01, step=0.01)
-            
-            locator = latlon_to_maidenhead(qth_lat, qth_lon)
-            
+                near_km = st.slider("Promień (km)", 5, 500, 50, step=5, key="rep_near_km")
+        rep_df, rep_index = get_repeater_index(get_freq_store().version())
+        with metrics.timer("search_seconds", op="repeaters_near"):
+            if near_mode == "Najbliższe":
+                pos, dist = rep_index.nearest(near_lat, near_lon, k=near_k)
+            else:
+                pos, dist = rep_index.within(near_lat, near_lon, near_km)
+        near = rep_df.iloc[pos][["Znak", "Freq", "Shift", "CTCSS", "Loc", "Mod"]].assign(
+            **{"Odległość (km)": dist, "Azymut (°)": bearing(near_lat, near_lon, rep_df["Lat"].to_numpy()[pos], rep_df["Lon"].to_numpy()[pos])}
+        )
+        st.caption(f"QTH: {near_lat:.3f}, {near_lon:.3f} - {len(near)} przemienników")
+        st.dataframe(
+            near, hide_index=True, use_container_width=True,
+            column_config={
+                "Freq": st.column_config.NumberColumn("Freq", format="%.4f"),
+                "Odległość (km)": st.column_config.NumberColumn(format="%.1f"),
+                "Azymut (°)": st.column_config.NumberColumn(format="%.0f"),
+            }
+        )
+
+with tabs[6]:
+    if tabs[6].open:
+        st.header("🗺️ Mapa Przemienników PL")
+        repeater_map()
+        repeaters_in_range()
+
+        # Import zewnętrznych baz do magazynu Parquet - po zmianie przeliczana jest cała strona
+        with st.expander("📥 Import baz (CHIRP CSV, RepeaterBook CSV)"):
+            freq_store = get_freq_store()
+            c_kind, c_name = st.columns(2)
+            with c_kind: imp_kind = st.radio("Rodzaj pliku", ["Przemienniki (RepeaterBook CSV)", "Kanały radia (CHIRP CSV)"])
+            with c_name: imp_name = st.text_input("Nazwa źródła", placeholder="Np. repeaterbook_pl")
+            up_db = st.file_uploader("Plik CSV", type=["csv"], key="freq_db_upload")
+            if up_db is not None and st.button("Importuj bazę"):
+                name = imp_name or os.path.splitext(up_db.name)[0]
+                if imp_kind.startswith("Przemienniki"):
+                    n = freq_store.import_repeaters(up_db, name)
+                else:
+                    n = freq_store.import_chirp(up_db, name, category=f"CHIRP: {name}")
+                st.success(f"Zaimportowano {n} pozycji ze źródła '{name}'.")
+                st.rerun()
+            for kind, label in [("repeaters", "Przemienniki"), ("frequencies", "Częstotliwości")]:
+                for src in freq_store.sources(kind):
+                    c_src, c_del = st.columns([4, 1])
+                    with c_src: st.caption(f"{label}: {src}")
+                    with c_del:
+                        if st.button("Usuń", key=f"del_{kind}_{src}"):
+                            freq_store.remove(kind, src)
+                            st.rerun()
+
+# 8. KALKULATORY (POPRAWIONY WYGLĄD)
+# Każdy kalkulator to osobny fragment - zmiana pola przelicza tylko jego ramkę
+@st.fragment
+def dipole_calculator():
+    """Kalkulator dipola półfalowego."""
+    with st.container(border=True): # Ramka
+        st.subheader("📡 Kalkulator Dipola")
+        st.markdown("Oblicz długość anteny (dipol półfalowy) dla danej częstotliwości.")
+        st.markdown(r"Wzór: $L = 142.5 / f$")
+
+        freq_input = st.number_input("Częstotliwość (MHz):", value=145.500, step=0.001, format="%.3f")
+
+        if freq_input > 0:
+            # Wzór: 142.5 / f (dla dipola półfalowego ze współczynnikiem 0.95)
+            total_len = 142.5 / freq_input
+            arm_len = total_len / 2
+
             st.divider()
-            st.success(f"Twój Locator: **{locator}**")
-            st.caption("Podawaj ten kod przy potwierdzaniu łączności, aby określić odległość.")
+            st.success(f"**Długość całkowita:** {total_len:.2f} m")
+            st.info(f"**Jedno ramię:** {arm_len:.2f} m")
+            st.caption("*Uwzględnia współczynnik skrócenia 0.95 (dla miedzi).*")
+        else:
+            st.error("Wpisz poprawną częstotliwość.")
+
+@st.fragment
+def wavelength_calculator():
+    """Długość fali i pasmo dla częstotliwości."""
+    with st.container(border=True): # Ramka
+        st.subheader("🌊 Długość Fali")
+        st.markdown("Przelicz częstotliwość na długość fali (pasmo).")
+        st.markdown(r"Wzór: $\lambda = 300 / f$")
+
+        freq_wave = st.number_input("Częstotliwość (MHz)", value=27.180, step=0.001, format="%.3f")
+
+        if freq_wave > 0:
+            wavelength = 300 / freq_wave
+
+            # Określanie pasma (plan pasm w bandplan.py)
+            band_name = PLAN.describe([freq_wave])[0]
+
+            st.divider()
+            st.metric("Długość fali", f"{wavelength:.2f} m")
+            if band_name:
+                st.caption(f"📍 {band_name}")
+
+@st.fragment
+def qth_locator():
+    """QTH (współrzędne) i lokator Maidenhead - czytany też przez inne zakładki."""
+    with st.container(border=True): # Ramka
+        st.subheader("📍 Lokalizator QTH")
+        st.markdown("Zamień współrzędne GPS na kod Maidenhead Locator.")
+
+        # Wartość początkowa w PERSISTENT_WIDGETS - stan przetrwa przełączenie zakładki
+        qth_lat = st.number_input("Szerokość (Lat):", step=0.01, key="qth_lat")
+        qth_lon = st.number_input("Długość (Lon):", step=0.01, key="qth_lon")
+
+        locator = latlon_to_maidenhead(qth_lat, qth_lon)
+
+        st.divider()
+        st.success(f"Twój Locator: **{locator}**")
+        st.caption("Podawaj ten kod przy potwierdzaniu łączności, aby określić odległość.")
+
+@st.fragment
+def range_query():
+    """Zakres częstotliwości - lista, przemienniki i logbook jednym zapytaniem."""
+    with st.container(border=True):
+        st.subheader("📏 Co jest w zakresie?")
+        c1, c2, c3 = st.columns(3)
+        with c1: rng_band = st.selectbox("Pasmo z planu", ["Własny zakres"] + [b[2] for b in BAND_PLAN], index=0)
+        band_lo, band_hi = PLAN.bounds(rng_band) if rng_band != "Własny zakres" else (144.0, 146.0)
+        with c2: rng_lo = st.number_input("Od (MHz)", value=float(band_lo), step=0.1, format="%.4f", key=f"rng_lo_{rng_band}")
+        with c3: rng_hi = st.number_input("Do (MHz)", value=float(band_hi), step=0.1, format="%.4f", key=f"rng_hi_{rng_band}")
+
+        range_tables = get_range_tables(get_freq_store().version())
+        range_tabs = st.tabs(list(range_tables) + ["Logbook"])
+        for tab, (name, (rdf, rindex)) in zip(range_tabs, range_tables.items()):
+            with tab:
+                hits = rdf.iloc[rindex.query(rng_lo, rng_hi)]
+                st.caption(f"{len(hits)} pozycji")
+                st.dataframe(hits.drop(columns=["NORAD", "Uplink", "Lat", "Lon"], errors="ignore"), use_container_width=True, hide_index=True)
+        with range_tabs[-1]:
+            log_hits, more = get_logbook().query(freq_min=rng_lo, freq_max=rng_hi, limit=100)
+            st.caption(f"{len(log_hits)}{'+' if more else ''} ostatnich wpisów")
+            st.dataframe(log_hits, use_container_width=True, hide_index=True)
+
+with tabs[7]:
+    if tabs[7].open:
+        st.header("🧮 Narzędzia Radiowe (Toolbox)")
+        
+        col_ant, col_wave, col_qth = st.columns(3)
+        
+        # 1. Kalkulator Anteny (Dipol)
+        with col_ant:
+            dipole_calculator()
+
+        # 2. Kalkulator Długości Fali
+        with col_wave:
+            wavelength_calculator()
+
+        # 3. Lokalizator QTH
+        with col_qth:
+            qth_locator()
+
+        # 4. Zakres częstotliwości
+        range_query()
 
 # 9. WEBSDR
 with tabs[8]:
-    st.header("🌐 Katalog WebSDR")
-    st.markdown("Odbiorniki dostępne online. Kliknij link, aby słuchać bez własnego radia.")
-    st.dataframe(
-        pd.DataFrame(websdr_list), 
-        column_config={"Link": st.column_config.LinkColumn("Link", display_text="Otwórz 🔗")}, 
-        use_container_width=True, hide_index=True
-    )
+    if tabs[8].open:
+        st.header("🌐 Katalog WebSDR")
+        st.markdown("Odbiorniki dostępne online. Kliknij link, aby słuchać bez własnego radia.")
+        st.dataframe(
+            frequency_tables()["websdr"], 
+            column_config={"Link": st.column_config.LinkColumn("Link", display_text="Otwórz 🔗")}, 
+            use_container_width=True, hide_index=True
+        )
 
-# 10. LOGBOOK (TRWAŁY - BAZA PLIKOWA)
-with tabs[9]:
-    st.header("📝 Dziennik Nasłuchów (Logbook)")
-    st.markdown("Twoja osobista baza łączności. Dane są zapisywane w pliku `radio_logbook.csv` na serwerze i nie znikają po odświeżeniu.")
-    
-    # Inicjalizacja stanu
-    if 'logbook_df' not in st.session_state:
-        st.session_state.logbook_df = load_logbook()
+# 10. LOGBOOK (TRWAŁY - BAZA SQLITE)
+def _log_older(cursor):
+    st.session_state.log_cursors.append(cursor)
+
+def _log_newer():
+    st.session_state.log_cursors.pop()
+
+def export_logbook(fmt):
+    """Kopia logbooka (CSV/ADIF) - generowana dopiero po kliknięciu pobierania."""
+    with metrics.timer("logbook_seconds", op="export"):
+        return get_logbook().export_bytes(fmt)
+
+@st.fragment
+def logbook_panel():
+    """Formularz, wpisy, eksport i import - zapis wpisu czy zmiana strony przeliczają tylko ten fragment."""
+    book = get_logbook()
 
     with st.form("log_form", clear_on_submit=True):
-        c1, c2, c3, c4, c5 = st.columns(5)
+        c1, c2, c3, c4, c5, c6 = st.columns(6)
         with c1: t_in = st.text_input("Godzina (UTC)", value=datetime.now(timezone.utc).strftime("%H:%M"))
         with c2: f_in = st.text_input("Freq (MHz)")
         with c3: s_in = st.text_input("Stacja / Znak")
-        with c4: m_in = st.selectbox("Modulacja", ["FM", "AM", "SSB", "CW", "DMR"])
+        with c4: m_in = st.selectbox("Modulacja", LOG_MODES)
         with c5: r_in = st.text_input("Raport (RST)", "59")
-        
+        with c6: g_in = st.text_input("Lokator stacji", placeholder="Np. JO62qm")
+
         if st.form_submit_button("➕ Zapisz w Bazie"):
-            if f_in and s_in:
-                new_row = pd.DataFrame([{
-                    "Data": datetime.now().strftime("%Y-%m-%d"), 
-                    "Godzina (UTC)": t_in, 
-                    "Freq (MHz)": f_in, 
-                    "Stacja": s_in, 
-                    "Modulacja": m_in, 
-                    "Raport": r_in
-                }])
-                # Aktualizacja stanu i zapis do pliku
-                st.session_state.logbook_df = pd.concat([st.session_state.logbook_df, new_row], ignore_index=True)
-                save_logbook(st.session_state.logbook_df)
+            if g_in.strip() and np.isnan(maidenhead_decode([g_in])[0][0]):
+                st.error(f"Niepoprawny lokator: {g_in}")
+            elif f_in and s_in:
+                # Jeden INSERT - bez przepisywania całego logbooka
+                with metrics.timer("logbook_seconds", op="append"):
+                    book.append({
+                        "Data": datetime.now(timezone.utc).strftime("%Y-%m-%d"), 
+                        "Godzina (UTC)": t_in, 
+                        "Freq (MHz)": f_in, 
+                        "Stacja": s_in, 
+                        "Modulacja": m_in, 
+                        "Raport": r_in,
+                        "Lokator": g_in.strip()
+                    })
                 st.success("Zapisano pomyślnie!")
             else:
                 st.error("Wpisz przynajmniej częstotliwość i znak stacji.")
 
-    st.subheader("Ostatnie wpisy")
-    # Wyświetlanie (odwrócona kolejność - najnowsze na górze)
-    st.dataframe(st.session_state.logbook_df.iloc[::-1], use_container_width=True)
-    
-    # Pobieranie
-    csv = st.session_state.logbook_df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="📥 Pobierz Logbook (Backup CSV)",
-        data=csv,
-        file_name='radio_logbook.csv',
-        mime='text/csv',
+    st.subheader("Wpisy")
+    # Filtry - każdy korzysta z indeksu w bazie
+    c1, c2, c3, c4 = st.columns(4)
+    with c1: q_call = st.text_input("Znak (początek)", key="log_q_call")
+    with c2: q_band = st.selectbox("Pasmo", ["Wszystkie"] + [b[2] for b in BAND_PLAN], key="log_q_band")
+    with c3: q_mode = st.selectbox("Modulacja", ["Wszystkie"] + LOG_MODES, key="log_q_mode")
+    with c4: q_size = st.selectbox("Wierszy na stronę", LOG_PAGE_SIZES, index=1, key="log_q_size")
+    c1, c2, c3, c4 = st.columns(4)
+    with c1: q_fmin = st.number_input("Freq od (MHz)", min_value=0.0, value=None, format="%.4f", key="log_q_fmin")
+    with c2: q_fmax = st.number_input("Freq do (MHz)", min_value=0.0, value=None, format="%.4f", key="log_q_fmax")
+    with c3: q_dfrom = st.date_input("Data od", value=None, key="log_q_dfrom")
+    with c4: q_dto = st.date_input("Data do", value=None, key="log_q_dto")
+
+    filters = dict(
+        call=q_call or None,
+        band=None if q_band == "Wszystkie" else q_band,
+        mode=None if q_mode == "Wszystkie" else q_mode,
+        freq_min=q_fmin, freq_max=q_fmax,
+        date_from=q_dfrom.isoformat() if q_dfrom else None,
+        date_to=q_dto.isoformat() if q_dto else None,
     )
+    # Stos kursorów stron (id granicznych) - zmiana filtrów wraca na pierwszą stronę
+    if st.session_state.get("log_filters") != (filters, q_size):
+        st.session_state.log_filters = (filters, q_size)
+        st.session_state.log_cursors = [None]
+
+    with metrics.timer("logbook_seconds", op="query"):
+        page, next_cursor = book.query(before_id=st.session_state.log_cursors[-1], limit=q_size, **filters)
+    # Wyświetlanie tylko bieżącej strony (najnowsze na górze) z odległością i azymutem z QTH
+    qth_lat = st.session_state.get("qth_lat", HOME_QTH[0])
+    qth_lon = st.session_state.get("qth_lon", HOME_QTH[1])
+    g_lat, g_lon = maidenhead_decode(page["Lokator"])
+    dist, az = distance_bearing(qth_lat, qth_lon, g_lat, g_lon)
+    st.dataframe(
+        page.assign(**{"km": dist, "Az (°)": az}), use_container_width=True, hide_index=True,
+        column_config={
+            "km": st.column_config.NumberColumn("km", format="%.0f"),
+            "Az (°)": st.column_config.NumberColumn("Az (°)", format="%.0f"),
+        }
+    )
+
+    c1, c2, c3 = st.columns([1, 1, 4])
+    with c1: st.button("⬅️ Nowsze", on_click=_log_newer, disabled=len(st.session_state.log_cursors) == 1)
+    with c2: st.button("Starsze ➡️", on_click=_log_older, args=(next_cursor,), disabled=next_cursor is None)
+    with c3: st.caption(f"Strona {len(st.session_state.log_cursors)}")
+
+    # Pobieranie - plik generowany porcjami dopiero po kliknięciu, nie przy każdym odświeżeniu
+    c1, c2 = st.columns([1, 3])
+    with c1: exp_fmt = st.radio("Format kopii", ["CSV", "ADIF"], horizontal=True, key="log_export_fmt")
+    with c2:
+        st.download_button(
+            label=f"📥 Pobierz Logbook (Backup {exp_fmt})",
+            data=partial(export_logbook, exp_fmt.lower()),
+            file_name='radio_logbook.csv' if exp_fmt == "CSV" else 'radio_logbook.adi',
+            mime='text/csv' if exp_fmt == "CSV" else 'text/plain',
+        )
+
+    # Odległości dla całego logbooka - jedno zapytanie i jedno wektorowe przeliczenie
+    with st.expander("📏 Odległości z QTH (cały logbook)"):
+        st.caption(f"QTH: {qth_lat:.2f}, {qth_lon:.2f} ({latlon_to_maidenhead(qth_lat, qth_lon)}) - zmień w zakładce 🧮 Kalkulatory. Liczone tylko dla wpisów z lokatorem.")
+        if st.button("Przelicz odległości"):
+            with metrics.timer("logbook_seconds", op="distances"):
+                dist_df = book.distances(qth_lat, qth_lon)
+            valid = dist_df.dropna(subset=["Odległość (km)"])
+            if valid.empty:
+                st.info("Brak wpisów z poprawnym lokatorem.")
+            else:
+                c1, c2, c3 = st.columns(3)
+                c1.metric("Wpisów z lokatorem", len(valid))
+                c2.metric("ODX (km)", f"{valid['Odległość (km)'].max():.0f}")
+                c3.metric("Średnio (km)", f"{valid['Odległość (km)'].mean():.0f}")
+                st.dataframe(
+                    valid.nlargest(10, "Odległość (km)"), use_container_width=True, hide_index=True,
+                    column_config={
+                        "Odległość (km)": st.column_config.NumberColumn(format="%.0f"),
+                        "Azymut (°)": st.column_config.NumberColumn(format="%.0f"),
+                    }
+                )
+
+    # Import (CSV jak w kopii zapasowej albo ADIF z innego programu)
+    with st.expander("📤 Import logbooka z pliku CSV / ADIF"):
+        up_log = st.file_uploader("Plik CSV (kolumny jak w kopii zapasowej) lub ADIF (.adi)", type=["csv", "adi", "adif"])
+        if up_log is not None and st.button("Importuj"):
+            with metrics.timer("logbook_seconds", op="import"):
+                if up_log.name.lower().endswith(".csv"):
+                    n = book.import_csv(up_log)
+                else:
+                    n = book.import_adif(up_log)
+            st.success(f"Zaimportowano {n} wpisów.")
+
+with tabs[9]:
+    if tabs[9].open:
+        st.header("📝 Dziennik Nasłuchów (Logbook)")
+        st.markdown("Twoja osobista baza łączności. Dane są zapisywane w bazie `radio_logbook.sqlite` na serwerze, nie znikają po odświeżeniu i są wspólne dla wszystkich otwartych sesji.")
+        logbook_panel()
+
+# 11. METRYKI (TYLKO ?admin)
+@st.fragment
+def metrics_panel():
+    """Liczniki i histogramy czasów z metrics.py - przyciski przeliczają tylko ten fragment."""
+    c1, c2, c3 = st.columns([1, 1, 3])
+    with c1: st.button("🔄 Odśwież")
+    with c2:
+        if st.button("💾 Zapisz liczniki teraz"):
+            metrics.flush()
+    with c3:
+        endpoint = f"http://localhost:{METRICS_PORT}/metrics" if METRICS_PORT else "wyłączony (METRICS_PORT)"
+        st.caption(f"Liczniki zapisywane co {METRICS_FLUSH_S} s do `{METRICS_DB_FILE}`; histogramy od startu procesu. Endpoint Prometheusa: {endpoint}")
+
+    st.subheader("Liczniki")
+    st.dataframe(
+        pd.DataFrame(metrics.counters(), columns=["Metryka", "Etykiety", "Wartość"]),
+        use_container_width=True, hide_index=True
+    )
+
+    st.subheader("Czasy wykonania")
+    hist = pd.DataFrame(metrics.histograms(), columns=["name", "labels", "count", "mean", "p50", "p95", "p99"])
+    # Sekundy -> milisekundy; kwantyle to górne granice przedziałów histogramu
+    for col in ["mean", "p50", "p95", "p99"]:
+        hist[col] = pd.to_numeric(hist[col]) * 1000
+    st.dataframe(
+        hist.rename(columns={"name": "Metryka", "labels": "Etykiety", "count": "Pomiarów"}),
+        column_config={
+            "mean": st.column_config.NumberColumn("Średnio (ms)", format="%.1f"),
+            "p50": st.column_config.NumberColumn("p50 ≤ (ms)", format="%g"),
+            "p95": st.column_config.NumberColumn("p95 ≤ (ms)", format="%g"),
+            "p99": st.column_config.NumberColumn("p99 ≤ (ms)", format="%g"),
+        },
+        use_container_width=True, hide_index=True
+    )
+    st.download_button("📥 Metryki (format Prometheusa)", metrics.prometheus().encode("utf-8"), file_name="metrics.txt", mime="text/plain")
+
+if show_admin:
+    with tabs[10]:
+        if tabs[10].open:
+            st.header("📊 Metryki aplikacji")
+            metrics_panel()
 
 st.markdown("---")
 st.caption("Centrum Dowodzenia Radiowego v15.0 Visual | Dane: CelesTrak, N0NBH | Czas: UTC")
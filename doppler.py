@@ -0,0 +1,80 @@
+"""
+Korekcja Dopplera dla częstotliwości satelitarnych.
+
+Prędkość radialna (range-rate) liczona jest z wektora prędkości SGP4
+dla całego przelotu naraz, a tabela częstotliwości dla wszystkich kanałów
+satelity powstaje jednym iloczynem zewnętrznym (czasy x kanały).
+"""
+import numpy as np
+import pandas as pd
+
+from satellites import to_epochs, propagate_epochs, epochs_to_jd, teme_to_ecef, observer_ecef
+
+SPEED_OF_LIGHT = 299792.458  # km/s
+
+
+def range_rate(sat, epochs, lat, lon, alt_km=0.0):
+    """
+    Prędkość radialna satelity względem QTH [km/s] (dodatnia = oddala się)
+    oraz elewacja [°] dla tablicy epok - jedno wywołanie SGP4.
+    """
+    e, r, v = propagate_epochs(sat, epochs)
+    jd, fr = epochs_to_jd(epochs)
+    r_ecef, v_ecef = teme_to_ecef(r, v, jd, fr)
+    obs, enu = observer_ecef(lat, lon, alt_km)
+    rho = r_ecef - obs
+    dist = np.linalg.norm(rho, axis=-1)
+    rate = np.einsum("ij,ij->i", rho, v_ecef) / dist
+    el = np.degrees(np.arcsin(rho @ enu[2] / dist))
+    rate[e != 0] = np.nan
+    return rate, el
+
+
+def doppler_table(sat, channels, start, end, lat, lon, alt_km=0.0, step_s=1.0):
+    """
+    Tabela skorygowanych częstotliwości dla przelotu [start, end] co `step_s` sekund.
+    `channels` to lista (nazwa, downlink_MHz, uplink_MHz) - uplink może być None.
+    Dla downlinku podaje częstotliwość odbioru na ziemi, dla uplinku - częstotliwość
+    nadawania, przy której satelita usłyszy kanał nominalny.
+    """
+    start, end = pd.Timestamp(start).floor("s"), pd.Timestamp(end)
+    t0 = to_epochs(start.to_pydatetime())[0]
+    n = int((end - start).total_seconds() // step_s) + 1
+    epochs = t0 + (np.arange(n) * step_s * 1e6).astype("timedelta64[us]")
+    rate, el = range_rate(sat, epochs, lat, lon, alt_km)
+
+    beta = rate / SPEED_OF_LIGHT
+    down = np.array([c[1] if c[1] is not None else np.nan for c in channels], dtype=float)
+    up = np.array([c[2] if c[2] is not None else np.nan for c in channels], dtype=float)
+    rx = np.outer(1 - beta, down)
+    tx = np.outer(1 / (1 - beta), up)
+
+    table = {
+        "Czas (UTC)": pd.to_datetime(epochs).tz_localize("UTC"),
+        "Elewacja (°)": el.round(1),
+        "Range rate (km/s)": rate.round(3),
+    }
+    for i, (name, d, u) in enumerate(channels):
+        if d is not None:
+            table[f"{name} RX (MHz)"] = rx[:, i].round(6)
+        if u is not None:
+            table[f"{name} TX (MHz)"] = tx[:, i].round(6)
+    return pd.DataFrame(table)
+
+
+def tuning_schedule(table, step_khz=5.0):
+    """
+    Skraca tabelę Dopplera do harmonogramu strojenia: zostawia tylko wiersze,
+    w których którakolwiek częstotliwość zaokrąglona do kroku radia (`step_khz`)
+    się zmienia. Częstotliwości w wyniku są już zaokrąglone do tego kroku.
+    """
+    cols = [c for c in table.columns if c.endswith("(MHz)")]
+    if table.empty or not cols:
+        return table
+    step = step_khz / 1000.0
+    tuned = np.round(table[cols].to_numpy() / step) * step
+    changed = np.r_[True, (np.diff(tuned, axis=0) != 0).any(axis=1)]
+    out = table.loc[changed, ["Czas (UTC)", "Elewacja (°)"]].copy()
+    # 6 miejsc (1 Hz): round(4) psuło siatkę 6.25 kHz (145.80625 -> 145.8062)
+    out[cols] = tuned[changed].round(6)
+    return out.reset_index(drop=True)
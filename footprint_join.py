@@ -0,0 +1,167 @@
+"""
+Złączenie przestrzenne: które punkty naziemne (przemienniki, QTH) są w zasięgu
+radiowym których satelitów i kiedy.
+
+Algorytm (jedno wsadowe przeliczenie dla wszystkich satelitów i punktów):
+1. Pozycje całego zbioru satelitów na siatce czasu - jedno wywołanie
+   `SatrecArray` i jedna transformacja TEME -> lat/lon/wysokość (albo pula
+   procesów z parallel.py dla dużych katalogów).
+2. Punkt jest w zasięgu, gdy jego odległość kątowa od punktu podsatelitarnego
+   nie przekracza promienia zasięgu (`tracks.footprint_radius`), czyli gdy
+   iloczyn skalarny wektorów jednostkowych >= cos(promienia).
+3. Wstępny filtr: chwile, w których zasięg satelity nie sięga czaszy
+   obejmującej wszystkie punkty, są odrzucane bez liczenia - dla punktów
+   z jednego regionu (przemienniki w Polsce) zostaje niewielka część chwil.
+   Reszta to iloczyny macierzy w porcjach o ograniczonym rozmiarze.
+4. W każdej porcji od razu wyznaczamy tylko zmiany stanu (wejście w zasięg
+   i wyjście z niego), więc pamięć rośnie z liczbą przedziałów, a nie
+   z liczbą trafień (satelita geostacjonarny "widzi" punkty przez całe okno).
+   Początek i koniec przedziału jest interpolowany liniowo między próbkami.
+"""
+import numpy as np
+import pandas as pd
+from sgp4.api import SatrecArray
+
+from satellites import propagate_epochs, teme_to_geodetic, to_epochs
+from tracks import footprint_radius
+
+COVERAGE_STEP = 30.0  # Krok siatki czasu [s]
+CHUNK_ELEMENTS = 2_000_000  # Maks. rozmiar porcji (chwile x punkty) iloczynu skalarnego
+
+COVERAGE_COLUMNS = ["NORAD", "Nazwa", "Punkt", "Początek", "Koniec", "Czas (min)"]
+
+
+def _unit(lat, lon):
+    """Wektory jednostkowe (..., 3) dla współrzędnych [°] na sferze."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def _events(sub, cos_r, ground, rows, n_t):
+    """
+    Początki i końce przedziałów w zasięgu dla wybranych wierszy (satelita x
+    chwila, posortowanych), liczone porcjami: w pamięci jest tylko jedna porcja
+    macierzy, a wynik rośnie z liczbą przedziałów, nie z liczbą trafień.
+    Wiersze pominięte przez filtr są poza zasięgiem. Zwraca (wiersz, punkt) początków
+    i (wiersz, punkt) końców - ostatnich chwil w zasięgu.
+    """
+    chunk = max(1, CHUNK_ELEMENTS // len(ground))
+    sub32, ground32 = sub.astype(np.float32), ground.T.astype(np.float32)
+    starts, ends = [], []
+    prev_row, prev_in = -2, np.zeros(len(ground), dtype=bool)
+    for i in range(0, len(rows), chunk):
+        part = rows[i:i + chunk]
+        inside = sub32[part] @ ground32 >= cos_r[part, None]
+        before = np.vstack([prev_in, inside[:-1]])
+        # Poprzedni wiersz to poprzednia chwila tego samego satelity?
+        prev_rows = np.concatenate([[prev_row], part[:-1]])
+        linked = ((part == prev_rows + 1) & (part % n_t != 0))[:, None]
+        r, p = np.nonzero(inside & ~(before & linked))
+        starts.append((part[r], p))
+        r, p = np.nonzero(before & ~(inside & linked))
+        ends.append((prev_rows[r], p))
+        prev_row, prev_in = part[-1], inside[-1]
+    ends.append((np.full(prev_in.sum(), prev_row), np.flatnonzero(prev_in)))
+    stack = lambda ev: tuple(np.concatenate([x[k] for x in ev]).astype(np.int64) if ev else np.empty(0, dtype=np.int64) for k in (0, 1))
+    return stack(starts), stack(ends)
+
+
+def _crossing(sub, cos_r, ground, row_in, row_out, pts):
+    """Ułamek kroku (0..1) od próbki w zasięgu do granicy zasięgu, z interpolacji liniowej."""
+    m_in = np.einsum("ij,ij->i", sub[row_in], ground[pts]) - cos_r[row_in]
+    m_out = np.einsum("ij,ij->i", sub[row_out], ground[pts]) - cos_r[row_out]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = m_in / (m_in - m_out)
+    return np.clip(np.nan_to_num(frac, nan=0.0), 0.0, 1.0)
+
+
+def coverage_windows(catalog, lats, lons, start=None, hours=24, step=COVERAGE_STEP, min_el=0.0, norads=None, propagator=None):
+    """
+    Przedziały czasu, w których punkty (lats, lons) są w zasięgu satelitów
+    z katalogu (elewacja co najmniej `min_el` [°]) w oknie `hours` godzin od `start`.
+    `Punkt` to numer punktu w podanych tablicach. Przedziały trwające w chwili
+    `start` lub na końcu okna są obcięte do okna. `propagator` (parallel.Propagator)
+    liczy pozycje dużych katalogów w puli procesów, z cache na dysku.
+    Zwraca DataFrame z kolumnami COVERAGE_COLUMNS posortowany po początku.
+    """
+    start = pd.Timestamp(start if start is not None else pd.Timestamp.now(tz="UTC"))
+    if start.tzinfo is None:
+        start = start.tz_localize("UTC")
+    if norads is None:
+        idx = np.arange(len(catalog))
+    else:
+        idx = np.array([catalog.index[n] for n in norads if n in catalog.index], dtype=np.int64)
+    lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+    valid = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons))
+    if not len(idx) or not len(valid):
+        return pd.DataFrame(columns=COVERAGE_COLUMNS)
+
+    n_t = int(np.ceil(hours * 3600.0 / step)) + 1
+    epochs = to_epochs(start.tz_convert(None).to_pydatetime()) + (np.arange(n_t) * step * 1e6).astype("timedelta64[us]")
+    if propagator is not None:
+        lat, lon, alt = np.moveaxis(propagator.geodetic(catalog, epochs, idx), -1, 0)
+        ok = np.isfinite(alt)
+    else:
+        e, r, _ = propagate_epochs(SatrecArray([catalog.satrecs[i] for i in idx]), epochs)
+        lat, lon, alt = teme_to_geodetic(r, epochs)
+        ok = (e == 0) & np.isfinite(alt)
+    sub = _unit(lat, lon).reshape(-1, 3)  # Wiersz = satelita * n_t + chwila
+    radius = np.where(ok, np.radians(footprint_radius(np.where(ok, alt, 0.0), min_el)), -1.0)
+    cos_r = np.where(ok, np.cos(radius), np.inf).ravel()  # Błąd propagacji - nic nie jest w zasięgu
+    ground = _unit(lats[valid], lons[valid])
+
+    # Czasza obejmująca wszystkie punkty: środek i promień kątowy
+    center = ground.sum(axis=0)
+    norm = np.linalg.norm(center)
+    center = center / norm if norm > 1e-9 else np.array([0.0, 0.0, 1.0])
+    cap = np.arccos(np.clip((ground @ center).min(), -1.0, 1.0)) if norm > 1e-9 else np.pi
+    reach = np.cos(np.minimum(radius.ravel() + cap, np.pi))
+    rows = np.flatnonzero(ok.ravel() & (sub @ center >= reach))
+
+    (s_row, s_pt), (e_row, e_pt) = _events(sub, cos_r, ground, rows, n_t)
+    if not len(s_row):
+        return pd.DataFrame(columns=COVERAGE_COLUMNS)
+    # Początki i końce tej samej pary (satelita, punkt) występują na przemian - wystarczy je posortować
+    s_ord = np.lexsort((s_row, s_pt, s_row // n_t))
+    e_ord = np.lexsort((e_row, e_pt, e_row // n_t))
+    s_row, pts, e_row = s_row[s_ord], s_pt[s_ord], e_row[e_ord]
+    sat_of, first_t = np.divmod(s_row, n_t)
+    last_t = e_row % n_t
+
+    t0, t1 = first_t.astype(float), last_t.astype(float)
+    inner = first_t > 0  # Przedział zaczął się w oknie - dokładny początek z interpolacji
+    t0[inner] -= _crossing(sub, cos_r, ground, s_row[inner], s_row[inner] - 1, pts[inner])
+    inner = last_t < n_t - 1
+    t1[inner] += _crossing(sub, cos_r, ground, e_row[inner], e_row[inner] + 1, pts[inner])
+
+    base = epochs[0]
+    to_time = lambda steps: pd.to_datetime(base + (steps * step * 1e6).astype("timedelta64[us]")).tz_localize("UTC")
+    order = np.lexsort((pts, sat_of, t0))  # Posortowane po początku już w NumPy
+    t0, t1, pts, sat_idx = t0[order], t1[order], pts[order], idx[sat_of[order]]
+    return pd.DataFrame({
+        "NORAD": catalog.norad[sat_idx],
+        "Nazwa": np.asarray(catalog.names, dtype=object)[sat_idx],
+        "Punkt": valid[pts],
+        "Początek": to_time(t0),
+        "Koniec": to_time(t1),
+        "Czas (min)": ((t1 - t0) * step / 60.0).round(1),
+    }, columns=COVERAGE_COLUMNS)
+
+
+def merge_windows(windows):
+    """
+    Przedziały z `coverage_windows` scalone dla każdego satelity: od pierwszego
+    punktu w zasięgu do ostatniego, z liczbą różnych punktów w scalonym przedziale.
+    Zwraca DataFrame: NORAD, Nazwa, Początek, Koniec, Punkty.
+    """
+    cols = ["NORAD", "Nazwa", "Początek", "Koniec", "Punkty"]
+    if windows.empty:
+        return pd.DataFrame(columns=cols)
+    w = windows.sort_values(["NORAD", "Początek"], ignore_index=True)
+    reach = w.groupby("NORAD")["Koniec"].cummax()
+    prev = reach.groupby(w["NORAD"]).shift()
+    group = (prev.isna() | (w["Początek"] > prev)).cumsum()
+    return w.groupby(group).agg(
+        NORAD=("NORAD", "first"), Nazwa=("Nazwa", "first"),
+        Początek=("Początek", "min"), Koniec=("Koniec", "max"), Punkty=("Punkt", "nunique"),
+    ).sort_values("Początek", ignore_index=True)[cols]
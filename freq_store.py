@@ -0,0 +1,224 @@
+"""
+Kolumnowy magazyn baz częstotliwości i przemienników (Parquet).
+
+- Każde źródło (eksport CHIRP, zrzut w stylu RepeaterBook, lista wbudowana)
+  to osobny plik `<katalog>/<rodzaj>/<źródło>.parquet` o stałym, typowanym
+  schemacie: częstotliwości jako float64, powtarzalne teksty (pasmo, modulacja,
+  kategoria, źródło) słownikowo.
+- Import czyta plik CSV porcjami i dopisuje je do pliku Parquet bez trzymania
+  całej bazy w pamięci; gotowy plik podmieniany jest atomowo.
+- Odczyt całego rodzaju to jedno `read_table` na źródło - milisekundy także dla
+  setek tysięcy wierszy.
+"""
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from bandplan import PLAN, parse_mhz
+
+IMPORT_BATCH = 20000  # Wierszy CSV na porcję importu
+
+_DICT = pa.dictionary(pa.int32(), pa.string())
+
+SCHEMAS = {
+    "frequencies": pa.schema([
+        ("MHz", pa.string()),
+        ("f_lo", pa.float64()),
+        ("f_hi", pa.float64()),
+        ("Pasmo", _DICT),
+        ("Mod", _DICT),
+        ("Kategoria", _DICT),
+        ("Nazwa", pa.string()),
+        ("Opis", pa.string()),
+        ("NORAD", pa.int32()),
+        ("Uplink", pa.string()),
+        ("Źródło", _DICT),
+    ]),
+    "repeaters": pa.schema([
+        ("Znak", pa.string()),
+        ("Freq", pa.float64()),
+        ("Shift", pa.float64()),
+        ("CTCSS", pa.float32()),
+        ("Lat", pa.float64()),
+        ("Lon", pa.float64()),
+        ("Loc", pa.string()),
+        ("Mod", _DICT),
+        ("Źródło", _DICT),
+    ]),
+}
+
+# Nazwy kolumn zrzutów w stylu RepeaterBook (małymi literami) -> kolumny magazynu
+REPEATER_ALIASES = {
+    "Znak": ["callsign", "call", "znak"],
+    "Freq": ["frequency", "output freq", "output", "freq", "downlink"],
+    "Input": ["input freq", "input", "uplink"],
+    "Shift": ["offset", "shift"],
+    "CTCSS": ["pl", "ctcss", "tone", "uplink tone", "ctcss/dcs"],
+    "Lat": ["lat", "latitude"],
+    "Lon": ["long", "lon", "lng", "longitude"],
+    "Loc": ["nearest city", "near", "city", "location", "landmark", "loc"],
+    "Mod": ["mode", "modes", "mod"],
+}
+
+
+def _numbers(values):
+    """Liczby z kolumny tekstowej ("145,5" też); NaN, gdy nieczytelne."""
+    s = pd.Series(values, dtype=object).fillna("").astype(str).str.strip().str.replace(",", ".", regex=False)
+    return pd.to_numeric(s, errors="coerce").to_numpy(dtype=float)
+
+
+def _fmt_mhz(values):
+    """Częstotliwości float jako tekst jak na listach ("145.500", "145.6875")."""
+    text = pd.Series(values, dtype=float).map("{:.5f}".format).str.replace(r"(\.\d{3}\d*?)0+$", r"\1", regex=True)
+    return text.where(~np.isnan(values), "")
+
+
+def to_table(df, kind, source):
+    """Tabela Arrow w schemacie rodzaju `kind` (brakujące kolumny puste, typy ujednolicone)."""
+    schema = SCHEMAS[kind]
+    out = pd.DataFrame(index=range(len(df)))
+    df = df.reset_index(drop=True)
+    for field in schema:
+        col = field.name
+        if col == "Źródło":
+            out[col] = source
+        elif col in ("f_lo", "f_hi"):
+            continue
+        elif col in df:
+            out[col] = df[col]
+        else:
+            out[col] = None
+    if kind == "frequencies":
+        out["MHz"] = out["MHz"].fillna("").astype(str)
+        out["f_lo"], out["f_hi"] = parse_mhz(out["MHz"])
+        # Brak pasma w źródle -> z planu pasm
+        missing = out["Pasmo"].isna() | (out["Pasmo"].astype(str) == "")
+        out.loc[missing, "Pasmo"] = PLAN.classify(out.loc[missing, "f_lo"])
+        out["NORAD"] = pd.to_numeric(out["NORAD"], errors="coerce")
+    else:
+        for col in ("Freq", "Shift", "CTCSS", "Lat", "Lon"):
+            if not pd.api.types.is_numeric_dtype(out[col]):
+                out[col] = _numbers(out[col])
+    return pa.Table.from_pandas(out[schema.names], schema=schema, preserve_index=False)
+
+
+def normalize(df, kind, source):
+    """DataFrame w schemacie rodzaju `kind` - tak samo typowany jak wczytany z magazynu."""
+    return to_table(df, kind, source).to_pandas()
+
+
+def chirp_frame(chunk, category):
+    """Porcja eksportu CHIRP (CSV) jako lista częstotliwości."""
+    c = chunk.rename(columns=str.strip)
+
+    def get(col):
+        return c[col].astype(str).str.strip() if col in c else pd.Series("", index=c.index)
+
+    duplex, offset, tone = get("Duplex"), _numbers(get("Offset")), get("Tone")
+    sign = duplex.map({"+": 1.0, "-": -1.0}).to_numpy(dtype=float)
+    opis = get("Comment")
+    shift = pd.Series(np.round(sign * offset, 4), index=c.index)
+    has_shift = ~np.isnan(sign)
+    opis = opis.where(~has_shift, opis + " | Shift " + shift.map("{:+g}".format))
+    has_tone = tone.isin(["Tone", "TSQL"]).to_numpy()
+    opis = opis.where(~has_tone, opis + " | CTCSS " + get("rToneFreq"))
+    return pd.DataFrame({
+        "MHz": _fmt_mhz(_numbers(get("Frequency"))).to_numpy(),
+        "Mod": get("Mode").to_numpy(),
+        "Kategoria": category,
+        "Nazwa": get("Name").to_numpy(),
+        "Opis": opis.str.strip(" |").to_numpy(),
+    })
+
+
+def repeater_frame(chunk):
+    """Porcja zrzutu w stylu RepeaterBook (CSV) w kolumnach magazynu przemienników."""
+    lower = {str(c).strip().lower(): c for c in chunk.columns}
+    cols = {}
+    for name, aliases in REPEATER_ALIASES.items():
+        src = next((lower[a] for a in aliases if a in lower), None)
+        cols[name] = chunk[src].astype(str).str.strip() if src is not None else pd.Series("", index=chunk.index)
+    freq = _numbers(cols["Freq"])
+    inp = _numbers(cols["Input"])
+    # Przesunięcie: z częstotliwości wejściowej, a gdy jej brak - z kolumny offset
+    shift = np.where(np.isnan(inp), _numbers(cols["Shift"]), np.round(inp - freq, 4))
+    mode = cols["Mod"]
+    if "dmr" in lower and "mode" not in lower:
+        mode = np.where(chunk[lower["dmr"]].astype(str).str.lower().isin(["yes", "true", "1"]), "DMR", "FM")
+    return pd.DataFrame({
+        "Znak": cols["Znak"].to_numpy(),
+        "Freq": freq,
+        "Shift": shift,
+        "CTCSS": _numbers(cols["CTCSS"]),
+        "Lat": _numbers(cols["Lat"]),
+        "Lon": _numbers(cols["Lon"]),
+        "Loc": cols["Loc"].to_numpy(),
+        "Mod": np.where(pd.Series(mode).astype(str) == "", "FM", mode),
+    })
+
+
+class FrequencyStore:
+    """Katalog z plikami Parquet - po jednym na źródło i rodzaj danych."""
+
+    def __init__(self, path):
+        self.path = path
+        for kind in SCHEMAS:
+            os.makedirs(os.path.join(path, kind), exist_ok=True)
+
+    def _file(self, kind, source):
+        slug = re.sub(r"[^\w.-]+", "_", source).strip("_") or "zrodlo"
+        return os.path.join(self.path, kind, slug + ".parquet")
+
+    def write(self, kind, source, frames):
+        """
+        Zapisuje źródło z iteratora DataFrame'ów (porcjami) - zastępuje poprzednią
+        wersję tego źródła. Zwraca liczbę zapisanych wierszy.
+        """
+        target = self._file(kind, source)
+        tmp = target + ".tmp"
+        total = 0
+        with pq.ParquetWriter(tmp, SCHEMAS[kind], compression="zstd") as writer:
+            for df in frames:
+                writer.write_table(to_table(df, kind, source))
+                total += len(df)
+        os.replace(tmp, target)
+        return total
+
+    def import_chirp(self, source_file, name, category="Import", batch_rows=IMPORT_BATCH):
+        """Import eksportu CHIRP (CSV) jako źródła częstotliwości `name`."""
+        chunks = pd.read_csv(source_file, dtype=str, keep_default_na=False, chunksize=batch_rows)
+        return self.write("frequencies", name, (chirp_frame(c, category) for c in chunks))
+
+    def import_repeaters(self, source_file, name, batch_rows=IMPORT_BATCH):
+        """Import zrzutu przemienników w stylu RepeaterBook (CSV) jako źródła `name`."""
+        chunks = pd.read_csv(source_file, dtype=str, keep_default_na=False, chunksize=batch_rows)
+        return self.write("repeaters", name, (repeater_frame(c) for c in chunks))
+
+    def _files(self, kind):
+        folder = os.path.join(self.path, kind)
+        return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".parquet"))
+
+    def sources(self, kind):
+        """Nazwy plików źródeł danego rodzaju."""
+        return [os.path.basename(f)[: -len(".parquet")] for f in self._files(kind)]
+
+    def remove(self, kind, source):
+        try:
+            os.remove(self._file(kind, source))
+        except FileNotFoundError:
+            pass
+
+    def load(self, kind):
+        """Wszystkie źródła danego rodzaju jako jeden DataFrame."""
+        tables = [pq.read_table(f, schema=SCHEMAS[kind]) for f in self._files(kind)]
+        if not tables:
+            return SCHEMAS[kind].empty_table().to_pandas()
+        return pa.concat_tables(tables, promote_options="permissive").to_pandas()
+
+    def version(self):
+        """Znacznik zmian plików magazynu - do unieważniania cache."""
+        return tuple((f, os.path.getmtime(f)) for kind in SCHEMAS for f in self._files(kind))
@@ -0,0 +1,225 @@
+"""
+Geometria na kuli ziemskiej: odległości, azymuty, lokatory Maidenhead
+i indeks przestrzenny punktów (np. przemienników).
+
+Indeks to siatka komórek lat/lon (domyślnie 0.5° x 0.5°). Punkty posortowane
+są po numerze komórki (wiersz szerokości * liczba kolumn + kolumna długości),
+więc komórki jednego pasa szerokości leżą obok siebie i zapytanie o okolicę
+to kilka wycinków tablicy - bez drzewa i bez pętli po punktach.
+"""
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG = np.pi * EARTH_RADIUS_KM / 180.0
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Odległość po kole wielkim [km] (tablice są rozgłaszane)."""
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    dp, dl = p2 - p1, np.radians(np.subtract(lon2, lon1))
+    a = np.sin(dp / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bearing(lat1, lon1, lat2, lon2):
+    """Azymut początkowy z punktu 1 do punktu 2 [° od północy, 0-360)."""
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    dl = np.radians(np.subtract(lon2, lon1))
+    x = np.sin(dl) * np.cos(p2)
+    y = np.cos(p1) * np.sin(p2) - np.sin(p1) * np.cos(p2) * np.cos(dl)
+    return np.degrees(np.arctan2(x, y)) % 360.0
+
+
+# Kolejne pary znaków lokatora: (liczba podziałów, litery?)
+_LOCATOR_STEPS = [(18, True), (10, False), (24, True), (10, False)]
+LOCATOR_LENGTHS = (2, 4, 6, 8)
+
+
+def latlon_to_maidenhead(lat, lon, precision=6):
+    """
+    Lokator Maidenhead (2, 4, 6 lub 8 znaków, np. "KO02MF") dla punktu albo
+    tablic punktów - dla tablic zwraca tablicę tekstów ("" dla NaN).
+    Liczone na liczbach całkowitych (numer najmniejszego pola), bez pętli po punktach.
+    """
+    if precision not in LOCATOR_LENGTHS:
+        raise ValueError(f"Niepoprawna długość lokatora: {precision}")
+    steps = _LOCATOR_STEPS[: precision // 2]
+    cells = int(np.prod([div for div, _ in steps]))  # Liczba najmniejszych pól na osi
+    lat_a, lon_a = np.broadcast_arrays(np.asarray(lat, dtype=float), np.asarray(lon, dtype=float))
+    ok = np.isfinite(lat_a) & np.isfinite(lon_a)
+    # Biegun północny i południk 180° należą do ostatniego pola
+    y = np.clip(np.floor((np.where(ok, lat_a, 0.0) + 90.0) / 180.0 * cells), 0, cells - 1).astype(np.int64)
+    x = np.floor((np.where(ok, lon_a, 0.0) + 180.0) % 360.0 / 360.0 * cells).astype(np.int64) % cells
+    codes = np.empty(lat_a.shape + (precision,), dtype=np.uint8)
+    for i, (div, letters) in enumerate(steps):
+        cells //= div
+        base = ord("A") if letters else ord("0")
+        codes[..., 2 * i] = base + x // cells % div
+        codes[..., 2 * i + 1] = base + y // cells % div
+    text = np.where(ok, codes.view(f"S{precision}")[..., 0], b"").astype(str)
+    return str(text) if text.ndim == 0 else text
+
+
+def maidenhead_decode(locators):
+    """
+    Środki pól lokatorów (2, 4, 6 lub 8 znaków, dowolna wielkość liter) jako
+    tablice (lat, lon) - NaN dla lokatorów niepoprawnych lub pustych.
+    """
+    s = pd.Series(locators, dtype=object).fillna("").astype(str).str.strip().str.upper()
+    lengths = s.str.len().to_numpy()
+    valid = np.isin(lengths, LOCATOR_LENGTHS)
+    raw = np.array(s.where(valid, "").str.encode("ascii", "replace").tolist(), dtype="S8")
+    codes = raw.view(np.uint8).reshape(len(s), 8).astype(np.int64)  # Krótsze lokatory dopełnione zerami
+    lat, lon = np.full(len(s), -90.0), np.full(len(s), -180.0)
+    size_lat, size_lon = np.full(len(s), 180.0), np.full(len(s), 360.0)
+    for i, (div, letters) in enumerate(_LOCATOR_STEPS):
+        used = lengths > 2 * i
+        x = codes[:, 2 * i] - (ord("A") if letters else ord("0"))
+        y = codes[:, 2 * i + 1] - (ord("A") if letters else ord("0"))
+        valid &= ~used | ((x >= 0) & (x < div) & (y >= 0) & (y < div))
+        size_lat = np.where(used, size_lat / div, size_lat)
+        size_lon = np.where(used, size_lon / div, size_lon)
+        lat = np.where(used, lat + y * size_lat, lat)
+        lon = np.where(used, lon + x * size_lon, lon)
+    return np.where(valid, lat + size_lat / 2, np.nan), np.where(valid, lon + size_lon / 2, np.nan)
+
+
+def maidenhead_to_latlon(locator):
+    """
+    Środek pola lokatora Maidenhead (2, 4, 6 lub 8 znaków) jako (lat, lon).
+    Rzuca ValueError dla niepoprawnego lokatora.
+    """
+    lat, lon = maidenhead_decode([locator])
+    if np.isnan(lat[0]):
+        raise ValueError(f"Niepoprawny lokator: {locator}")
+    return float(lat[0]), float(lon[0])
+
+
+def distance_bearing(lat0, lon0, lats, lons):
+    """Odległość [km] i azymut [°] z punktu (lat0, lon0) do wielu punktów naraz (NaN zostaje NaN)."""
+    return haversine(lat0, lon0, lats, lons), bearing(lat0, lon0, lats, lons)
+
+
+class SpatialIndex:
+    """Indeks siatkowy punktów (lat, lon) - zapytania o k najbliższych i o promień."""
+
+    def __init__(self, lats, lons, cell_deg=0.5):
+        lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+        valid = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons))
+        self.cell = cell_deg
+        self.n_lat = int(np.ceil(180.0 / cell_deg))
+        self.n_lon = int(np.ceil(360.0 / cell_deg))
+        ids = self._cell_ids(lats[valid], lons[valid])
+        order = np.argsort(ids, kind="stable")
+        self.ids = valid[order]  # Pozycje punktów w tabeli źródłowej
+        self.lat, self.lon = lats[self.ids], lons[self.ids]
+        # Początek każdej komórki w posortowanych tablicach (CSR)
+        self.offsets = np.searchsorted(ids[order], np.arange(self.n_lat * self.n_lon + 1))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _rows(self, lat):
+        return np.clip(((np.asarray(lat) + 90.0) // self.cell).astype(int), 0, self.n_lat - 1)
+
+    def _cols(self, lon):
+        return (((np.asarray(lon) + 180.0) % 360.0) // self.cell).astype(int) % self.n_lon
+
+    def _cell_ids(self, lats, lons):
+        return self._rows(lats) * self.n_lon + self._cols(lons)
+
+    def _gather(self, r0, r1, col_ranges):
+        """Pozycje (w posortowanych tablicach) punktów z wierszy r0..r1 i zakresów kolumn."""
+        parts = []
+        for row in range(r0, r1 + 1):
+            base = row * self.n_lon
+            for c0, c1 in col_ranges:
+                a, b = self.offsets[base + c0], self.offsets[base + c1 + 1]
+                if b > a:
+                    parts.append(np.arange(a, b))
+        return np.concatenate(parts) if parts else np.array([], dtype=int)
+
+    def _col_ranges(self, lon0, lon1):
+        c0, c1 = int(self._cols(lon0)), int(self._cols(lon1))
+        return [(c0, c1)] if c0 <= c1 else [(c0, self.n_lon - 1), (0, c1)]
+
+    def _candidates(self, lat, lon, radius_km):
+        """Pozycje (w posortowanych tablicach) punktów z komórek pokrywających koło."""
+        dlat = radius_km / KM_PER_DEG
+        r0, r1 = int(self._rows(lat - dlat)), int(self._rows(lat + dlat))
+        # Najszerszy pas długości w tym zakresie szerokości
+        max_lat = min(90.0, max(abs(lat - dlat), abs(lat + dlat)))
+        cos_lat = np.cos(np.radians(max_lat))
+        dlon = 180.0 if cos_lat < 1e-9 or lat + dlat >= 90 or lat - dlat <= -90 else dlat / cos_lat
+        col_ranges = [(0, self.n_lon - 1)] if dlon >= 180.0 else self._col_ranges(lon - dlon, lon + dlon)
+        return self._gather(r0, r1, col_ranges)
+
+    def bbox(self, lat0, lat1, lon0, lon1):
+        """
+        Pozycje (w tabeli źródłowej) punktów w prostokącie lat0..lat1, lon0..lon1.
+        lon0 > lon1 oznacza prostokąt przechodzący przez południk 180°.
+        """
+        full = lon1 - lon0 >= 360
+        col_ranges = [(0, self.n_lon - 1)] if full else self._col_ranges(lon0, lon1)
+        cand = self._gather(int(self._rows(lat0)), int(self._rows(lat1)), col_ranges)
+        lat, lon = self.lat[cand], self.lon[cand]
+        if full:
+            in_lon = np.ones(len(cand), dtype=bool)
+        elif lon0 > lon1:
+            in_lon = (lon >= lon0) | (lon <= lon1)
+        else:
+            in_lon = (lon >= lon0) & (lon <= lon1)
+        return np.sort(self.ids[cand[(lat >= lat0) & (lat <= lat1) & in_lon]])
+
+    def within(self, lat, lon, radius_km):
+        """Punkty w promieniu `radius_km`: (pozycje w tabeli źródłowej, odległości km), rosnąco po odległości."""
+        cand = self._candidates(lat, lon, radius_km)
+        dist = haversine(lat, lon, self.lat[cand], self.lon[cand])
+        keep = dist <= radius_km
+        cand, dist = cand[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")
+        return self.ids[cand[order]], dist[order]
+
+    def nearest(self, lat, lon, k=10, start_km=50.0):
+        """`k` najbliższych punktów: (pozycje w tabeli źródłowej, odległości km), rosnąco."""
+        k = min(k, len(self))
+        radius = start_km
+        while True:
+            ids, dist = self.within(lat, lon, radius)
+            # Wszystkie punkty bliższe niż `radius` są w wyniku, więc k pierwszych jest dokładnych
+            if len(ids) >= k or radius >= np.pi * EARTH_RADIUS_KM:
+                return ids[:k], dist[:k]
+            radius *= 4
+
+
+def viewport(lat, lon, zoom, width_px=900, height_px=500):
+    """
+    Przybliżony prostokąt (lat0, lat1, lon0, lon1) widoczny na mapie kafelkowej
+    (Web Mercator, kafel 256 px) o danym środku i przybliżeniu.
+    """
+    deg_per_px = 360.0 / (256 * 2.0 ** zoom)
+    half_lon = min(180.0, width_px / 2 * deg_per_px)
+    half_lat = height_px / 2 * deg_per_px * np.cos(np.radians(min(abs(lat), 85.0)))
+    lon0, lon1 = lon - half_lon, lon + half_lon
+    if half_lon < 180.0:
+        lon0, lon1 = (lon0 + 180.0) % 360.0 - 180.0, (lon1 + 180.0) % 360.0 - 180.0
+    return max(-90.0, lat - half_lat), min(90.0, lat + half_lat), lon0, lon1
+
+
+def grid_clusters(lats, lons, cell_deg):
+    """
+    Grupowanie punktów w komórki siatki `cell_deg` stopni. Zwraca dla każdej
+    niepustej komórki: średnią lat, średnią lon, liczbę punktów i indeks
+    pierwszego punktu (w tablicach wejściowych).
+    """
+    lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+    n_lon = int(np.ceil(360.0 / cell_deg))
+    cells = np.floor((lats + 90.0) / cell_deg).astype(np.int64) * n_lon + np.floor((lons + 180.0) / cell_deg).astype(np.int64)
+    _, first, inverse, counts = np.unique(cells, return_index=True, return_inverse=True, return_counts=True)
+    return (
+        np.bincount(inverse, weights=lats) / counts,
+        np.bincount(inverse, weights=lons) / counts,
+        counts,
+        first,
+    )
@@ -0,0 +1,394 @@
+"""
+Magazyn logbooka (SQLite w trybie WAL).
+
+- Każdy wpis to jeden INSERT (O(1)) zamiast przepisywania całego pliku CSV.
+- SQLite zapewnia blokady między procesami, więc dwóch operatorów logujących
+  jednocześnie nie nadpisuje sobie wpisów.
+- Sesje nie trzymają kopii logbooka: każde uruchomienie fragmentu zakładki
+  pyta SQLite (`query`) o bieżącą stronę, więc od razu widać też wpisy dodane
+  przez inne sesje.
+- Format CSV zostaje jako format importu/eksportu (`load_logbook` / `save_logbook`),
+  obok ADIF. Eksport i import idą porcjami (`EXPORT_CHUNK` / `IMPORT_BATCH`
+  wierszy), więc pamięć nie rośnie z rozmiarem logu.
+- Odległość i azymut z QTH do stacji (pole lokatora) liczone są dla całego
+  logbooka naraz (`distances`) - wektorowo, bez pętli po wpisach.
+- Filtrowanie (`query`) korzysta z indeksów po paśmie i modulacji, a strony są
+  stronicowane po `id` (keyset). Filtry zakresowe (prefiks znaku, częstotliwość,
+  daty) najpierw przeglądają po id ograniczone okno najnowszych wpisów
+  (`RANGE_SCAN_ROWS`), a po indeksie zakresowym sięgają tylko przy rzadkich
+  trafieniach - czas zapytania nie rośnie razem z logbookiem.
+"""
+import hashlib
+import io
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import adif
+from bandplan import BAND_PLAN, PLAN
+from geo import distance_bearing, maidenhead_decode
+
+LOGBOOK_COLUMNS = ["Data", "Godzina (UTC)", "Freq (MHz)", "Stacja", "Modulacja", "Raport", "Lokator"]
+# Kolumny w bazie odpowiadające LOGBOOK_COLUMNS
+DB_COLUMNS = ["date", "time_utc", "freq", "call", "mode", "report", "grid"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS qso (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT,
+    time_utc TEXT,
+    freq TEXT,
+    call TEXT,
+    mode TEXT,
+    report TEXT,
+    created REAL NOT NULL,
+    grid TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+EXPORT_CHUNK = 5000  # Wierszy na porcję eksportu
+IMPORT_BATCH = 5000  # Wierszy na transakcję importu
+RANGE_SCAN_ROWS = 20_000  # Najnowszych wpisów przeglądanych po id przy filtrze zakresowym
+
+# Kolumny pomocnicze do wyszukiwania (wyliczane przy zapisie z pól tekstowych)
+SEARCH_COLUMNS = {"call_upper": "TEXT", "freq_mhz": "REAL", "band": "TEXT"}
+# Kolumny danych dodane po pierwszej wersji bazy (starsze wpisy dostają wartość domyślną)
+ADDED_COLUMNS = {"grid": "TEXT NOT NULL DEFAULT ''"}
+
+# Indeksy kończą się na `id`, więc przy filtrze równościowym SQLite od razu
+# czyta wiersze w kolejności strony (najnowsze pierwsze) - bez sortowania.
+# Przy zakresie (np. 144-146 MHz) kolejność po id jest tylko w obrębie jednej
+# wartości, więc te indeksy służą do rzadkich trafień (patrz `Logbook.query`).
+INDEXES = """
+CREATE INDEX IF NOT EXISTS qso_call ON qso(call_upper, id);
+CREATE INDEX IF NOT EXISTS qso_freq ON qso(freq_mhz, id);
+CREATE INDEX IF NOT EXISTS qso_band ON qso(band, id);
+CREATE INDEX IF NOT EXISTS qso_mode ON qso(mode, id);
+CREATE INDEX IF NOT EXISTS qso_date ON qso(date, id);
+"""
+
+# Wersja planu pasm, z którą wyliczono kolumnę `band` (zmiana planu = przeliczenie)
+PLAN_KEY = hashlib.sha1(repr([b[:3] for b in BAND_PLAN]).encode()).hexdigest()
+
+
+def parse_freqs(values):
+    """Częstotliwości w MHz z pól tekstowych ("145,500" też) - NaN, gdy nieczytelne."""
+    s = pd.Series(values, dtype=object).fillna("").astype(str).str.strip().str.replace(",", ".", regex=False)
+    return pd.to_numeric(s, errors="coerce").to_numpy(dtype=float)
+
+
+def _search_frame(calls, freqs):
+    """Kolumny SEARCH_COLUMNS dla wielu wpisów naraz (pasma - jednym wywołaniem planu)."""
+    f = parse_freqs(freqs)
+    return pd.DataFrame({
+        "call_upper": pd.Series(calls, dtype=object).fillna("").astype(str).str.strip().str.upper().to_numpy(dtype=object),
+        "freq_mhz": np.where(np.isnan(f), None, f),
+        "band": PLAN.classify(f),
+    })
+
+
+# Pasma z planu, które mają odpowiednik w ADIF (pozostałe nie są amatorskie)
+ADIF_BANDS = {"160m", "80m", "60m", "40m", "30m", "20m", "17m", "15m", "12m", "10m", "6m", "4m", "2m", "70cm", "23cm"}
+# Modulacje zapisywane w ADIF jako SUBMODE danego MODE
+ADIF_SUBMODES = {"DMR": "DIGITALVOICE", "USB": "SSB", "LSB": "SSB"}
+# Filtr modulacji obejmujący też jej odmiany (wstęgę zachowujemy w zapisie dla eksportu ADIF)
+MODE_FAMILIES = {"SSB": ("SSB", "USB", "LSB")}
+
+
+def _adif_fields(row, f, band):
+    """Pola ADIF dla wiersza w kolejności LOGBOOK_COLUMNS (`f` - MHz, `band` - pasmo)."""
+    date, time_utc, freq, call, mode, report, grid = row
+    mode = mode.strip().upper()
+    return {
+        "CALL": call.strip().upper(),
+        "QSO_DATE": date.replace("-", ""),
+        "TIME_ON": time_utc.replace(":", ""),
+        "FREQ": f"{f:.6f}".rstrip("0").rstrip(".") if np.isfinite(f) else "",
+        "BAND": band if band in ADIF_BANDS else "",
+        "MODE": ADIF_SUBMODES.get(mode, mode),
+        "SUBMODE": mode if mode in ADIF_SUBMODES else "",
+        "RST_RCVD": report,
+        "GRIDSQUARE": grid.strip(),
+    }
+
+
+def _from_adif(rec):
+    """Wiersz logbooka (krotka w kolejności LOGBOOK_COLUMNS) z rekordu ADIF."""
+    date, t = rec.get("QSO_DATE", ""), rec.get("TIME_ON", "")
+    if len(date) == 8 and date.isdigit():
+        date = f"{date[:4]}-{date[4:6]}-{date[6:]}"
+    if len(t) >= 4 and t.isdigit():
+        t = f"{t[:2]}:{t[2:4]}"
+    sub = rec.get("SUBMODE", "").upper()
+    mode = sub if sub in ADIF_SUBMODES else rec.get("MODE", "").upper()
+    report = rec.get("RST_RCVD") or rec.get("RST_SENT", "")
+    return (date, t, rec.get("FREQ", ""), rec.get("CALL", ""), mode, report, rec.get("GRIDSQUARE", ""))
+
+
+def load_logbook(path):
+    """Wczytuje logbook z pliku CSV lub zwraca pusty, jeśli plik nie istnieje."""
+    if os.path.exists(path):
+        return pd.read_csv(path, dtype=str, keep_default_na=False)
+    else:
+        return pd.DataFrame(columns=LOGBOOK_COLUMNS)
+
+
+def save_logbook(df, path):
+    """Zapisuje logbook do pliku CSV."""
+    df.to_csv(path, index=False)
+
+
+_INSERT = (
+    f"INSERT INTO qso ({', '.join(DB_COLUMNS)}, {', '.join(SEARCH_COLUMNS)}, created) "
+    f"VALUES ({', '.join('?' * (len(DB_COLUMNS) + len(SEARCH_COLUMNS) + 1))})"
+)
+
+
+def _insert_rows(df, now):
+    """Krotki do `_INSERT` dla DataFrame z kolumnami LOGBOOK_COLUMNS (tekst)."""
+    search = _search_frame(df["Stacja"], df["Freq (MHz)"])
+    rows = pd.concat([df[LOGBOOK_COLUMNS].reset_index(drop=True), search], axis=1).assign(created=now)
+    return rows.itertuples(index=False, name=None)
+
+
+def _select(db, where, args, limit):
+    """Wiersze (id + DB_COLUMNS) spełniające `where`, od najnowszych, najwyżej `limit`."""
+    sql = f"SELECT id, {', '.join(DB_COLUMNS)} FROM qso WHERE {' AND '.join(where)} ORDER BY id DESC LIMIT ?"
+    return db.execute(sql, args + [int(limit)]).fetchall()
+
+
+class Logbook:
+    """Logbook w pliku SQLite, współdzielony przez wszystkie sesje i procesy."""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+            self._upgrade(db)
+            db.executescript(INDEXES)
+            db.execute("PRAGMA optimize")
+
+    @staticmethod
+    def _upgrade(db):
+        """
+        Dodaje nowe kolumny (danych i wyszukiwania) do starszej bazy i (także po
+        zmianie planu pasm) wylicza kolumny wyszukiwania dla istniejących wpisów.
+        """
+        have = {row[1] for row in db.execute("PRAGMA table_info(qso)")}
+        for col, kind in {**ADDED_COLUMNS, **SEARCH_COLUMNS}.items():
+            if col not in have:
+                db.execute(f"ALTER TABLE qso ADD COLUMN {col} {kind}")
+        row = db.execute("SELECT value FROM meta WHERE key = 'band_plan'").fetchone()
+        if row is not None and row[0] == PLAN_KEY:
+            return
+        old = pd.read_sql_query("SELECT id, call, freq FROM qso", db)
+        search = _search_frame(old["call"], old["freq"]).assign(id=old["id"].to_numpy())
+        db.executemany(
+            "UPDATE qso SET call_upper = ?, freq_mhz = ?, band = ? WHERE id = ?",
+            search.itertuples(index=False, name=None),
+        )
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('band_plan', ?)", (PLAN_KEY,))
+
+    @contextmanager
+    def _connect(self):
+        """Połączenie w transakcji - zatwierdzane na końcu bloku i zawsze zamykane."""
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def append(self, entry):
+        """Dodaje jeden wpis (dict z kluczami LOGBOOK_COLUMNS). Zwraca jego id."""
+        values = [str(entry.get(c, "")) for c in LOGBOOK_COLUMNS]
+        with self._connect() as db:
+            cur = db.execute(_INSERT, next(_insert_rows(pd.DataFrame([values], columns=LOGBOOK_COLUMNS), time.time())))
+            return cur.lastrowid
+
+    def append_many(self, df):
+        """Dodaje wiele wpisów w jednej transakcji (import). Zwraca liczbę wierszy."""
+        return self._append_batches([df])
+
+    def _append_batches(self, batches):
+        """
+        Dodaje wpisy z iteratora DataFrame'ów - każda porcja w osobnej transakcji,
+        więc import dużego logu nie trzyma całości w pamięci. Zwraca liczbę wierszy.
+        """
+        total, now = 0, time.time()
+        with self._connect() as db:
+            for df in batches:
+                df = df.reindex(columns=LOGBOOK_COLUMNS).fillna("").astype(str)
+                db.executemany(_INSERT, _insert_rows(df, now))
+                db.commit()
+                total += len(df)
+            # Statystyki rozkładu wartości - planista wybiera wtedy najwęższy indeks
+            db.execute("ANALYZE qso")
+        return total
+
+    def query(self, call=None, freq_min=None, freq_max=None, band=None, mode=None,
+              date_from=None, date_to=None, before_id=None, limit=50):
+        """
+        Jedna strona wpisów pasujących do filtrów, od najnowszych.
+
+        `call` to początek znaku (bez rozróżniania wielkości liter), `freq_min`/
+        `freq_max` zakres w MHz, `date_from`/`date_to` daty "RRRR-MM-DD" (włącznie),
+        `mode` obejmuje odmiany z MODE_FAMILIES ("SSB" - także USB i LSB).
+        Stronicowanie po id: kolejną stronę daje `before_id` = zwrócony kursor.
+        Zwraca (DataFrame z indeksem id, kursor następnej strony lub None).
+        """
+        where, args = [], []
+        # Warunki zakresowe (kolumna, operator, wartość) - osobno, patrz niżej
+        ranges = []
+        if call:
+            p = str(call).strip().upper()
+            ranges += [("call_upper", ">=", p), ("call_upper", "<", p + "\uffff")]
+        if freq_min is not None:
+            ranges.append(("freq_mhz", ">=", float(freq_min)))
+        if freq_max is not None:
+            ranges.append(("freq_mhz", "<=", float(freq_max)))
+        if band:
+            where.append("band = ?")
+            args.append(band)
+        if mode:
+            modes = MODE_FAMILIES.get(mode, (mode,))
+            where.append(f"mode IN ({', '.join('?' * len(modes))})")
+            args += modes
+        if date_from:
+            ranges.append(("date", ">=", str(date_from)))
+        if date_to:
+            ranges.append(("date", "<=", str(date_to)))
+        range_args = [v for _, _, v in ranges]
+
+        # Jeden wiersz więcej niż strona - żeby wiedzieć, czy jest następna
+        want = int(limit) + 1
+        with self._connect() as db:
+            if before_id is None:
+                top = (db.execute("SELECT MAX(id) FROM qso").fetchone()[0] or 0) + 1
+            else:
+                top = int(before_id)
+            if not ranges:
+                rows = _select(db, where + ["id < ?"], args + [top], want)
+            else:
+                # Zakres z indeksu (np. 144-146 MHz) trzeba by posortować po id w całości.
+                # Najpierw ograniczony przegląd RANGE_SCAN_ROWS najnowszych wpisów po id
+                # (`+kolumna` wyłącza indeks zakresowy) - przy częstych trafieniach strona
+                # jest pełna i koszt nie zależy od rozmiaru logbooka.
+                low = max(top - RANGE_SCAN_ROWS, 0)
+                scan = [f"+{col} {op} ?" for col, op, _ in ranges] + ["id < ?", "id >= ?"]
+                rows = _select(db, where + scan, args + range_args + [top, low], want)
+                if len(rows) < want and low > 0:
+                    # Trafienia rzadsze niż strona na RANGE_SCAN_ROWS wpisów - reszta z indeksu
+                    # zakresowego, który zwraca wtedy niewiele wierszy do posortowania
+                    # (`+id` - żeby planista nie wybrał znów przeglądu wszystkich id)
+                    rest = [f"{col} {op} ?" for col, op, _ in ranges] + ["+id < ?"]
+                    rows += _select(db, where + rest, args + range_args + [low], want - len(rows))
+        more = len(rows) > limit
+        df = pd.DataFrame(rows[:limit], columns=["id"] + LOGBOOK_COLUMNS).set_index("id")
+        return df, (int(df.index[-1]) if more else None)
+
+    def distances(self, lat, lon):
+        """
+        Odległość [km] i azymut [°] z punktu (lat, lon) do każdej stacji z lokatorem -
+        jedno zapytanie i jedno wektorowe przeliczenie dla całego logbooka.
+        Zwraca DataFrame z indeksem id (kolumny: Stacja, Lokator, Odległość (km), Azymut (°)).
+        """
+        with self._connect() as db:
+            rows = db.execute("SELECT id, call, grid FROM qso WHERE grid != '' ORDER BY id").fetchall()
+        df = pd.DataFrame(rows, columns=["id", "Stacja", "Lokator"]).set_index("id")
+        g_lat, g_lon = maidenhead_decode(df["Lokator"])
+        dist, az = distance_bearing(lat, lon, g_lat, g_lon)
+        return df.assign(**{"Odległość (km)": dist, "Azymut (°)": az})
+
+    def __len__(self):
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM qso").fetchone()[0]
+
+    def iter_chunks(self, chunk_rows=EXPORT_CHUNK):
+        """Cały logbook porcjami (DataFrame po `chunk_rows` wierszy, rosnąco po id)."""
+        last_id = 0
+        while True:
+            with self._connect() as db:
+                rows = db.execute(
+                    f"SELECT id, {', '.join(DB_COLUMNS)} FROM qso WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, chunk_rows),
+                ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield pd.DataFrame([r[1:] for r in rows], columns=LOGBOOK_COLUMNS)
+
+    def iter_export(self, fmt="csv", chunk_rows=EXPORT_CHUNK):
+        """Eksport jako kolejne fragmenty tekstu - "csv" (jak radio_logbook.csv) lub "adif"."""
+        if fmt == "csv":
+            yield pd.DataFrame(columns=LOGBOOK_COLUMNS).to_csv(index=False)
+            for chunk in self.iter_chunks(chunk_rows):
+                yield chunk.to_csv(index=False, header=False)
+        elif fmt == "adif":
+            yield adif.header()
+            for chunk in self.iter_chunks(chunk_rows):
+                freqs = parse_freqs(chunk["Freq (MHz)"])
+                rows = zip(chunk.itertuples(index=False, name=None), freqs, PLAN.classify(freqs))
+                yield "".join(adif.record(_adif_fields(row, f, band)) for row, f, band in rows)
+        else:
+            raise ValueError(f"Nieznany format eksportu: {fmt}")
+
+    def export(self, target, fmt="csv"):
+        """Zapisuje eksport porcjami do pliku (ścieżka lub plik binarny)."""
+        if isinstance(target, (str, os.PathLike)):
+            with open(target, "wb") as f:
+                return self.export(f, fmt)
+        for part in self.iter_export(fmt):
+            target.write(part.encode("utf-8"))
+
+    def export_bytes(self, fmt="csv"):
+        """Eksport w pamięci (BytesIO) - do `st.download_button` wywoływanego dopiero po kliknięciu."""
+        buf = io.BytesIO()
+        self.export(buf, fmt)
+        buf.seek(0)
+        return buf
+
+    def import_csv(self, source, batch_rows=IMPORT_BATCH):
+        """Importuje logbook w formacie CSV (ścieżka lub plik) porcjami. Zwraca liczbę wierszy."""
+        chunks = pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=batch_rows)
+        return self._append_batches(chunks)
+
+    def import_adif(self, source, batch_rows=IMPORT_BATCH):
+        """Importuje plik ADIF (ścieżka lub plik) porcjami. Zwraca liczbę wierszy."""
+        def batches():
+            rows = []
+            for rec in adif.iter_records(source):
+                rows.append(_from_adif(rec))
+                if len(rows) >= batch_rows:
+                    yield pd.DataFrame(rows, columns=LOGBOOK_COLUMNS)
+                    rows = []
+            if rows:
+                yield pd.DataFrame(rows, columns=LOGBOOK_COLUMNS)
+        return self._append_batches(batches())
+
+    def migrate_csv(self, path):
+        """
+        Jednorazowy import starego pliku CSV przy pierwszym uruchomieniu.
+        Zwraca liczbę zaimportowanych wierszy (0, jeśli już zrobione lub brak pliku).
+        """
+        if not os.path.exists(path):
+            return 0
+        with self._connect() as db:
+            # INSERT OR IGNORE działa jak blokada: tylko jeden proces "wygrywa" migrację
+            cur = db.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('migrated_csv', ?)", (path,))
+            if cur.rowcount == 0:
+                return 0
+            df = load_logbook(path).reindex(columns=LOGBOOK_COLUMNS).fillna("").astype(str)
+            now = time.time()
+            db.executemany(_INSERT, _insert_rows(df, now))
+        return len(df)
@@ -0,0 +1,292 @@
+"""
+Metryki aplikacji: liczniki i histogramy czasów wykonania.
+
+- `incr()` i `observe()` zmieniają tylko słowniki w pamięci pod jednym zamkiem -
+  ścieżka strony nie dotyka dysku.
+- Liczniki są trwałe: wątek w tle co `flush_interval` sekund dopisuje zebrane
+  przyrosty do bazy SQLite jednym `INSERT ... ON CONFLICT DO UPDATE SET
+  value = value + ?` (tryb WAL, jak magazyn TLE), więc kilka procesów
+  Streamlit może liczyć równocześnie i żaden przyrost nie ginie.
+- Histogramy mają stałe przedziały (jak w Prometheusie): pomiar to `bisect`
+  i zwiększenie licznika, pamięć nie rośnie z liczbą pomiarów. Dotyczą tylko
+  bieżącego procesu i nie są zapisywane.
+- `prometheus()` zwraca wszystko w formacie tekstowym Prometheusa, a `serve()`
+  wystawia go pod /metrics na osobnym porcie.
+"""
+import bisect
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger(__name__)
+
+# Górne granice przedziałów histogramów [s]
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS counter (
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (name, labels)
+);
+"""
+
+
+def _labels(labels):
+    """Etykiety jako tekst w składni Prometheusa: a="x",b="y" (posortowane)."""
+    return ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in sorted(labels.items())
+    )
+
+
+def _series(name, labels, extra=""):
+    inner = ",".join(p for p in (labels, extra) if p)
+    return f"{name}{{{inner}}}" if inner else name
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)  # Ostatni przedział: powyżej największej granicy
+        self.sum = 0.0
+        self.count = 0
+
+
+class Metrics:
+    """
+    Rejestr liczników i histogramów. Obiekt jest wspólny dla wszystkich sesji
+    (wątków) procesu; `path=None` - liczniki tylko w pamięci.
+    """
+
+    def __init__(self, path=None, flush_interval=30, buckets=LATENCY_BUCKETS):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._totals = {}  # (nazwa, etykiety) -> wartość z bazy przy ostatnim zapisie
+        self._pending = {}  # (nazwa, etykiety) -> przyrost jeszcze niezapisany
+        self._histograms = {}
+        self._stop = threading.Event()
+        self._thread = None
+        if path is not None:
+            with self._connect() as db:
+                db.executescript(SCHEMA)
+            self._totals = self._read()
+
+    @contextmanager
+    def _connect(self):
+        """Połączenie w transakcji - zatwierdzane na końcu bloku i zawsze zamykane."""
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _read(self):
+        with self._connect() as db:
+            return {(n, l): v for n, l, v in db.execute("SELECT name, labels, value FROM counter")}
+
+    # --- Zapis pomiarów ---
+
+    def incr(self, name, n=1, **labels):
+        """Zwiększa licznik `name` (z etykietami) o `n`."""
+        key = (name, _labels(labels))
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + n
+
+    def observe(self, name, seconds, **labels):
+        """Dodaje pomiar czasu [s] do histogramu `name`."""
+        key = (name, _labels(labels))
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = _Histogram(self.buckets)
+            h.counts[i] += 1
+            h.sum += seconds
+            h.count += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Mierzy czas bloku `with` i zapisuje go w histogramie `name` (także przy wyjątku)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def migrate_counter_file(self, path, name):
+        """
+        Jednorazowe przeniesienie starego licznika z pliku tekstowego do licznika `name`.
+        Zwraca przeniesioną wartość (0, jeśli licznik już istnieje, pliku brak albo jest nieczytelny).
+        """
+        try:
+            with open(path) as f:
+                value = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+        key = (name, "")
+        if self.path is None:
+            with self._lock:
+                if key in self._totals or key in self._pending:
+                    return 0
+                self._totals[key] = value
+            return value
+        with self._connect() as db:
+            # INSERT OR IGNORE działa jak blokada: tylko jeden proces przenosi licznik
+            cur = db.execute("INSERT OR IGNORE INTO counter (name, labels, value) VALUES (?, '', ?)", (name, value))
+        if cur.rowcount == 0:
+            return 0
+        with self._lock:
+            self._totals[key] = self._totals.get(key, 0) + value
+        return value
+
+    # --- Odczyt ---
+
+    def total(self, name, **labels):
+        """Wartość licznika: stan bazy przy ostatnim zapisie + niezapisane przyrosty tego procesu."""
+        key = (name, _labels(labels))
+        with self._lock:
+            return self._totals.get(key, 0) + self._pending.get(key, 0)
+
+    def counters(self):
+        """Wszystkie liczniki jako lista (nazwa, etykiety, wartość), posortowana."""
+        with self._lock:
+            keys = set(self._totals) | set(self._pending)
+            return sorted((n, l, self._totals.get((n, l), 0) + self._pending.get((n, l), 0)) for n, l in keys)
+
+    def _quantile(self, counts, count, q):
+        """Przybliżony kwantyl - górna granica przedziału, w którym wypada (None powyżej ostatniej)."""
+        rank, seen = q * count, 0
+        for bound, c in zip(self.buckets + (None,), counts):
+            seen += c
+            if seen >= rank:
+                return bound
+        return None
+
+    def histograms(self):
+        """
+        Podsumowanie histogramów: lista słowników z nazwą, etykietami, liczbą
+        pomiarów, średnią i przybliżonymi p50/p95/p99 [s].
+        """
+        with self._lock:
+            items = sorted((k, list(h.counts), h.sum, h.count) for k, h in self._histograms.items())
+        rows = []
+        for (name, labels), counts, total, count in items:
+            rows.append({
+                "name": name, "labels": labels, "count": count,
+                "mean": total / count if count else None,
+                "p50": self._quantile(counts, count, 0.50),
+                "p95": self._quantile(counts, count, 0.95),
+                "p99": self._quantile(counts, count, 0.99),
+            })
+        return rows
+
+    def prometheus(self):
+        """Wszystkie metryki w formacie tekstowym Prometheusa (wersja 0.0.4)."""
+        lines = []
+        by_name = {}
+        for name, labels, value in self.counters():
+            by_name.setdefault(name, []).append((labels, value))
+        for name, series in by_name.items():
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f"{_series(name, labels)} {value}" for labels, value in series)
+
+        with self._lock:
+            hists = sorted((k, list(h.counts), h.sum, h.count) for k, h in self._histograms.items())
+        bounds = ['le="{:g}"'.format(b) for b in self.buckets]
+        typed = set()
+        for (name, labels), counts, total, count in hists:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for le, c in zip(bounds, counts):
+                cumulative += c
+                lines.append(f"{_series(name + '_bucket', labels, le)} {cumulative}")
+            lines.append("{} {}".format(_series(name + "_bucket", labels, 'le="+Inf"'), count))
+            lines.append(f"{_series(name + '_sum', labels)} {total:.6f}")
+            lines.append(f"{_series(name + '_count', labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    # --- Zapis na dysk ---
+
+    def flush(self):
+        """
+        Dopisuje zebrane przyrosty liczników do bazy (jedna transakcja) i odczytuje
+        aktualne sumy - także z innych procesów. Zwraca liczbę zapisanych liczników.
+        """
+        if self.path is None:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            try:
+                if pending:
+                    with self._connect() as db:
+                        db.executemany(
+                            "INSERT INTO counter (name, labels, value) VALUES (?, ?, ?) "
+                            "ON CONFLICT(name, labels) DO UPDATE SET value = value + excluded.value",
+                            [(n, l, v) for (n, l), v in pending.items()],
+                        )
+                totals = self._read()
+            except sqlite3.Error as exc:
+                # Baza niedostępna - przyrosty wracają do kolejki na następną próbę
+                log.warning("Zapis metryk nie powiódł się: %s", exc)
+                with self._lock:
+                    for key, v in pending.items():
+                        self._pending[key] = self._pending.get(key, 0) + v
+                return 0
+            with self._lock:
+                self._totals = totals
+            return len(pending)
+
+    def start(self):
+        """Uruchamia wątek zapisujący liczniki co `flush_interval` sekund."""
+        if self.path is not None and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="metrics-flush", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Zatrzymuje wątek i zapisuje ostatnie przyrosty."""
+        self._stop.set()
+        self.flush()
+
+    def _loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    # --- Endpoint do scrapowania ---
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serwer HTTP w wątku w tle: GET /metrics zwraca `prometheus()`. Zwraca obiekt serwera."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
@@ -0,0 +1,224 @@
+"""
+Równoległa propagacja dużych katalogów (np. CelesTrak "active", 10k+ obiektów)
+w długich oknach czasu.
+
+- Praca jest dzielona na bloki (satelity x przedział czasu) i rozsyłana do puli
+  procesów (`ProcessPoolExecutor`, start "spawn" - bezpieczny w procesie
+  Streamlit z wątkami). Zadanie to tylko linie TLE bloku i jego epoki.
+- Wyniki nie wracają przez pickle: każdy proces zapisuje swój blok wprost do
+  wspólnej tablicy .npy otwartej jako memmap (lat, lon, wysokość w float32,
+  NaN przy błędzie propagacji), a proces główny dostaje tylko liczbę pozycji.
+- Plik wyniku jest zarazem cache na dysku. Nazwa to skrót z numerów NORAD,
+  epok TLE i siatki czasu, więc nowe TLE (nowa epoka) daje nowy plik,
+  a wynik dla tych samych danych jest tylko mapowany z dysku. Najstarsze pliki
+  są usuwane, gdy cache przekroczy `max_bytes`.
+- Małe zadania (poniżej `min_positions` pozycji) liczone są od razu w bieżącym
+  procesie - start puli i zapis na dysk kosztowałyby więcej niż sama propagacja.
+- `python parallel.py [satelity]` mierzy skalowanie z liczbą procesów
+  (`measure_scaling`); w benchmarks.py pula ma pomiar `propagation.pool`
+  na maszynach z więcej niż jednym rdzeniem.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+from sgp4.api import Satrec, SatrecArray
+
+from satellites import propagate_epochs, teme_to_geodetic
+
+log = logging.getLogger(__name__)
+
+SAT_BLOCK = 1024  # Satelitów w jednym zadaniu
+BLOCK_POSITIONS = 2_000_000  # Pozycji (satelity x epoki) w jednym zadaniu
+MIN_PARALLEL_POSITIONS = 1_000_000  # Poniżej - w bieżącym procesie, bez cache
+CACHE_MAX_BYTES = 2 * 1024**3
+CACHE_FORMAT = "geodetic-f32-v1"  # Zmiana formatu pliku = nowe klucze cache
+
+
+def _geodetic(lines, epochs, precise):
+    """(satelity, epoki, 3) float32: lat, lon, wysokość; NaN przy błędzie propagacji."""
+    sats = SatrecArray([Satrec.twoline2rv(l1, l2) for l1, l2 in lines])
+    e, r, _ = propagate_epochs(sats, epochs)
+    out = np.stack(teme_to_geodetic(r, epochs, precise), axis=-1).astype(np.float32)
+    out[(e != 0) | ~np.isfinite(out[..., 2])] = np.nan
+    return out
+
+
+def _propagate_block(path, lines, sat_start, t_start, epochs, precise):
+    """Zadanie procesu roboczego: propaguje blok i zapisuje go w pliku wyniku."""
+    out = np.load(path, mmap_mode="r+")
+    out[sat_start:sat_start + len(lines), t_start:t_start + len(epochs)] = _geodetic(lines, epochs, precise)
+    out.flush()
+    return len(lines) * len(epochs)
+
+
+def _blocks(n_sats, n_epochs, sat_block=SAT_BLOCK, block_positions=BLOCK_POSITIONS):
+    """Podział na bloki: (początek, koniec) satelitów x (początek, koniec) epok."""
+    t_block = max(1, block_positions // max(1, min(n_sats, sat_block)))
+    return [
+        ((s, min(s + sat_block, n_sats)), (t, min(t + t_block, n_epochs)))
+        for s in range(0, n_sats, sat_block) for t in range(0, n_epochs, t_block)
+    ]
+
+
+class Propagator:
+    """
+    Propagacja katalogu dla siatki epok w puli `workers` procesów, z wynikami
+    w plikach .npy w `cache_dir`. Obiekt jest wspólny dla sesji (wątków) procesu;
+    pula startuje przy pierwszym dużym zadaniu. `workers=None` - liczba rdzeni.
+    """
+
+    def __init__(self, cache_dir, workers=None, min_positions=MIN_PARALLEL_POSITIONS,
+                 max_bytes=CACHE_MAX_BYTES, mp_context="spawn"):
+        self.cache_dir = cache_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.min_positions = min_positions
+        self.max_bytes = max_bytes
+        self.mp_context = mp_context
+        self._pool = None
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(self.mp_context))
+            return self._pool
+
+    def start(self):
+        """Uruchamia od razu wszystkie procesy puli (zwykle startują przy pierwszym dużym zadaniu)."""
+        if self.workers > 1:
+            pool = self._executor()
+            for future in [pool.submit(os.getpid) for _ in range(self.workers)]:
+                future.result()
+        return self
+
+    def close(self):
+        """Zamyka pulę procesów (pliki cache zostają)."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def key(catalog, idx, epochs, precise=False):
+        """Klucz cache: numery NORAD i epoki TLE satelitów, siatka czasu i format wyniku."""
+        h = hashlib.sha1(CACHE_FORMAT.encode())
+        sats = [catalog.satrecs[i] for i in idx]
+        h.update(np.array([s.satnum for s in sats], dtype=np.int64).tobytes())
+        h.update(np.array([s.jdsatepoch + s.jdsatepochF for s in sats], dtype=np.float64).tobytes())
+        h.update(np.asarray(epochs, dtype="datetime64[us]").view(np.int64).tobytes())
+        h.update(b"precise" if precise else b"fast")
+        return h.hexdigest()
+
+    def geodetic(self, catalog, epochs, idx=None, precise=False, cache=True):
+        """
+        Pozycje satelitów `idx` (wszystkich, gdy None) z katalogu dla tablicy
+        epok `epochs`: tablica (satelity, epoki, 3) float32 - lat, lon, wysokość_km,
+        NaN przy błędzie propagacji. Duże wyniki to memmap tylko do odczytu
+        z pliku cache; `cache=False` liczy od nowa i zwraca tablicę w pamięci.
+        """
+        idx = np.arange(len(catalog)) if idx is None else np.asarray(idx, dtype=np.int64)
+        epochs = np.asarray(epochs, dtype="datetime64[us]")
+        lines = [catalog.lines[i] for i in idx]
+        if len(lines) * len(epochs) < self.min_positions:
+            return _geodetic(lines, epochs, precise) if len(lines) else np.empty((0, len(epochs), 3), np.float32)
+
+        path = os.path.join(self.cache_dir, self.key(catalog, idx, epochs, precise) + ".npy")
+        if cache and os.path.exists(path):
+            os.utime(path)  # Kolejność usuwania: najdawniej używane
+            return np.load(path, mmap_mode="r")
+
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        open_memmap(tmp, mode="w+", dtype=np.float32, shape=(len(lines), len(epochs), 3)).flush()
+        tasks = [
+            (tmp, lines[s0:s1], s0, t0, epochs[t0:t1], precise)
+            for (s0, s1), (t0, t1) in _blocks(len(lines), len(epochs))
+        ]
+        try:
+            if self.workers <= 1:
+                for task in tasks:
+                    _propagate_block(*task)
+            else:
+                pool = self._executor()
+                for future in [pool.submit(_propagate_block, *task) for task in tasks]:
+                    future.result()
+            if not cache:
+                return np.load(tmp)
+            os.replace(tmp, path)  # Atomowo - inne procesy nie zobaczą niepełnego pliku
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self._evict(keep=path)
+        return np.load(path, mmap_mode="r")
+
+    def _evict(self, keep=None):
+        """Usuwa najdawniej używane pliki, dopóki cache przekracza `max_bytes`."""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            p = os.path.join(self.cache_dir, name)
+            if name.endswith(".npy") and p != keep:
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in files) + (os.path.getsize(keep) if keep else 0)
+        for _, size, p in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(p)
+                total -= size
+            except OSError as exc:
+                log.warning("Nie udało się usunąć %s: %s", p, exc)
+
+
+def measure_scaling(catalog, epochs, cache_dir, workers=None, repeat=3):
+    """
+    Czas propagacji (bez cache) dla 1, 2, 4, ... procesów aż do `workers`
+    (domyślnie liczba rdzeni). Start puli nie wlicza się do pomiaru.
+    Zwraca DataFrame: Procesy, Czas (s), Pozycje/s, Przyspieszenie.
+    """
+    top = workers or os.cpu_count() or 1
+    counts = sorted({1, top} | {2**k for k in range(1, top.bit_length()) if 2**k < top})
+    rows = []
+    for n in counts:
+        prop = Propagator(cache_dir, workers=n, min_positions=0).start()
+        try:
+            times = []
+            for _ in range(repeat):
+                t = time.perf_counter()
+                prop.geodetic(catalog, epochs, cache=False)
+                times.append(time.perf_counter() - t)
+        finally:
+            prop.close()
+        rows.append((n, min(times)))
+    df = pd.DataFrame(rows, columns=["Procesy", "Czas (s)"])
+    df["Pozycje/s"] = (len(catalog) * len(epochs) / df["Czas (s)"]).round(0)
+    df["Przyspieszenie"] = (df["Czas (s)"].iloc[0] / df["Czas (s)"]).round(2)
+    return df
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    from datetime import datetime, timezone
+
+    from benchmarks import synthetic_tle
+    from satellites import SatelliteCatalog, parse_tle, to_epochs
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    catalog = SatelliteCatalog(parse_tle(synthetic_tle(n)))
+    # 24 h co 30 s
+    epochs = to_epochs(datetime.now(timezone.utc)) + np.arange(2881) * np.timedelta64(30, "s")
+    with tempfile.TemporaryDirectory(prefix="radio-propagation-") as tmp:
+        print(f"{len(catalog)} satelitów x {len(epochs)} epok, rdzeni: {os.cpu_count()}")
+        print(measure_scaling(catalog, epochs, tmp).to_string(index=False))
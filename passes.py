@@ -0,0 +1,281 @@
+"""
+Przewidywanie przelotów satelitów (AOS / kulminacja / LOS) nad QTH obserwatora.
+
+Algorytm:
+1. Zgrubny, zwektoryzowany skan elewacji z krokiem ~1/8 okresu orbity.
+   Razem z elewacją liczymy jej pochodną (z wektora prędkości SGP4), więc
+   każde maksimum elewacji jest zamknięte w przedziale, w którym pochodna
+   zmienia znak z + na -.
+2. Dokładne czasy wyznaczamy metodą regula falsi (Anderson-Björck) - jednocześnie
+   dla wszystkich przedziałów wszystkich satelitów.
+3. Wyniki są cache'owane per (epoka TLE, obserwator, okno czasowe).
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from satellites import to_epochs, epochs_to_jd, teme_to_ecef, observer_ecef, WGS84_A
+
+# Krok zgrubnego skanu jako ułamek okresu orbity (w sekundach: 60 s - 15 min)
+COARSE_FRACTION = 1 / 8
+COARSE_MIN_STEP = 60.0
+COARSE_MAX_STEP = 900.0
+# Iteracje metody regula falsi (Anderson-Björck) - dokładność czasów AOS/LOS ~1-2 s
+ROOT_STEPS = 8
+
+PASS_COLUMNS = ["NORAD", "Nazwa", "AOS", "Kulminacja", "LOS", "Max el (°)", "Az AOS (°)", "Az LOS (°)", "Czas (min)"]
+
+_CACHE_SIZE = 4096
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class _Group:
+    """
+    Przedziały czasu pogrupowane po satelitach (`owner` jest posortowany),
+    dzięki czemu propagacja to jedno wywołanie `sgp4_array` na satelitę.
+    """
+
+    def __init__(self, sats, owner):
+        self.sats = sats
+        self.owner = owner
+        bounds = np.searchsorted(owner, np.arange(len(sats) + 1))
+        self.slices = [(sats[i], slice(bounds[i], bounds[i+1]))
+                       for i in range(len(sats)) if bounds[i] < bounds[i+1]]
+
+    def subset(self, mask):
+        return _Group(self.sats, self.owner[mask])
+
+    def propagate(self, jd0, fr0, t):
+        """Pozycje i prędkości TEME dla czasów `t` (sekundy od epoki bazowej)."""
+        jd = np.full(len(t), jd0)
+        fr = fr0 + t / 86400.0
+        r = np.empty((len(t), 3))
+        v = np.empty((len(t), 3))
+        for sat, sl in self.slices:
+            e, r[sl], v[sl] = sat.sgp4_array(jd[sl], fr[sl])
+            if e.any():
+                r[sl][e != 0] = np.nan
+        return r, v
+
+
+def _elevation(r, v, jd0, fr0, t, obs, enu):
+    """
+    Zwraca (sin elewacji, pochodna sin elewacji [1/s], wektor do satelity ENU,
+    położenie ECEF, prędkość ECEF) dla pozycji TEME obliczonych w chwilach `t`.
+    """
+    r_ecef, v_ecef = teme_to_ecef(r, v, jd0, fr0 + t / 86400.0)
+    rho = r_ecef - obs
+    dist = np.sqrt(np.einsum("...i,...i->...", rho, rho))
+    local = rho @ enu.T
+    sin_el = local[..., 2] / dist
+    range_rate = np.einsum("...i,...i->...", rho, v_ecef) / dist
+    d_sin_el = (v_ecef @ enu[2] - sin_el * range_rate) / dist
+    return sin_el, d_sin_el, local, r_ecef, v_ecef
+
+
+def _azimuth(local):
+    return np.degrees(np.arctan2(local[..., 0], local[..., 1])) % 360
+
+
+def _regula_falsi(evaluate, lo, hi, f_lo, f_hi, safeguard=False):
+    """
+    Zwektoryzowana regula falsi (modyfikacja Andersona-Björcka) - szuka zera
+    funkcji jednocześnie we wszystkich przedziałach [lo, hi], w których zmienia
+    ona znak. Z `safeguard=True` krok, który nie zawęził przedziału co najmniej
+    o połowę, jest zastępowany bisekcją (dla funkcji o ostrym przebiegu).
+    """
+    side = np.zeros(len(lo), dtype=np.int8)
+    slow = np.zeros(len(lo), dtype=bool)
+    for _ in range(ROOT_STEPS):
+        width = np.abs(hi - lo)
+        denom = f_hi - f_lo
+        x = np.where(denom != 0, hi - f_hi * (hi - lo) / np.where(denom != 0, denom, 1), 0.5 * (lo + hi))
+        x = np.where(slow | ~np.isfinite(x), 0.5 * (lo + hi), np.clip(x, np.minimum(lo, hi), np.maximum(lo, hi)))
+        fx = evaluate(x)
+        to_hi = np.sign(fx) == np.sign(f_hi)
+        # Modyfikacja Andersona-Björcka: skalowanie końca, który się nie przesuwa
+        m_hi = 1 - fx / np.where(f_hi != 0, f_hi, 1)
+        m_lo = 1 - fx / np.where(f_lo != 0, f_lo, 1)
+        f_lo = np.where(to_hi & (side == -1), np.where(m_hi > 0, m_hi, 0.5) * f_lo, f_lo)
+        f_hi = np.where(~to_hi & (side == 1), np.where(m_lo > 0, m_lo, 0.5) * f_hi, f_hi)
+        hi, f_hi = np.where(to_hi, x, hi), np.where(to_hi, fx, f_hi)
+        lo, f_lo = np.where(to_hi, lo, x), np.where(to_hi, f_lo, fx)
+        side = np.where(to_hi, -1, 1).astype(np.int8)
+        slow = safeguard & (np.abs(hi - lo) > 0.5 * width)
+    # Interpolacja liniowa w końcowym (wąskim) przedziale
+    denom = f_hi - f_lo
+    return np.where(denom != 0, hi - f_hi * (hi - lo) / np.where(denom != 0, denom, 1), 0.5 * (lo + hi))
+
+
+def _scan(sat, jd0, fr0, span, obs, enu):
+    """
+    Zgrubny skan jednego satelity - zwraca czasy, promień orbity, sin elewacji,
+    jego pochodną, kąt środkowy [rad] i prędkość kątową [rad/s].
+    """
+    period = 2 * np.pi / sat.no_kozai * 60.0 if sat.no_kozai > 0 else COARSE_MAX_STEP
+    step = float(np.clip(period * COARSE_FRACTION, COARSE_MIN_STEP, COARSE_MAX_STEP))
+    t = np.arange(0.0, span + step, step)
+    t[-1] = min(t[-1], span)
+    e, r, v = sat.sgp4_array(np.full(len(t), jd0), fr0 + t / 86400.0)
+    r[e != 0] = np.nan
+    sin_el, d_sin_el, _, r_ecef, v_ecef = _elevation(r, v, jd0, fr0, t, obs, enu)
+    # Kąt środkowy między QTH a punktem podsatelitarnym i jego maksymalna prędkość zmian
+    radius = np.linalg.norm(r_ecef, axis=-1)
+    central = np.arccos(np.clip(r_ecef @ obs / (radius * np.linalg.norm(obs)), -1, 1))
+    rate = np.linalg.norm(v_ecef, axis=-1) / radius
+    return t, radius, sin_el, d_sin_el, central, rate
+
+
+def _compute(sats, jd0, fr0, span, obs, enu, min_el):
+    """Przeloty dla listy satelitów. Zwraca (właściciel, aos, tca, los, max_el, az_aos, az_los)."""
+    el_min = np.radians(min_el)
+    sin_min = np.sin(el_min)
+    parts = []
+
+    for i, sat in enumerate(sats):
+        t, radius, s, ds, psi, rate = _scan(sat, jd0, fr0, span, obs, enu)
+        valid = np.isfinite(s)
+        if not valid.any():
+            continue
+        above = valid & (s >= sin_min)
+        # Maksima elewacji: pochodna zmienia znak z + na -
+        k = np.flatnonzero((ds[:-1] > 0) & (ds[1:] <= 0))
+        # Odrzucamy przedziały, w których satelita na pewno nie wychodzi nad horyzont:
+        # kąt środkowy zmienia się najwyżej z prędkością `rate`, a widoczność wymaga
+        # kąta mniejszego niż promień zasięgu `lam` dla danej wysokości.
+        lam = np.arccos(WGS84_A * np.cos(el_min) / np.nanmax(radius)) - el_min + np.radians(0.5)
+        reach = np.nanmax(rate) * (t[k + 1] - t[k])
+        k = k[(psi[k] + psi[k + 1] - reach) / 2 <= lam]
+        lo, hi = t[k], t[k + 1]
+        # Przelot trwający na początku / końcu okna
+        if above[0] and ds[0] <= 0:
+            k = np.r_[0, k]; lo = np.r_[0.0, lo]; hi = np.r_[0.0, hi]
+        if above[-1] and ds[-1] > 0:
+            k = np.r_[k, len(t) - 1]; lo = np.r_[lo, span]; hi = np.r_[hi, span]
+        if not len(k):
+            continue
+        # Ostatnia próbka poniżej progu przed maksimum i pierwsza po nim
+        idx = np.arange(len(t))
+        below = valid & ~above
+        prev_below = np.maximum.accumulate(np.where(below, idx, -1))
+        next_below = np.minimum.accumulate(np.where(below, idx, len(t))[::-1])[::-1]
+        j = prev_below[k]
+        m = next_below[np.minimum(k + 1, len(t) - 1)]
+        j_c, m_c = np.maximum(j, 0), np.minimum(m, len(t) - 1)
+        k1 = np.minimum(k + 1, len(t) - 1)
+        parts.append(np.column_stack([
+            np.full(len(k), i), lo, hi, ds[k], ds[k1],
+            t[j_c], t[np.minimum(j + 1, len(t) - 1)], s[j_c], j < 0,
+            t[np.maximum(m - 1, 0)], t[m_c], s[m_c], m >= len(t),
+        ]))
+
+    if not parts:
+        return None
+    (owner, lo, hi, g_lo, g_hi, a_lo, a_hi, sa_lo, a_open,
+     l_lo, l_hi, sl_hi, l_open) = np.vstack(parts).T
+    owner = owner.astype(int)
+    group = _Group(sats, owner)
+    look = lambda sub, t: _elevation(*sub.propagate(jd0, fr0, t), jd0, fr0, t, obs, enu)
+
+    # 1. Kulminacja: zero pochodnej elewacji
+    edge = lo == hi
+    tca = lo.copy()
+    if (~edge).any():
+        sub = group.subset(~edge)
+        tca[~edge] = _regula_falsi(lambda x: look(sub, x)[1], lo[~edge], hi[~edge], g_lo[~edge], g_hi[~edge], safeguard=True)
+    max_sin = look(group, tca)[0]
+
+    keep = np.isfinite(max_sin) & (max_sin >= sin_min)
+    owner, tca, max_sin = owner[keep], tca[keep], max_sin[keep]
+    a_lo, a_hi, sa_lo, a_open = a_lo[keep], np.minimum(a_hi[keep], tca), sa_lo[keep], a_open[keep] > 0
+    l_lo, l_hi, sl_hi, l_open = np.maximum(l_lo[keep], tca), l_hi[keep], sl_hi[keep], l_open[keep] > 0
+    group = group.subset(keep)
+
+    # 2. AOS i LOS: przejście elewacji przez próg
+    aos, los = np.zeros(len(tca)), np.full(len(tca), span)
+    top = max_sin - sin_min
+    if (~a_open).any():
+        sub = group.subset(~a_open)
+        aos[~a_open] = _regula_falsi(lambda x: look(sub, x)[0] - sin_min,
+                                 a_lo[~a_open], a_hi[~a_open], sa_lo[~a_open] - sin_min, top[~a_open])
+    if (~l_open).any():
+        sub = group.subset(~l_open)
+        los[~l_open] = _regula_falsi(lambda x: look(sub, x)[0] - sin_min,
+                                 l_lo[~l_open], l_hi[~l_open], top[~l_open], sl_hi[~l_open] - sin_min)
+
+    az_aos = _azimuth(look(group, aos)[2])
+    az_los = _azimuth(look(group, los)[2])
+    max_el = np.degrees(np.arcsin(np.clip(max_sin, -1, 1)))
+    return owner, aos, tca, los, max_el, az_aos, az_los
+
+
+def _key(sat, lat, lon, alt_km, start, days, min_el):
+    """Klucz cache: satelita + epoka TLE, obserwator i okno czasowe."""
+    return (sat.satnum, sat.jdsatepoch + sat.jdsatepochF, round(lat, 4), round(lon, 4),
+            round(alt_km, 3), start, days, min_el)
+
+
+def predict_passes(catalog, lat, lon, alt_km=0.0, start=None, days=7, min_el=0.0, norads=None):
+    """
+    Przeloty satelitów z katalogu nad QTH (lat, lon) w oknie `days` dni od `start`.
+    `start` jest zaokrąglany w dół do pełnej godziny, żeby kolejne odświeżenia
+    strony trafiały w cache; przeloty zakończone przed `start` są odrzucane.
+    Zwraca DataFrame z kolumnami PASS_COLUMNS posortowany po AOS.
+    """
+    start = pd.Timestamp(start if start is not None else pd.Timestamp.now(tz="UTC"))
+    if start.tzinfo is None:
+        start = start.tz_localize("UTC")
+    window = start.floor("h")
+    epoch0 = to_epochs(window.to_pydatetime())
+    jd0, fr0 = (float(x[0]) for x in epochs_to_jd(epoch0))
+    span = days * 86400.0 + 3600.0
+
+    if norads is None:
+        idx = list(range(len(catalog)))
+    else:
+        idx = [catalog.index[n] for n in norads if n in catalog.index]
+    sats = [catalog.satrecs[i] for i in idx]
+    keys = [_key(s, lat, lon, alt_km, window.value, days, min_el) for s in sats]
+
+    with _cache_lock:
+        cached = {k: _cache[k] for k in keys if k in _cache}
+    missing = [i for i, k in enumerate(keys) if k not in cached]
+
+    if missing:
+        obs, enu = observer_ecef(lat, lon, alt_km)
+        res = _compute([sats[i] for i in missing], jd0, fr0, span, obs, enu, min_el)
+        fresh = {keys[i]: np.empty((0, 6)) for i in missing}
+        if res is not None:
+            owner, cols = res[0], np.column_stack(res[1:])
+            for j, i in enumerate(missing):
+                fresh[keys[i]] = cols[owner == j]
+        with _cache_lock:
+            _cache.update(fresh)
+            while len(_cache) > _CACHE_SIZE:
+                _cache.popitem(last=False)
+        cached.update(fresh)
+
+    rows = [(i, cached[k]) for i, k in zip(idx, keys) if len(cached[k])]
+    if not rows:
+        return pd.DataFrame(columns=PASS_COLUMNS)
+    sat_idx = np.concatenate([np.full(len(c), i) for i, c in rows])
+    data = np.vstack([c for _, c in rows])
+    base = window.tz_convert(None).to_datetime64()
+    to_time = lambda sec: pd.to_datetime(base + (sec * 1e6).astype("timedelta64[us]")).tz_localize("UTC")
+    df = pd.DataFrame({
+        "NORAD": catalog.norad[sat_idx],
+        "Nazwa": np.asarray(catalog.names, dtype=object)[sat_idx],
+        "AOS": to_time(data[:, 0]),
+        "Kulminacja": to_time(data[:, 1]),
+        "LOS": to_time(data[:, 2]),
+        "Max el (°)": data[:, 3].round(1),
+        "Az AOS (°)": data[:, 4].round(0),
+        "Az LOS (°)": data[:, 5].round(0),
+        "Czas (min)": ((data[:, 2] - data[:, 0]) / 60.0).round(1),
+    }, columns=PASS_COLUMNS)
+    end = start + pd.Timedelta(days=days)
+    df = df[(df["LOS"] > start) & (df["AOS"] < end)]
+    return df.sort_values("AOS", ignore_index=True)
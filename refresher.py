@@ -0,0 +1,122 @@
+"""
+Odświeżanie danych zewnętrznych w tle (stale-while-revalidate).
+
+Strona nigdy nie czeka na sieć: `get()` zawsze od razu zwraca ostatnią dobrą
+kopię, a wątek w tle pobiera nową wersję zanim stara się przeterminuje
+(po `refresh_ahead` * `ttl`). Równoczesne prośby o odświeżenie tego samego
+zasobu są sklejane w jedno zapytanie (single-flight).
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+
+class _Resource:
+    def __init__(self, name, fetch, ttl, refresh_ahead):
+        self.name = name
+        self.fetch = fetch
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.value = None
+        self.fetched_at = None
+        self.checked_at = None
+        self.error = None
+        self.future = None
+
+
+class BackgroundRefresher:
+    """
+    Harmonogram odświeżania zasobów. Zasób to nazwa + funkcja `fetch()`
+    zwracająca nową wartość (albo rzucająca wyjątek - wtedy zostaje stara).
+    """
+
+    def __init__(self, interval=15, max_workers=2, retry=60):
+        self.interval = interval
+        self.retry = retry
+        self._resources = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="refresher")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, name, fetch, ttl, refresh_ahead=0.8):
+        """Rejestruje zasób; pierwsze pobranie rusza od razu w tle."""
+        with self._lock:
+            self._resources[name] = _Resource(name, fetch, ttl, refresh_ahead)
+        self.refresh(name)
+
+    def __contains__(self, name):
+        return name in self._resources
+
+    def get(self, name, default=None):
+        """
+        Ostatnia dobra wartość zasobu - bez czekania na sieć.
+        Jeśli wartość jest przeterminowana, zleca odświeżenie w tle.
+        """
+        res = self._resources[name]
+        if self._due(res, time.time(), res.ttl):
+            self.refresh(name)
+        return res.value if res.fetched_at is not None else default
+
+    def refresh(self, name):
+        """Zleca odświeżenie w tle. Jeśli już trwa - zwraca to samo zadanie (Future)."""
+        res = self._resources[name]
+        with self._lock:
+            if res.future is not None and not res.future.done():
+                return res.future
+            res.future = self._pool.submit(self._run, res)
+            return res.future
+
+    def _run(self, res):
+        started = time.time()
+        try:
+            value = res.fetch()
+        except Exception as exc:
+            log.warning("Odświeżanie %s nie powiodło się: %s", res.name, exc)
+            res.error, res.checked_at = str(exc) or type(exc).__name__, started
+            return res.value
+        res.value, res.fetched_at, res.checked_at, res.error = value, started, started, None
+        return value
+
+    def _due(self, res, now, max_age):
+        """Czy zasób trzeba odświeżyć: brak danych, minął `max_age` lub czas ponowienia po błędzie."""
+        if res.checked_at is None:
+            return True
+        if res.error is not None:
+            return now - res.checked_at >= self.retry
+        return now - res.fetched_at >= max_age
+
+    def status(self, name):
+        """Stan zasobu: wiek danych [s], błąd i czy trwa odświeżanie."""
+        res = self._resources[name]
+        return {
+            "age": time.time() - res.fetched_at if res.fetched_at is not None else None,
+            "error": res.error,
+            "refreshing": res.future is not None and not res.future.done(),
+        }
+
+    # --- Wątek harmonogramu ---
+
+    def start(self):
+        """Uruchamia wątek, który odświeża zasoby z wyprzedzeniem."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="refresher-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._pool.shutdown(wait=False)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            now = time.time()
+            with self._lock:
+                resources = list(self._resources.values())
+            for res in resources:
+                if self._due(res, now, res.ttl * res.refresh_ahead):
+                    self.refresh(res.name)
@@ -0,0 +1,361 @@
+"""
+Obliczenia satelitarne w trybie wsadowym.
+
+Zamiast propagować satelitę krok po kroku (osobne wywołanie SGP4, osobny
+obiekt `Time` i osobna transformacja TEME -> ITRS dla każdej minuty),
+propagujemy całą tablicę epok jednym wywołaniem `sgp4_array`/`SatrecArray`
+i przeliczamy ją jedną, zwektoryzowaną transformacją układów.
+
+Domyślna transformacja TEME -> współrzędne geograficzne to sam NumPy: obrót
+o GMST i przeliczenie na elipsoidę WGS84. astropy (ruch bieguna, UT1) jest
+importowane dopiero w trybie precyzyjnym (`precise=True`) - jego import
+i maszyneria układów odniesienia są kosztowne. Błąd szybkiej ścieżki względem
+astropy ogranicza `check_fast_path()` (`python satellites.py`).
+"""
+import numpy as np
+import pandas as pd
+from sgp4.api import Satrec, SatrecArray
+
+UNIX_EPOCH_JD = 2440587.5
+J2000_JD = 2451545.0
+
+# Elipsoida WGS84 i prędkość obrotowa Ziemi
+WGS84_A = 6378.137
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+EARTH_ROTATION = 7.292115146706979e-5  # rad/s
+
+# Grupy TLE z CelesTrak ładowane przez tracker
+TLE_GROUPS = {
+    "stations": "Stacje kosmiczne",
+    "amateur": "Satelity amatorskie",
+    "weather": "Satelity pogodowe (NOAA/Meteor)",
+    "active": "Wszystkie aktywne (10k+ obiektów)",
+}
+TLE_GROUP_URL = "https://celestrak.org/NORAD/elements/gp.php?GROUP={group}&FORMAT=tle"
+
+
+def parse_tle(text):
+    """
+    Parsuje plik TLE w formacie 3-liniowym (nazwa, linia 1, linia 2).
+    Zwraca listę krotek (nazwa, linia1, linia2).
+    """
+    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    entries = []
+    i = 0
+    while i + 2 < len(lines):
+        name, l1, l2 = lines[i], lines[i+1], lines[i+2]
+        if l1.startswith("1 ") and l2.startswith("2 "):
+            entries.append((name, l1, l2))
+            i += 3
+        else:
+            i += 1
+    return entries
+
+
+def to_epochs(times):
+    """Zamienia datetime (UTC) lub listę datetime na tablicę `datetime64[us]`."""
+    arr = np.atleast_1d(np.asarray(times, dtype=object))
+    return np.array([t.replace(tzinfo=None) if hasattr(t, "tzinfo") else t for t in arr],
+                    dtype="datetime64[us]")
+
+
+def epochs_to_jd(epochs):
+    """Zwraca pary (jd, fr) dla SGP4 - część całkowitą (północ) i ułamek doby."""
+    days = (epochs - np.datetime64("1970-01-01T00:00:00", "us")) / np.timedelta64(1, "D")
+    whole = np.floor(days)
+    return whole + UNIX_EPOCH_JD, days - whole
+
+
+def propagate_epochs(sat, epochs):
+    """
+    Propaguje satelitę (`Satrec`) lub zbiór satelitów (`SatrecArray`)
+    dla całej tablicy epok jednym wywołaniem.
+    Zwraca (e, r, v): kody błędów, pozycje i prędkości TEME [km, km/s].
+    """
+    jd, fr = epochs_to_jd(epochs)
+    if isinstance(sat, SatrecArray):
+        return sat.sgp4(jd, fr)
+    return sat.sgp4_array(jd, fr)
+
+
+def teme_to_geodetic(r, epochs, precise=False):
+    """
+    Jedna transformacja TEME -> współrzędne geograficzne dla całej tablicy pozycji.
+    `r` ma kształt (..., N, 3), a `epochs` długość N.
+    Zwraca (lat, lon, wysokość_km). `precise=True` liczy przez astropy (TEME -> ITRS).
+    """
+    if precise:
+        return _teme_to_geodetic_astropy(r, epochs)
+    r = np.asarray(r, dtype=float)
+    theta = gmst(*epochs_to_jd(np.asarray(epochs)))
+    c, s = np.cos(theta), np.sin(theta)
+    x = c * r[..., 0] + s * r[..., 1]
+    y = -s * r[..., 0] + c * r[..., 1]
+    return ecef_to_geodetic(x, y, r[..., 2])
+
+
+def ecef_to_geodetic(x, y, z):
+    """
+    ECEF [km] -> (lat, lon [°], wysokość nad elipsoidą WGS84 [km]).
+    Iteracja szerokości zbiega do poniżej milimetra w kilku krokach; wysokość
+    liczona wzorem bez dzielenia przez cos(lat), więc poprawna także nad biegunami.
+    """
+    p = np.hypot(x, y)
+    lat = np.arctan2(z, p * (1 - WGS84_E2))
+    for _ in range(4):
+        sin_lat = np.sin(lat)
+        n = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_lat**2)
+        h = p * np.cos(lat) + z * sin_lat - WGS84_A * np.sqrt(1 - WGS84_E2 * sin_lat**2)
+        lat = np.arctan2(z, p * (1 - WGS84_E2 * n / (n + h)))
+    sin_lat = np.sin(lat)
+    h = p * np.cos(lat) + z * sin_lat - WGS84_A * np.sqrt(1 - WGS84_E2 * sin_lat**2)
+    return np.degrees(lat), np.degrees(np.arctan2(y, x)), h
+
+
+def _teme_to_geodetic_astropy(r, epochs):
+    # Import dopiero tutaj - astropy nie jest potrzebne na domyślnej ścieżce
+    from astropy.coordinates import TEME, ITRS, CartesianRepresentation
+    from astropy.time import Time
+    import astropy.units as u
+
+    r = np.asarray(r)
+    t = Time(epochs, scale="utc")
+    if r.ndim == 3:
+        # (satelity, epoki, 3) - czas rozgłaszany po osi satelitów
+        t = t[np.newaxis, :]
+    teme = TEME(CartesianRepresentation(r[..., 0], r[..., 1], r[..., 2], unit=u.km), obstime=t)
+    loc = teme.transform_to(ITRS(obstime=t)).earth_location
+    return loc.lat.deg, loc.lon.deg, loc.height.to_value(u.km)
+
+
+def gmst(jd, fr):
+    """Średni czas gwiazdowy Greenwich (IAU-82, jak w SGP4) w radianach."""
+    t = (jd - J2000_JD + fr) / 36525.0
+    sec = 67310.54841 + (876600.0 * 3600 + 8640184.812866) * t + 0.093104 * t**2 - 6.2e-6 * t**3
+    return np.mod(np.radians(sec / 240.0), 2 * np.pi)
+
+
+def teme_to_ecef(r, v, jd, fr):
+    """
+    Szybki obrót TEME -> ECEF (PEF) o kąt GMST, bez ruchu bieguna.
+    Wystarcza do kątów elewacji i Dopplera; zwraca (r_ecef, v_ecef) w km i km/s.
+    """
+    theta = gmst(jd, fr)
+    c, s = np.cos(theta), np.sin(theta)
+    r = np.asarray(r)
+    v = np.asarray(v)
+    x = c * r[..., 0] + s * r[..., 1]
+    y = -s * r[..., 0] + c * r[..., 1]
+    vx = c * v[..., 0] + s * v[..., 1] + EARTH_ROTATION * y
+    vy = -s * v[..., 0] + c * v[..., 1] - EARTH_ROTATION * x
+    return np.stack([x, y, r[..., 2]], axis=-1), np.stack([vx, vy, v[..., 2]], axis=-1)
+
+
+def observer_ecef(lat, lon, alt_km=0.0):
+    """
+    Pozycja obserwatora (QTH) w ECEF [km] oraz macierz ENU
+    (wiersze: wschód, północ, zenit) do liczenia azymutu i elewacji.
+    """
+    phi, lam = np.radians(lat), np.radians(lon)
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * np.sin(phi)**2)
+    pos = np.array([
+        (n + alt_km) * np.cos(phi) * np.cos(lam),
+        (n + alt_km) * np.cos(phi) * np.sin(lam),
+        (n * (1 - WGS84_E2) + alt_km) * np.sin(phi),
+    ])
+    enu = np.array([
+        [-np.sin(lam), np.cos(lam), 0.0],
+        [-np.sin(phi) * np.cos(lam), -np.sin(phi) * np.sin(lam), np.cos(phi)],
+        [np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)],
+    ])
+    return pos, enu
+
+
+def split_dateline(lats, lons):
+    """
+    Dzieli ślad na linii zmiany daty, żeby Plotly nie rysował kreski przez całą
+    mapę: w miejscu każdego przeskoku wstawia punkt na krawędzi mapy (szerokość
+    z interpolacji), przerwę (NaN) i punkt na przeciwnej krawędzi. Wszystkie
+    przeskoki naraz (`np.insert`); zwraca tablice float - NaN Plotly rysuje jako przerwę.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    i = np.flatnonzero(np.abs(np.diff(lons)) > 180)
+    if not len(i):
+        return lats, lons
+    edge = np.where(lons[i] > 0, 180.0, -180.0)
+    # Długość za linią "rozwinięta" o 360°, żeby interpolować po krótszej stronie
+    frac = (edge - lons[i]) / (lons[i + 1] + 2 * edge - lons[i])
+    lat_edge = lats[i] + frac * (lats[i + 1] - lats[i])
+    at = np.repeat(i + 1, 3)
+    return (np.insert(lats, at, np.column_stack([lat_edge, np.full(len(i), np.nan), lat_edge]).ravel()),
+            np.insert(lons, at, np.column_stack([edge, np.full(len(i), np.nan), -edge]).ravel()))
+
+
+class SatelliteCatalog:
+    """
+    Katalog satelitów propagowanych razem przez `SatrecArray`.
+    Duplikaty (ten sam numer NORAD w kilku grupach) są pomijane.
+    """
+
+    def __init__(self, entries):
+        self.names, self.lines, satrecs = [], [], []
+        self.index = {}
+        for name, l1, l2 in entries:
+            try:
+                sat = Satrec.twoline2rv(l1, l2)
+            except Exception:
+                continue
+            if sat.satnum in self.index:
+                continue
+            self.index[sat.satnum] = len(satrecs)
+            self.names.append(name)
+            self.lines.append((l1, l2))
+            satrecs.append(sat)
+        self.satrecs = satrecs
+        self.norad = np.array([s.satnum for s in satrecs], dtype=np.int64)
+        self.array = SatrecArray(satrecs) if satrecs else None
+
+    def __len__(self):
+        return len(self.satrecs)
+
+    def get(self, norad):
+        """Zwraca (nazwa, linia1, linia2) dla numeru NORAD lub None."""
+        i = self.index.get(int(norad))
+        if i is None:
+            return None
+        return (self.names[i],) + self.lines[i]
+
+    def propagate(self, epochs):
+        """
+        Propaguje cały katalog dla tablicy epok jednym wywołaniem.
+        Zwraca (e, r, v) o kształtach (satelity, epoki[, 3]).
+        """
+        return propagate_epochs(self.array, epochs)
+
+    def positions(self, when, precise=False, norads=None):
+        """
+        Aktualne pozycje satelitów w chwili `when` (datetime UTC) - wszystkich albo
+        tylko o numerach `norads` (propagowane są wtedy tylko one; numery spoza
+        katalogu są pomijane). Zwraca DataFrame: NORAD, Nazwa, Lat, Lon, Wys (km).
+        Satelity z błędem propagacji (np. przestarzałe TLE) są pomijane.
+        """
+        cols = ["NORAD", "Nazwa", "Lat", "Lon", "Wys (km)"]
+        if norads is None:
+            idx, sats = np.arange(len(self.satrecs)), self.array
+        else:
+            idx = np.array([self.index[n] for n in map(int, norads) if n in self.index], dtype=np.int64)
+            sats = SatrecArray([self.satrecs[i] for i in idx]) if len(idx) else None
+        if not len(idx):
+            return pd.DataFrame(columns=cols)
+        epochs = to_epochs(when)
+        e, r, _ = propagate_epochs(sats, epochs)
+        ok = (e[:, 0] == 0) & np.isfinite(r[:, 0, 0])
+        idx = idx[ok]
+        lat, lon, alt = teme_to_geodetic(r[ok, 0, :], epochs, precise)
+        return pd.DataFrame({
+            "NORAD": self.norad[idx],
+            "Nazwa": np.asarray(self.names, dtype=object)[idx],
+            "Lat": lat,
+            "Lon": lon,
+            "Wys (km)": alt,
+        }, columns=cols)
+
+
+class GroundTrack:
+    """
+    Ślad jednego satelity w przesuwanym oknie [teraz - before, teraz + after]
+    na siatce co `step` sekund, wyrównanej do pełnych kroków od epoki Unix.
+
+    Kolejne `update()` przesuwają okno: próbki wspólne ze starym oknem zostają,
+    a propagowane są tylko te, które pojawiły się na jego krawędzi (przy
+    odświeżaniu co sekundę - jedna nowa próbka na minutę), razem z bieżącą
+    pozycją w jednym wywołaniu SGP4.
+    """
+
+    def __init__(self, satrec, before=50 * 60, after=50 * 60, step=60, precise=False):
+        self.sat = satrec
+        self.precise = precise
+        self.before = np.timedelta64(before, "s")
+        self.after = np.timedelta64(after, "s")
+        self.step = np.timedelta64(step, "s")
+        self.epochs = np.array([], dtype="datetime64[us]")
+        self.lat = self.lon = self.alt = np.array([], dtype=float)
+        self.propagated = 0  # Łączna liczba propagowanych epok (diagnostyka)
+
+    def _grid(self, now):
+        unix = np.datetime64("1970-01-01T00:00:00", "us")
+        first = now - self.before
+        first = first - (first - unix) % self.step
+        return np.arange(first, now + self.after + self.step, self.step)
+
+    def update(self, when):
+        """
+        Przesuwa okno do chwili `when` (datetime UTC). Zwraca bieżącą pozycję
+        (lat, lon, wysokość_km) albo None, gdy propagacja się nie udała.
+        """
+        now = to_epochs(when)
+        grid = self._grid(now[0])
+        keep = np.isin(self.epochs, grid)
+        new = grid[~np.isin(grid, self.epochs)]
+        epochs = np.concatenate([now, new])
+        e, r, _ = propagate_epochs(self.sat, epochs)
+        self.propagated += len(epochs)
+        ok = e == 0
+        lat, lon, alt = (np.full(len(epochs), np.nan) for _ in range(3))
+        if ok.any():
+            lat[ok], lon[ok], alt[ok] = teme_to_geodetic(r[ok], epochs[ok], self.precise)
+        order = np.argsort(np.concatenate([self.epochs[keep], new]), kind="stable")
+        self.epochs = np.concatenate([self.epochs[keep], new])[order]
+        self.lat = np.concatenate([self.lat[keep], lat[1:]])[order]
+        self.lon = np.concatenate([self.lon[keep], lon[1:]])[order]
+        self.alt = np.concatenate([self.alt[keep], alt[1:]])[order]
+        if not ok[0]:
+            return None
+        return float(lat[0]), float(lon[0]), float(alt[0])
+
+    def path(self):
+        """Ślad (lat, lon) gotowy do rysowania - z przerwami na linii zmiany daty."""
+        ok = np.isfinite(self.lat)
+        return split_dateline(self.lat[ok], self.lon[ok])
+
+
+# Dopuszczalny błąd szybkiej ścieżki względem astropy. Pomijamy UT1-UTC (< 0.9 s,
+# czyli do ~0.004° długości) i ruch bieguna (ułamki sekundy łuku) - na mapie
+# i w obliczeniach przelotów to niezauważalne.
+FAST_PATH_TOLERANCE = {"lat_deg": 0.001, "lon_deg": 0.005, "alt_km": 0.001}
+
+
+def check_fast_path(n=2000, seed=0, tolerance=FAST_PATH_TOLERANCE):
+    """
+    Porównuje szybką transformację (NumPy) z astropy dla losowych pozycji
+    (orbity od LEO do GEO, także nad biegunami) i epok z lat 2000-2025.
+    Zwraca słownik maksymalnych błędów; rzuca AssertionError po przekroczeniu
+    `tolerance`.
+    """
+    rng = np.random.default_rng(seed)
+    radius = rng.uniform(6500.0, 42500.0, n)
+    direction = rng.normal(size=(n, 3))
+    direction[: n // 20] = [0.0, 0.0, 1.0]  # Biegun północny
+    direction[n // 20: n // 10] = [1e-9, 0.0, -1.0]  # Biegun południowy
+    r = direction / np.linalg.norm(direction, axis=1, keepdims=True) * radius[:, np.newaxis]
+    start, end = np.datetime64("2000-01-01", "us"), np.datetime64("2025-12-31", "us")
+    epochs = start + (rng.uniform(0, 1, n) * (end - start).astype(np.int64)).astype("timedelta64[us]")
+
+    lat, lon, alt = teme_to_geodetic(r, epochs)
+    lat_ref, lon_ref, alt_ref = teme_to_geodetic(r, epochs, precise=True)
+    # Długość geograficzna nad biegunem jest nieokreślona - porównujemy poza nimi
+    off_pole = np.abs(lat_ref) < 89.9
+    errors = {
+        "lat_deg": float(np.max(np.abs(lat - lat_ref))),
+        "lon_deg": float(np.max(np.abs((lon - lon_ref + 180.0) % 360.0 - 180.0)[off_pole])),
+        "alt_km": float(np.max(np.abs(alt - alt_ref))),
+    }
+    for key, limit in tolerance.items():
+        assert errors[key] <= limit, f"{key}: błąd {errors[key]:.6f} > {limit}"
+    return errors
+
+
+if __name__ == "__main__":
+    print(check_fast_path())
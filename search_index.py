@@ -0,0 +1,85 @@
+"""
+Indeks odwrócony do wyszukiwarki częstotliwości.
+
+Tekst każdej kolumny jest normalizowany (małe litery, bez polskich znaków,
+"145,8" -> "145.8") i dzielony na tokeny (słowa i liczby). Indeks to posortowany
+słownik tokenów i jedna tablica numerów wierszy ułożona w kolejności tokenów
+(CSR), więc wszystkie tokeny zaczynające się od danego prefiksu zajmują
+ciągły fragment tej tablicy - wyszukanie to dwa `searchsorted` i jeden wycinek.
+
+Zapytanie "kanał 19" zwraca wiersze, w których każde słowo zapytania jest
+początkiem któregoś tokenu wiersza (w dowolnej z indeksowanych kolumn).
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+_TOKEN = r"\d+(?:\.\d+)*|[^\W\d_]+"
+
+
+def normalize(text):
+    """Normalizacja tekstu (Series lub str): małe litery, bez znaków diakrytycznych."""
+    s = pd.Series(text) if isinstance(text, str) else text
+    s = (
+        s.fillna("").astype(str).str.lower()
+        .str.replace("ł", "l", regex=False)
+        .str.normalize("NFKD")
+        .str.replace("[\u0300-\u036f]", "", regex=True)
+        .str.replace(r"(?<=\d),(?=\d)", ".", regex=True)
+    )
+    return s.iloc[0] if isinstance(text, str) else s
+
+
+def tokenize(text):
+    """Lista tokenów znormalizowanego zapytania."""
+    return re.findall(_TOKEN, normalize(text))
+
+
+class SearchIndex:
+    """Indeks tokenów dla kolumn `columns` tabeli `df` (pozycje wierszy 0..n-1)."""
+
+    def __init__(self, df, columns):
+        self.size = len(df)
+        parts = []
+        for col in columns:
+            if col not in df.columns:
+                continue
+            # Tokeny liczone raz dla każdej różnej wartości kolumny
+            codes, uniques = pd.factorize(df[col].fillna("").astype(str))
+            tokens = normalize(pd.Series(uniques, dtype=object)).str.findall(_TOKEN).explode().dropna()
+            vocab = pd.DataFrame({"code": tokens.index.to_numpy(), "term": tokens.to_numpy(dtype=str)})
+            # Pary (token, wiersz) z całej kolumny naraz
+            rows = pd.DataFrame({"code": codes, "row": np.arange(self.size)})
+            parts.append(rows.merge(vocab, on="code")[["term", "row"]])
+        if parts:
+            pairs = pd.concat(parts, ignore_index=True).drop_duplicates().sort_values(["term", "row"], kind="stable")
+            terms = pairs["term"].to_numpy(dtype=str)
+            self.rows = pairs["row"].to_numpy(dtype=np.int64)
+        else:
+            terms, self.rows = np.array([], dtype=str), np.array([], dtype=np.int64)
+        # Słownik tokenów i początek listy wierszy każdego tokenu
+        self.vocab, self.offsets = np.unique(terms, return_index=True)
+        self.offsets = np.append(self.offsets, len(terms))
+
+    def __len__(self):
+        return self.size
+
+    def prefix_rows(self, prefix):
+        """Maska wierszy zawierających token zaczynający się od `prefix`."""
+        lo, hi = np.searchsorted(self.vocab, [prefix, prefix + "\uffff"])
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.rows[self.offsets[lo]:self.offsets[hi]]] = True
+        return mask
+
+    def search(self, query):
+        """Pozycje wierszy (rosnąco) pasujących do wszystkich słów zapytania."""
+        tokens = tokenize(query)
+        if not tokens:
+            return np.arange(self.size)
+        mask = np.ones(self.size, dtype=bool)
+        for token in dict.fromkeys(tokens):
+            mask &= self.prefix_rows(token)
+            if not mask.any():
+                break
+        return np.flatnonzero(mask)
@@ -0,0 +1,62 @@
+"""
+Położenie Słońca i granica dnia i nocy liczone lokalnie (bez map z sieci).
+
+- `subsolar_point` - punkt podsłoneczny z uproszczonych wzorów Astronomical
+  Almanac (dokładność ~0.01°, wystarcza do mapy) i GMST z satellites.py.
+- `solar_elevation` - wysokość Słońca dla dowolnych tablic lat/lon naraz.
+- `greyline_grid` - siatka komórek w szarej strefie (zmierzch cywilny)
+  i w nocy; `terminator` - linia wschodu/zachodu (wysokość 0°) jako
+  jedna szerokość na każdą długość geograficzną.
+"""
+import numpy as np
+
+from satellites import J2000_JD, epochs_to_jd, gmst, to_epochs
+
+GREYLINE_DEG = (-6.0, 0.0)  # Szara strefa: Słońce od 6° pod horyzontem do horyzontu (zmierzch cywilny)
+
+
+def subsolar_point(when):
+    """Punkt podsłoneczny (lat, lon) [°] dla chwili `when` (datetime UTC)."""
+    jd, fr = epochs_to_jd(to_epochs(when))
+    n = float((jd - J2000_JD + fr)[0])  # Doby od J2000
+    mean_lon = np.radians((280.460 + 0.9856474 * n) % 360.0)
+    anomaly = np.radians((357.528 + 0.9856003 * n) % 360.0)
+    ecl_lon = mean_lon + np.radians(1.915 * np.sin(anomaly) + 0.020 * np.sin(2 * anomaly))
+    obliquity = np.radians(23.439 - 4e-7 * n)
+    ra = np.arctan2(np.cos(obliquity) * np.sin(ecl_lon), np.cos(ecl_lon))
+    dec = np.arcsin(np.sin(obliquity) * np.sin(ecl_lon))
+    lon = (np.degrees(ra - float(gmst(jd, fr)[0])) + 180.0) % 360.0 - 180.0
+    return float(np.degrees(dec)), float(lon)
+
+
+def solar_elevation(lats, lons, when):
+    """Wysokość Słońca nad horyzontem [°] dla tablic lat/lon (rozgłaszanych) w chwili `when`."""
+    s_lat, s_lon = np.radians(subsolar_point(when))
+    lat, dlon = np.radians(lats), np.radians(np.subtract(lons, np.degrees(s_lon)))
+    sin_el = np.sin(lat) * np.sin(s_lat) + np.cos(lat) * np.cos(s_lat) * np.cos(dlon)
+    return np.degrees(np.arcsin(np.clip(sin_el, -1.0, 1.0)))
+
+
+def greyline_grid(when, step=4.0, greyline=GREYLINE_DEG):
+    """
+    Środki komórek siatki `step` x `step` stopni po ciemnej stronie: zwraca
+    ((lat, lon) komórek szarej strefy, (lat, lon) komórek nocy) jako tablice.
+    """
+    lat, lon = np.meshgrid(np.arange(-90 + step / 2, 90, step), np.arange(-180 + step / 2, 180, step), indexing="ij")
+    lat, lon = lat.ravel(), lon.ravel()
+    el = solar_elevation(lat, lon, when)
+    grey = (el >= greyline[0]) & (el < greyline[1])
+    night = el < greyline[0]
+    return (lat[grey], lon[grey]), (lat[night], lon[night])
+
+
+def terminator(when, step=2.0):
+    """
+    Linia terminatora (wysokość Słońca 0°): tablice (lat, lon) co `step` stopni
+    długości. Z tan(lat) = -cos(H) / tan(deklinacja), H - kąt godzinny Słońca.
+    """
+    s_lat, s_lon = subsolar_point(when)
+    lon = np.arange(-180.0, 180.0 + step / 2, step)
+    dec = np.radians(s_lat if abs(s_lat) > 1e-6 else 1e-6)  # W równonoc terminator to prawie dwa południki
+    lat = np.degrees(np.arctan(-np.cos(np.radians(lon - s_lon)) / np.tan(dec)))
+    return lat, lon
@@ -0,0 +1,305 @@
+"""
+Pogoda kosmiczna z kanału XML N0NBH (hamqsl.com) - pobierana po stronie serwera.
+
+- `parse_solar_xml` zamienia kanał na liczby (SFI, indeksy A/K, plamy, wiatr
+  słoneczny, Bz) i warunki propagacji w pasmach KF (dzień/noc) oraz na UKF.
+- `SpaceWeatherStore` (SQLite w trybie WAL, jak magazyn TLE) trzyma historię
+  odczytów - jeden wiersz na czas aktualizacji podany przez N0NBH, więc częste
+  pobieranie nie dubluje danych - i kopię obrazka, którą strona podaje z
+  dysku zamiast kazać każdej przeglądarce pobierać je z hamqsl.com.
+- `stand_in_server` to lokalny zastępczy serwer kanału (XML + obrazki) do
+  testów bez sieci: `python space_weather.py 8765`, a w aplikacji
+  HAMQSL_URL = "http://127.0.0.1:8765".
+"""
+import json
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import requests
+
+HAMQSL_URL = "https://www.hamqsl.com"
+FEED_PATH = "/solarxml.php"
+# Obrazki N0NBH kopiowane na serwer: nazwa -> ścieżka (mapę dnia i nocy liczy solar.py)
+IMAGE_PATHS = {"solar": "/solar101vhf.php"}
+
+# Pola liczbowe kanału: kolumna w bazie -> znacznik XML
+NUMERIC_FIELDS = {
+    "sfi": "solarflux",
+    "a_index": "aindex",
+    "k_index": "kindex",
+    "sunspots": "sunspots",
+    "solar_wind": "solarwind",
+    "bz": "magneticfield",
+}
+# Pola tekstowe: kolumna w bazie -> znacznik XML
+TEXT_FIELDS = {"xray": "xray", "geomag": "geomagfield", "noise": "signalnoise"}
+# Angielskie skróty miesięcy z pola <updated> - własna tabela, bo strptime("%b")
+# zależy od locale procesu (np. pl_PL nie rozpozna "Oct")
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reading (
+    updated REAL PRIMARY KEY,
+    fetched REAL NOT NULL,
+    sfi REAL,
+    a_index REAL,
+    k_index REAL,
+    sunspots REAL,
+    solar_wind REAL,
+    bz REAL,
+    xray TEXT,
+    geomag TEXT,
+    noise TEXT,
+    bands TEXT,
+    vhf TEXT
+);
+CREATE TABLE IF NOT EXISTS image (
+    name TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    fetched REAL NOT NULL
+);
+"""
+
+
+def _number(text):
+    """Liczba z pola kanału ("150", " 8", "-1.2"); None dla "No Report" i pustych."""
+    try:
+        return float(str(text).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _updated(text):
+    """Czas aktualizacji N0NBH (" 17 Oct 2026 0345 GMT") jako znacznik UNIX; None, gdy nieczytelny."""
+    parts = str(text).split()
+    try:
+        day, month, year, hhmm, zone = parts
+        if zone != "GMT" or len(hhmm) != 4:
+            raise ValueError(text)
+        dt = datetime(int(year), MONTHS.index(month.title()) + 1, int(day), int(hhmm[:2]), int(hhmm[2:]),
+                      tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return dt.timestamp()
+
+
+def parse_solar_xml(text):
+    """
+    Odczyt z kanału XML: dict z `updated` (UNIX), polami NUMERIC_FIELDS (float
+    lub None) i TEXT_FIELDS, `bands` - {pasmo: {"day": ..., "night": ...}} -
+    i `vhf` - lista (zjawisko, obszar, stan). Rzuca ValueError, gdy to nie jest kanał N0NBH.
+    """
+    try:
+        root = ET.fromstring(text)
+    except ET.ParseError as exc:
+        raise ValueError(f"Niepoprawny XML pogody kosmicznej: {exc}") from exc
+    data = root.find("solardata") if root.tag != "solardata" else root
+    if data is None or data.find("solarflux") is None:
+        raise ValueError("Brak danych solardata w kanale")
+
+    def get(tag):
+        el = data.find(tag)
+        return el.text.strip() if el is not None and el.text else None
+
+    reading = {"updated": _updated(get("updated"))}
+    reading.update({col: _number(get(tag)) for col, tag in NUMERIC_FIELDS.items()})
+    reading.update({col: get(tag) for col, tag in TEXT_FIELDS.items()})
+    bands = {}
+    for el in data.iterfind("calculatedconditions/band"):
+        bands.setdefault(el.get("name"), {})[el.get("time")] = (el.text or "").strip()
+    reading["bands"] = bands
+    reading["vhf"] = [
+        (el.get("name"), el.get("location"), (el.text or "").strip())
+        for el in data.iterfind("calculatedvhfconditions/phenomenon")
+    ]
+    return reading
+
+
+class SpaceWeatherStore:
+    """
+    Historia odczytów pogody kosmicznej i kopie obrazków na dysku. Każda
+    operacja otwiera własne połączenie, więc obiekt można współdzielić między wątkami.
+    """
+
+    def __init__(self, path, base_url=HAMQSL_URL, timeout=10):
+        self.path = path
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Połączenie w transakcji - zatwierdzane na końcu bloku i zawsze zamykane."""
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _get(self, path):
+        resp = requests.get(self.base_url + path, headers={"User-Agent": "Mozilla/5.0"}, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp
+
+    # --- Odczyty ---
+
+    def add(self, reading, fetched=None):
+        """Zapisuje odczyt. Zwraca True, gdy to nowa aktualizacja (ten sam czas N0NBH jest pomijany)."""
+        fetched = time.time() if fetched is None else fetched
+        updated = reading.get("updated") or fetched
+        cols = ["updated", "fetched"] + list(NUMERIC_FIELDS) + list(TEXT_FIELDS) + ["bands", "vhf"]
+        values = (
+            [updated, fetched] + [reading.get(c) for c in NUMERIC_FIELDS] + [reading.get(c) for c in TEXT_FIELDS]
+            + [json.dumps(reading.get("bands") or {}), json.dumps(reading.get("vhf") or [])]
+        )
+        with self._connect() as db:
+            cur = db.execute(
+                f"INSERT OR IGNORE INTO reading ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", values
+            )
+            return cur.rowcount == 1
+
+    def refresh(self):
+        """Pobiera i zapisuje kanał XML. Zwraca "updated" albo "unchanged"; błędy sieci rzucają wyjątek."""
+        reading = parse_solar_xml(self._get(FEED_PATH).text)
+        return "updated" if self.add(reading) else "unchanged"
+
+    def latest(self):
+        """Najnowszy odczyt (dict jak z `parse_solar_xml` plus `fetched`) lub None."""
+        with self._connect() as db:
+            db.row_factory = sqlite3.Row
+            row = db.execute("SELECT * FROM reading ORDER BY updated DESC LIMIT 1").fetchone()
+        if row is None:
+            return None
+        reading = dict(row)
+        reading["bands"] = json.loads(reading["bands"] or "{}")
+        reading["vhf"] = [tuple(v) for v in json.loads(reading["vhf"] or "[]")]
+        return reading
+
+    def history(self, days=30):
+        """Odczyty liczbowe z ostatnich `days` dni (rosnąco) - DataFrame z kolumną czasu UTC."""
+        since = time.time() - days * 86400
+        with self._connect() as db:
+            df = pd.read_sql_query(
+                f"SELECT updated, {', '.join(NUMERIC_FIELDS)} FROM reading WHERE updated >= ? ORDER BY updated",
+                db, params=(since,),
+            )
+        df["updated"] = pd.to_datetime(df["updated"], unit="s", utc=True)
+        return df
+
+    # --- Obrazki ---
+
+    def refresh_image(self, name):
+        """Pobiera obrazek N0NBH i zapisuje jego kopię. Zwraca bajty obrazka."""
+        data = self._get(IMAGE_PATHS[name]).content
+        if not data:
+            raise ValueError(f"Pusty obrazek: {name}")
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO image (name, data, fetched) VALUES (?, ?, ?)", (name, data, time.time())
+            )
+        return data
+
+    def image(self, name):
+        """Kopia obrazka: (bajty, czas pobrania) lub None, jeśli jeszcze nie pobrany."""
+        with self._connect() as db:
+            row = db.execute("SELECT data, fetched FROM image WHERE name = ?", (name,)).fetchone()
+        return (bytes(row[0]), row[1]) if row else None
+
+
+# ===========================
+# Zastępczy serwer kanału (testy bez sieci)
+# ===========================
+def _png(width, height, rgb):
+    """Jednokolorowy obrazek PNG (bez bibliotek graficznych)."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    raw = b"".join(b"\x00" + bytes(rgb) * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+def stand_in_xml(now=None):
+    """
+    Kanał XML w formacie N0NBH z wartościami zależnymi od godziny (kolejne
+    godziny = nowe aktualizacje, więc historia rośnie jak na prawdziwym kanale).
+    """
+    now = time.time() if now is None else now
+    hour = int(now // 3600)
+    dt = datetime.fromtimestamp(hour * 3600, timezone.utc)
+    updated = f"{dt.day:02d} {MONTHS[dt.month - 1]} {dt.year} {dt:%H%M} GMT"
+    sfi, k = 120 + hour % 40, hour % 6
+    conditions = ["Poor", "Fair", "Good"]
+    bands = "".join(
+        f'<band name="{b}" time="{t}">{conditions[(i + j + k) % 3]}</band>'
+        for i, b in enumerate(["80m-40m", "30m-20m", "17m-15m", "12m-10m"])
+        for j, t in enumerate(["day", "night"])
+    )
+    return (
+        '<?xml version="1.0" encoding="ISO-8859-1"?><solar><solardata>'
+        '<source url="http://www.hamqsl.com">N0NBH</source>'
+        f"<updated> {updated}</updated><solarflux>{sfi}</solarflux><aindex> {k * 3 + 2}</aindex>"
+        f"<kindex>{k}</kindex><kindexnt>No Report</kindexnt><xray>B{1 + hour % 9}.0</xray>"
+        f"<sunspots>{sfi - 60}</sunspots><solarwind>{350 + hour % 200}.0</solarwind>"
+        f"<magneticfield>{(hour % 11) - 5}.0</magneticfield>"
+        f"<calculatedconditions>{bands}</calculatedconditions>"
+        '<calculatedvhfconditions>'
+        '<phenomenon name="vhf-aurora" location="northern_hemi">Band Closed</phenomenon>'
+        f'<phenomenon name="E-Skip" location="europe">{"50MHz ES" if k < 2 else "Band Closed"}</phenomenon>'
+        '</calculatedvhfconditions>'
+        f"<geomagfield>{'QUIET' if k < 3 else 'ACTIVE'}</geomagfield><signalnoise>S{k}-S{k + 1}</signalnoise>"
+        "</solardata></solar>"
+    )
+
+
+def stand_in_server(port=0, host="127.0.0.1"):
+    """
+    Lokalny serwer udający hamqsl.com: FEED_PATH (stand_in_xml) i IMAGE_PATHS
+    (jednokolorowe PNG). Działa w wątku w tle; zwraca obiekt serwera (port w `server_address`).
+    """
+    images = {path: _png(160, 90, (40 + 60 * i, 90, 140)) for i, path in enumerate(IMAGE_PATHS.values())}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == FEED_PATH:
+                body, kind = stand_in_xml().encode("latin-1"), "text/xml"
+            elif path in images:
+                body, kind = images[path], "image/png"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", kind)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="space-weather-stand-in", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    server = stand_in_server(int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
+    print(f"Zastępczy kanał N0NBH: http://{server.server_address[0]}:{server.server_address[1]}{FEED_PATH}")
+    threading.Event().wait()
@@ -0,0 +1,81 @@
+"""Szybka transformacja TEME -> współrzędne geograficzne względem astropy (`precise=True`)."""
+import numpy as np
+import pytest
+from sgp4.api import Satrec
+
+from satellites import FAST_PATH_TOLERANCE, check_fast_path, propagate_epochs, teme_to_geodetic, to_epochs
+
+pytest.importorskip("astropy")
+
+NOAA19 = (
+    "1 33591U 09005A   24017.51781829  .00000227  00000+0  14721-3 0  9991",
+    "2 33591  99.1448  89.3214 0013911 235.5237 124.4603 14.12876232768406",
+)
+GOES16 = (
+    "1 41866U 16071A   24017.51013226 -.00000266  00000+0  00000+0 0  9991",
+    "2 41866   0.0810 266.0547 0000933 266.2826 277.2963  1.00269985 26323",
+)
+
+
+def _errors(r, epochs, off_pole=89.9):
+    lat, lon, alt = teme_to_geodetic(r, epochs)
+    lat_ref, lon_ref, alt_ref = teme_to_geodetic(r, epochs, precise=True)
+    # Długość geograficzna nad biegunem jest nieokreślona - porównujemy poza nim
+    mask = np.abs(lat_ref) < off_pole
+    return {
+        "lat_deg": np.max(np.abs(lat - lat_ref)),
+        "lon_deg": np.max(np.abs((lon - lon_ref + 180.0) % 360.0 - 180.0)[mask], initial=0.0),
+        "alt_km": np.max(np.abs(alt - alt_ref)),
+    }
+
+
+def _assert_within_tolerance(errors):
+    for key, limit in FAST_PATH_TOLERANCE.items():
+        assert errors[key] <= limit, f"{key}: błąd {errors[key]:.6f} > {limit}"
+
+
+def _propagated(lines, hours=24, step_s=60):
+    epochs = to_epochs(np.datetime64("2024-01-17T12:00:00")) + np.arange(0, hours * 3600, step_s) * np.timedelta64(1, "s")
+    e, r, _ = propagate_epochs(Satrec.twoline2rv(*lines), epochs)
+    assert np.all(e == 0)
+    return r, epochs
+
+
+def test_random_orbits():
+    errors = check_fast_path(n=500, seed=1)
+    _assert_within_tolerance(errors)
+
+
+def test_polar_orbit():
+    r, epochs = _propagated(NOAA19)
+    lat, _, _ = teme_to_geodetic(r, epochs)
+    assert np.max(np.abs(lat)) > 80  # Przelot blisko obu biegunów
+    _assert_within_tolerance(_errors(r, epochs))
+
+
+@pytest.mark.parametrize("z", [1.0, -1.0])
+def test_over_pole(z):
+    epochs = np.datetime64("2000-01-01", "us") + np.arange(50) * np.timedelta64(180, "D")
+    radius = np.linspace(6500.0, 42500.0, len(epochs))
+    r = np.column_stack([np.full(len(epochs), 1e-9), np.zeros(len(epochs)), z * radius])
+    errors = _errors(r, epochs)
+    _assert_within_tolerance(errors)
+    lat, _, _ = teme_to_geodetic(r, epochs)
+    np.testing.assert_allclose(lat, 90.0 * z, atol=FAST_PATH_TOLERANCE["lat_deg"])
+
+
+def test_geostationary_orbit():
+    r, epochs = _propagated(GOES16)
+    lat, lon, alt = teme_to_geodetic(r, epochs)
+    assert np.all(np.abs(alt - 35786) < 100) and np.ptp(lon) < 1.0  # Stoi nad jednym punktem
+    _assert_within_tolerance(_errors(r, epochs))
+
+
+def test_geostationary_ring():
+    # Pierścień GEO co 10° długości, różne epoki 2000-2025
+    n = 36
+    theta = np.radians(np.arange(n) * 10.0)
+    r = 42164.0 * np.column_stack([np.cos(theta), np.sin(theta), np.zeros(n)])
+    epochs = np.datetime64("2000-01-01", "us") + np.arange(n) * np.timedelta64(263, "D")
+    _assert_within_tolerance(_errors(r, epochs))
+
@@ -0,0 +1,92 @@
+"""SpaceWeatherStore na lokalnym serwerze zastępczym N0NBH (`space_weather.stand_in_server`)."""
+import locale
+import time
+from datetime import datetime, timezone
+
+import pytest
+import requests
+
+from space_weather import MONTHS, SpaceWeatherStore, parse_solar_xml, stand_in_server, stand_in_xml
+
+
+@pytest.fixture
+def server():
+    server = stand_in_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def store(tmp_path, server):
+    host, port = server.server_address[:2]
+    return SpaceWeatherStore(str(tmp_path / "space.sqlite"), base_url=f"http://{host}:{port}")
+
+
+@pytest.mark.parametrize("month", range(1, 13))
+def test_updated_every_month(month):
+    now = datetime(2026, month, 7, 14, 0, tzinfo=timezone.utc).timestamp()
+    assert f" {MONTHS[month - 1]} " in stand_in_xml(now)
+    assert parse_solar_xml(stand_in_xml(now))["updated"] == now
+
+
+@pytest.mark.parametrize("name", ["pl_PL.UTF-8", "de_DE.UTF-8", "fr_FR.UTF-8"])
+def test_updated_ignores_locale(name):
+    saved = locale.setlocale(locale.LC_TIME)
+    try:
+        locale.setlocale(locale.LC_TIME, name)
+    except locale.Error:
+        pytest.skip(f"Brak locale {name}")
+    try:
+        now = datetime(2026, 10, 17, 3, 0, tzinfo=timezone.utc).timestamp()
+        assert parse_solar_xml(stand_in_xml(now))["updated"] == now
+    finally:
+        locale.setlocale(locale.LC_TIME, saved)
+
+
+def test_refresh_and_latest(store):
+    assert store.latest() is None
+    assert store.refresh() == "updated"
+    # Ta sama aktualizacja N0NBH drugi raz - bez nowego wiersza
+    assert store.refresh() == "unchanged"
+
+    reading = store.latest()
+    hour = int(time.time() // 3600)
+    assert reading["updated"] in (hour * 3600, (hour - 1) * 3600)  # Pobranie mogło trafić na zmianę godziny
+    assert reading["sfi"] == 120 + int(reading["updated"] // 3600) % 40
+    assert set(reading["bands"]) == {"80m-40m", "30m-20m", "17m-15m", "12m-10m"}
+    assert set(reading["bands"]["80m-40m"]) == {"day", "night"}
+    assert ("E-Skip", "europe") in [v[:2] for v in reading["vhf"]]
+    assert len(store.history()) == 1
+
+
+def test_history(store):
+    now = time.time()
+    for h in range(5, -1, -1):
+        assert store.add(parse_solar_xml(stand_in_xml(now - h * 3600)), fetched=now)
+    assert store.add(parse_solar_xml(stand_in_xml(now - 40 * 86400)), fetched=now)  # Poza oknem 30 dni
+
+    df = store.history(days=30)
+    assert len(df) == 6
+    assert df["updated"].is_monotonic_increasing
+    assert str(df["updated"].dt.tz) == "UTC"
+    assert list(df.columns[1:]) == ["sfi", "a_index", "k_index", "sunspots", "solar_wind", "bz"]
+    assert len(store.history(days=60)) == 7
+
+
+def test_cached_image(store, server):
+    assert store.image("solar") is None
+    data = store.refresh_image("solar")
+    assert data.startswith(b"\x89PNG")
+    cached, fetched = store.image("solar")
+    assert cached == data and fetched <= time.time()
+
+    # Serwer niedostępny - kopia na dysku zostaje
+    server.shutdown()
+    server.server_close()
+    store.timeout = 1
+    with pytest.raises(requests.RequestException):
+        store.refresh_image("solar")
+    with pytest.raises(requests.RequestException):
+        store.refresh()
+    assert store.image("solar")[0] == data
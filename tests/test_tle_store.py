@@ -0,0 +1,102 @@
+"""TLEStore na lokalnym serwerze zastępczym CelesTrak (`tle_store.stand_in_server`)."""
+import threading
+import time
+
+import pytest
+
+from tle_store import STAND_IN_TLE, TLEStore, stand_in_server
+
+ISS_ONLY = "\n".join(STAND_IN_TLE.splitlines()[:3]) + "\n"
+
+
+@pytest.fixture
+def server():
+    server = stand_in_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def store(tmp_path, server):
+    return TLEStore(str(tmp_path / "tle.sqlite"), url_template=server.url_template, ttl=3600, retry=300)
+
+
+def test_revalidation(store, server):
+    assert store.refresh("stations") == "updated"
+    assert [r[0] for r in store.group("stations")] == ["ISS (ZARYA)", "NOAA 19"]
+    etag = server.requests[0][1].get("If-None-Match")
+    assert etag is None
+
+    # Dane świeże - bez zapytania do serwera
+    assert store.refresh("stations") == "fresh"
+    assert len(server.requests) == 1
+
+    # Wymuszone sprawdzenie: zapytanie warunkowe i 304
+    assert store.refresh("stations", force=True) == "not-modified"
+    _, headers = server.requests[-1]
+    assert headers.get("If-None-Match", "").startswith('"')
+    assert headers.get("If-Modified-Since")
+    assert store.status("stations")["count"] == 2
+
+    # Nowe dane na serwerze - nowy ETag i pełna odpowiedź
+    server.groups["stations"] = ISS_ONLY
+    assert store.refresh("stations", force=True) == "updated"
+    assert [r[0] for r in store.group("stations")] == ["ISS (ZARYA)"]
+    assert store.get(33591) is not None  # Obiekt zostaje w magazynie, tylko wypada z grupy
+
+
+def test_stale_on_error(store, server):
+    assert store.refresh("weather") == "updated"
+    fetched = store.status("weather")["fetched"]
+
+    server.fail = True
+    assert store.refresh("weather", force=True) == "error"
+    status = store.status("weather")
+    assert "503" in status["error"]
+    assert status["fetched"] == fetched
+    assert len(store.group("weather")) == 2  # Ostatnia dobra kopia
+    assert store.get(25544)[0] == "ISS (ZARYA)"
+
+    # Po błędzie ponowienie dopiero po `retry`, nie po `ttl`
+    now = time.time()
+    assert not store.is_stale("weather", now=now + 299)
+    assert store.is_stale("weather", now=now + 301)
+
+    server.fail = False
+    assert store.refresh("weather", force=True) == "not-modified"
+    assert store.status("weather")["error"] is None
+
+
+def test_error_without_data(store, server):
+    assert store.refresh("unknown") == "error"
+    assert store.group("unknown") == []
+    assert "404" in store.status("unknown")["error"]
+
+
+def test_claim(store):
+    now = time.time()
+    assert store._claim("stations", "http://x", now, 3600, False)
+    assert not store._claim("stations", "http://x", now, 3600, False)
+    assert store._claim("stations", "http://x", now, 3600, True)
+
+
+def test_concurrent_refresh_fetches_once(tmp_path, server):
+    path = str(tmp_path / "tle.sqlite")
+    # Osobne obiekty jak w osobnych procesach Streamlit - wspólny jest tylko plik bazy
+    stores = [TLEStore(path, url_template=server.url_template) for _ in range(8)]
+    barrier = threading.Barrier(len(stores))
+    results = []
+
+    def run(s):
+        barrier.wait()
+        results.append(s.refresh("amateur"))
+
+    threads = [threading.Thread(target=run, args=(s,)) for s in stores]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(results) == ["fresh"] * 7 + ["updated"]
+    assert len(server.requests) == 1
+    assert len(stores[0].group("amateur")) == 2
@@ -0,0 +1,299 @@
+"""
+Trwały magazyn TLE (SQLite) indeksowany po numerze NORAD i nazwie.
+
+- Jeden plik bazy współdzielony przez wszystkie procesy Streamlit (tryb WAL).
+- Odświeżanie grup CelesTrak zapytaniami warunkowymi (ETag / If-Modified-Since):
+  gdy dane się nie zmieniły, serwer odpowiada 304 i nic nie pobieramy.
+- Błędy sieci nie kasują danych - zostaje ostatnia dobra kopia, a wiek epoki
+  TLE i czas ostatniego odświeżenia są dostępne do wyświetlenia.
+- Adres źródła jest parametrem, więc magazyn można testować na lokalnym
+  serwerze HTTP udającym CelesTrak (`stand_in_server`, z ETag i odpowiedzią 304):
+  `python tle_store.py 8766`, a w TLEStore `url_template=STAND_IN_URL`.
+"""
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from sgp4.api import Satrec
+
+from satellites import parse_tle, TLE_GROUP_URL, TLE_GROUPS, UNIX_EPOCH_JD
+
+GP_PATH = "/NORAD/elements/gp.php"
+STAND_IN_URL = "http://127.0.0.1:8766" + GP_PATH + "?GROUP={group}&FORMAT=tle"
+# Dane serwera zastępczego: ISS i NOAA 19 (styczeń 2024)
+STAND_IN_TLE = """ISS (ZARYA)
+1 25544U 98067A   24017.54519514  .00016149  00000+0  29290-3 0  9993
+2 25544  51.6415 158.8530 0005786 244.1866 179.9192 15.49622591435056
+NOAA 19
+1 33591U 09005A   24017.51781829  .00000227  00000+0  14721-3 0  9991
+2 33591  99.1448  89.3214 0013911 235.5237 124.4603 14.12876232768406
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tle (
+    norad INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_upper TEXT NOT NULL,
+    line1 TEXT NOT NULL,
+    line2 TEXT NOT NULL,
+    epoch REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tle_name ON tle(name_upper);
+CREATE TABLE IF NOT EXISTS tle_group (
+    grp TEXT NOT NULL,
+    norad INTEGER NOT NULL,
+    PRIMARY KEY (grp, norad)
+);
+CREATE TABLE IF NOT EXISTS source (
+    grp TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched REAL,
+    checked REAL,
+    error TEXT
+);
+"""
+
+
+def tle_epoch(sat):
+    """Epoka TLE jako znacznik czasu UNIX (sekundy)."""
+    return (sat.jdsatepoch - UNIX_EPOCH_JD + sat.jdsatepochF) * 86400.0
+
+
+class TLEStore:
+    """
+    Magazyn TLE na dysku. Każda operacja otwiera własne połączenie,
+    więc obiekt można bezpiecznie współdzielić między wątkami sesji.
+    """
+
+    def __init__(self, path, url_template=TLE_GROUP_URL, ttl=3600, retry=300, timeout=5):
+        self.path = path
+        self.url_template = url_template
+        self.ttl = ttl
+        self.retry = retry
+        self.timeout = timeout
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Połączenie w transakcji - zatwierdzane na końcu bloku i zawsze zamykane."""
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    # --- Odświeżanie ---
+
+    def is_stale(self, group, now=None, max_age=None):
+        """
+        Czy grupa wymaga sprawdzenia na serwerze: brak danych, minął `max_age`
+        (domyślnie `ttl`) albo - po błędzie - minął krótszy czas `retry`.
+        """
+        now = now or time.time()
+        max_age = self.ttl if max_age is None else max_age
+        with self._connect() as db:
+            row = db.execute("SELECT checked, error FROM source WHERE grp = ?", (group,)).fetchone()
+        if row is None or row[0] is None:
+            return True
+        return now - row[0] >= (self.retry if row[1] else max_age)
+
+    def _claim(self, group, url, now, max_age, force):
+        """
+        Atomowo rezerwuje odświeżenie grupy (ustawia `checked`), tak żeby z kilku
+        procesów, które jednocześnie uznały dane za stare, pobierał tylko jeden.
+        """
+        with self._connect() as db:
+            db.execute("INSERT OR IGNORE INTO source (grp, url) VALUES (?, ?)", (group, url))
+            cur = db.execute(
+                "UPDATE source SET checked = ? WHERE grp = ? AND (? OR checked IS NULL "
+                "OR ? - checked >= CASE WHEN error IS NULL THEN ? ELSE ? END)",
+                (now, group, force, now, max_age, self.retry),
+            )
+            return cur.rowcount == 1
+
+    def refresh(self, group, force=False, max_age=None):
+        """
+        Odświeża grupę zapytaniem warunkowym. Zwraca status:
+        "fresh" (dane młodsze niż `max_age` albo odświeża je inny proces),
+        "not-modified" (304), "updated" (nowe dane) lub "error" (stare dane zostają).
+        """
+        now = time.time()
+        max_age = self.ttl if max_age is None else max_age
+        url = self.url_template.format(group=group)
+        if not force and not self.is_stale(group, now, max_age):
+            return "fresh"
+        with self._connect() as db:
+            row = db.execute("SELECT etag, last_modified FROM source WHERE grp = ?", (group,)).fetchone()
+        if not self._claim(group, url, now, max_age, force):
+            return "fresh"
+        headers = {"User-Agent": "Mozilla/5.0"}
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+
+        try:
+            resp = requests.get(url, headers=headers, timeout=self.timeout)
+            if resp.status_code == 304:
+                self._mark(group, url, checked=now, error=None)
+                return "not-modified"
+            resp.raise_for_status()
+            entries = parse_tle(resp.text)
+            if not entries:
+                raise ValueError("Brak danych TLE w odpowiedzi serwera")
+        except Exception as exc:
+            self._mark(group, url, checked=now, error=str(exc) or type(exc).__name__)
+            return "error"
+
+        self._store(group, url, entries, now, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        return "updated"
+
+    def _mark(self, group, url, checked, error):
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO source (grp, url, checked, error) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(grp) DO UPDATE SET url = excluded.url, checked = excluded.checked, error = excluded.error",
+                (group, url, checked, error),
+            )
+
+    def _store(self, group, url, entries, now, etag, last_modified):
+        rows = []
+        for name, l1, l2 in entries:
+            try:
+                sat = Satrec.twoline2rv(l1, l2)
+            except Exception:
+                continue
+            rows.append((sat.satnum, name, name.upper(), l1, l2, tle_epoch(sat), now))
+        with self._connect() as db:
+            db.executemany(
+                "INSERT INTO tle (norad, name, name_upper, line1, line2, epoch, updated) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(norad) DO UPDATE SET name = excluded.name, name_upper = excluded.name_upper, "
+                "line1 = excluded.line1, line2 = excluded.line2, epoch = excluded.epoch, updated = excluded.updated "
+                "WHERE excluded.epoch >= tle.epoch",
+                rows,
+            )
+            db.execute("DELETE FROM tle_group WHERE grp = ?", (group,))
+            db.executemany("INSERT OR IGNORE INTO tle_group (grp, norad) VALUES (?, ?)", [(group, r[0]) for r in rows])
+            db.execute(
+                "INSERT INTO source (grp, url, etag, last_modified, fetched, checked, error) VALUES (?, ?, ?, ?, ?, ?, NULL) "
+                "ON CONFLICT(grp) DO UPDATE SET url = excluded.url, etag = excluded.etag, "
+                "last_modified = excluded.last_modified, fetched = excluded.fetched, checked = excluded.checked, error = NULL",
+                (group, url, etag, last_modified, now, now),
+            )
+
+    # --- Odczyt ---
+
+    def group(self, group):
+        """Lista (nazwa, linia1, linia2) dla grupy - w kolejności numerów NORAD."""
+        with self._connect() as db:
+            return db.execute(
+                "SELECT t.name, t.line1, t.line2 FROM tle_group g JOIN tle t ON t.norad = g.norad "
+                "WHERE g.grp = ? ORDER BY t.norad",
+                (group,),
+            ).fetchall()
+
+    def get(self, norad):
+        """(nazwa, linia1, linia2) dla numeru NORAD lub None."""
+        with self._connect() as db:
+            return db.execute("SELECT name, line1, line2 FROM tle WHERE norad = ?", (int(norad),)).fetchone()
+
+    def find(self, prefix, limit=20):
+        """Satelity, których nazwa zaczyna się od `prefix` (indeks po nazwie). Zwraca [(norad, nazwa)]."""
+        p = prefix.upper()
+        with self._connect() as db:
+            return db.execute(
+                "SELECT norad, name FROM tle WHERE name_upper >= ? AND name_upper < ? ORDER BY name_upper LIMIT ?",
+                (p, p + "\uffff", limit),
+            ).fetchall()
+
+    def epoch_age(self, norad, now=None):
+        """Wiek epoki TLE w dniach (None, jeśli satelity nie ma w magazynie)."""
+        with self._connect() as db:
+            row = db.execute("SELECT epoch FROM tle WHERE norad = ?", (int(norad),)).fetchone()
+        if row is None:
+            return None
+        return ((now or time.time()) - row[0]) / 86400.0
+
+    def status(self, group):
+        """Stan źródła: dict z kluczami fetched, checked, error, count (lub None)."""
+        with self._connect() as db:
+            row = db.execute("SELECT fetched, checked, error FROM source WHERE grp = ?", (group,)).fetchone()
+            count = db.execute("SELECT COUNT(*) FROM tle_group WHERE grp = ?", (group,)).fetchone()[0]
+        if row is None:
+            return None
+        return {"fetched": row[0], "checked": row[1], "error": row[2], "count": count}
+
+    def version(self, groups):
+        """Znacznik zmian danych dla grup - do unieważniania cache katalogu."""
+        marks = ",".join("?" * len(groups))
+        with self._connect() as db:
+            row = db.execute(f"SELECT MAX(fetched) FROM source WHERE grp IN ({marks})", tuple(groups)).fetchone()
+        return row[0] if row else None
+
+
+def stand_in_server(groups=None, port=0, host="127.0.0.1"):
+    """
+    Lokalny serwer udający CelesTrak: GP_PATH?GROUP=... zwraca tekst TLE grupy
+    z `groups` (domyślnie STAND_IN_TLE dla każdej z TLE_GROUPS), z nagłówkami
+    ETag i Last-Modified, a na zgodne If-None-Match odpowiada 304. Działa
+    w wątku w tle; zwraca obiekt serwera (port w `server_address`). Atrybuty
+    serwera: `groups` (można podmienić dane), `fail` (True - odpowiedzi 503),
+    `requests` (lista (grupa, nagłówki) kolejnych zapytań) i `url_template`.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            group = parse_qs(url.query).get("GROUP", [""])[0]
+            self.server.requests.append((group, dict(self.headers)))
+            if self.server.fail:
+                self.send_error(503)
+                return
+            if url.path != GP_PATH or group not in self.server.groups:
+                self.send_error(404)
+                return
+            body = self.server.groups[group].encode("ascii")
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=us-ascii")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", self.server.last_modified)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.groups = dict(groups) if groups is not None else dict.fromkeys(TLE_GROUPS, STAND_IN_TLE)
+    server.fail = False
+    server.requests = []
+    server.last_modified = formatdate(usegmt=True)
+    server.url_template = f"http://{host}:{server.server_address[1]}{GP_PATH}?GROUP={{group}}&FORMAT=tle"
+    threading.Thread(target=server.serve_forever, name="tle-stand-in", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    server = stand_in_server(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8766)
+    print(f"Zastępczy CelesTrak: {server.url_template}")
+    threading.Event().wait()
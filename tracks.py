@@ -0,0 +1,119 @@
+"""
+Ślady naziemne na wiele orbit i zasięgi radiowe (footprinty) satelitów.
+
+- `orbit_track` - ślad jednego satelity w dowolnie długim oknie (np. 24 h)
+  z próbkowaniem adaptacyjnym: zgrubna siatka (ułamek okresu orbity), potem
+  kolejne połowienia kroku tylko tam, gdzie ślad zakręca albo przechodzi
+  przez linię zmiany daty. Każdy poziom to jedno wywołanie SGP4 dla wszystkich
+  nowych epok naraz. 24 h śladu ISS to ~830 punktów (odchyłka od śladu
+  liczonego co 5 s < 0.2°, poniżej piksela mapy) zamiast 1440 co 60 s.
+- `footprint_radius` / `footprint_circles` - okręgi widoczności radiowej
+  (satelita nad horyzontem, opcjonalnie powyżej minimalnej elewacji) dla
+  wszystkich satelitów naraz, jako jeden ślad z przerwami.
+- Podział na linii zmiany daty to zwektoryzowane `split_dateline` z satellites.py.
+"""
+import numpy as np
+
+from geo import EARTH_RADIUS_KM
+from satellites import propagate_epochs, split_dateline, teme_to_geodetic, to_epochs
+
+# Zgrubny krok śladu jako ułamek okresu orbity (ISS: ~115 s), w granicach [s]
+TRACK_FRACTION = 1 / 48
+TRACK_MIN_STEP = 60.0
+TRACK_MAX_STEP = 900.0
+# Zagęszczanie: maks. odchylenie punktu od cięciwy sąsiadów [°] i najkrótszy krok [s]
+TRACK_TOLERANCE_DEG = 1.0
+TRACK_FINEST_STEP = 7.5
+
+FOOTPRINT_POINTS = 72  # Punkty na okrąg zasięgu (co 5°)
+
+
+def orbit_period(sat):
+    """Okres orbity [s] z ruchu średniego TLE (`no_kozai`, rad/min)."""
+    return 2 * np.pi / sat.no_kozai * 60.0
+
+
+def _propagate(sat, epochs, precise):
+    e, r, _ = propagate_epochs(sat, epochs)
+    lat, lon = np.full(len(epochs), np.nan), np.full(len(epochs), np.nan)
+    ok = (e == 0) & np.isfinite(r[:, 0])
+    if ok.any():
+        lat[ok], lon[ok], _ = teme_to_geodetic(r[ok], epochs[ok], precise)
+    return lat, lon
+
+
+def _needs_split(t, lat, lon, tolerance):
+    """
+    Odcinki [i, i+1] do podziału: sąsiadujące z punktem odchylonym od cięciwy
+    sąsiadów o więcej niż `tolerance` stopni albo przechodzące przez linię zmiany daty.
+    """
+    dlon = (np.diff(lon) + 180.0) % 360.0 - 180.0  # Krok długości po krótszej stronie
+    w = (t[1:-1] - t[:-2]) / (t[2:] - t[:-2])  # Położenie środkowego punktu na cięciwie
+    dev = np.hypot(
+        lat[1:-1] - (lat[:-2] + w * (lat[2:] - lat[:-2])),
+        dlon[:-1] - w * (dlon[:-1] + dlon[1:]),
+    )
+    bent = np.zeros(len(t) - 1, dtype=bool)
+    bent[:-1] |= dev > tolerance
+    bent[1:] |= dev > tolerance
+    return bent | (np.abs(np.diff(lon)) > 180)
+
+
+def orbit_track(sat, start, end, step=None, tolerance=TRACK_TOLERANCE_DEG, finest=TRACK_FINEST_STEP, precise=False):
+    """
+    Ślad satelity (`Satrec`) od `start` do `end` (datetime UTC) z próbkowaniem
+    adaptacyjnym. `step=None` - krok zgrubny z okresu orbity. Siatka jest
+    wyrównana do pełnych kroków od epoki Unix, więc kolejne wywołania dla
+    przesuniętego okna dają te same punkty. Zwraca (epoki, lat, lon) bez przerw.
+    """
+    if step is None:
+        step = float(np.clip(orbit_period(sat) * TRACK_FRACTION, TRACK_MIN_STEP, TRACK_MAX_STEP))
+    step_us = int(step * 1e6)
+    unix = np.datetime64("1970-01-01T00:00:00", "us")
+    t0, t1 = ((to_epochs(x)[0] - unix) // np.timedelta64(1, "us") for x in (start, end))
+    t = np.arange(t0 - t0 % step_us, t1 + step_us, step_us, dtype=np.int64)
+    lat, lon = _propagate(sat, unix + t.astype("timedelta64[us]"), precise)
+
+    while step_us > finest * 1e6 and len(t) > 2:
+        step_us //= 2
+        split = _needs_split(t, lat, lon, tolerance) & (np.diff(t) > step_us)
+        if not split.any():
+            break
+        mid = (t[:-1][split] + t[1:][split]) // 2
+        m_lat, m_lon = _propagate(sat, unix + mid.astype("timedelta64[us]"), precise)
+        at = np.flatnonzero(split) + 1
+        t, lat, lon = np.insert(t, at, mid), np.insert(lat, at, m_lat), np.insert(lon, at, m_lon)
+    return unix + t.astype("timedelta64[us]"), lat, lon
+
+
+def track_path(lat, lon):
+    """Ślad gotowy do rysowania: podzielony na linii zmiany daty (przerwy jako NaN)."""
+    ok = np.isfinite(lat)
+    return split_dateline(lat[ok], lon[ok])
+
+
+def footprint_radius(alt_km, min_el=0.0):
+    """
+    Promień zasięgu radiowego [° łuku wielkiego koła] dla wysokości `alt_km`:
+    obszar, z którego satelita jest widoczny na elewacji co najmniej `min_el` [°].
+    """
+    el = np.radians(min_el)
+    ratio = EARTH_RADIUS_KM / (EARTH_RADIUS_KM + np.maximum(np.asarray(alt_km, dtype=float), 0.0))
+    return np.degrees(np.arccos(ratio * np.cos(el)) - el)
+
+
+def footprint_circles(lats, lons, alts, min_el=0.0, points=FOOTPRINT_POINTS):
+    """
+    Okręgi zasięgu wszystkich satelitów naraz: tablice (lat, lon) jednego śladu,
+    okręgi oddzielone przerwami (NaN) i podzielone na linii zmiany daty.
+    """
+    lat0 = np.radians(np.asarray(lats, dtype=float))[:, None]
+    lon0 = np.radians(np.asarray(lons, dtype=float))[:, None]
+    d = np.radians(footprint_radius(alts, min_el))[:, None]
+    az = np.linspace(0.0, 2 * np.pi, points + 1)[None, :]  # Ostatni punkt domyka okrąg
+    lat = np.arcsin(np.sin(lat0) * np.cos(d) + np.cos(lat0) * np.sin(d) * np.cos(az))
+    lon = lon0 + np.arctan2(np.sin(az) * np.sin(d) * np.cos(lat0), np.cos(d) - np.sin(lat0) * np.sin(lat))
+    lat = np.degrees(lat)
+    lon = (np.degrees(lon) + 180.0) % 360.0 - 180.0
+    gap = np.full((len(lat), 1), np.nan)
+    return split_dateline(np.hstack([lat, gap]).ravel(), np.hstack([lon, gap]).ravel())